@@ -0,0 +1,71 @@
+"""
+Times token classification on malformed tokens designed to make
+backtracking regular expressions explode. The time per character should
+stay flat as the tokens grow, showing the worst case is linear in the
+token length.
+
+Run from the directory containing the prexel package:
+
+    python3 -m prexel.benchmarks.adversarial_benchmark
+"""
+import timeit
+
+from prexel import regex
+from prexel.parser.lexer import Lexer, CompiledLexer
+
+LENGTHS = (1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+# Each entry builds a malformed token of roughly the requested length
+CORPUS = (
+    ("<>--- without '>'", lambda n: "<>" + "-" * n),
+    ("<>--- then junk", lambda n: "<>" + "-" * n + "x"),
+    ("<>1-a-a-a-...>", lambda n: "<>1" + "-a" * (n // 2) + ">"),
+    ("<>--name--- then junk", lambda n: "<>" + "-" * (n // 2) + "a" *
+                                        (n // 2) + "-x>"),
+    ("nested (((", lambda n: "f" + "(" * n),
+    ("nested ((()))x", lambda n: "f" + "(" * (n // 2) + ")" * (n // 2) + "x"),
+    ("repeated a(a(a(", lambda n: "a(" * (n // 2)),
+)
+
+
+def best_time(function, number=3):
+    return min(timeit.Timer(function).repeat(repeat=3, number=number)) / number
+
+
+def classify_uncached(token):
+    # Bypass the LRU cache so every call runs the regex
+    return regex.classify.__wrapped__(token)
+
+
+def drain(lexer_class, text):
+    lexer = lexer_class(text)
+    while lexer.get_token() is not None:
+        pass
+
+
+def main():
+    engines = (
+        ("classify", classify_uncached),
+        ("Lexer", lambda token: drain(Lexer, "|Room " + token)),
+        ("CompiledLexer", lambda token: drain(CompiledLexer, "|Room " + token)),
+    )
+
+    print("ns per character of the token\n")
+    print("{:<24} {:<14}".format("token", "engine") +
+          "".join("{:>8}".format(length) for length in LENGTHS))
+
+    for description, build in CORPUS:
+        tokens = [build(length) for length in LENGTHS]
+
+        for engine, function in engines:
+            row = "{:<24} {:<14}".format(description, engine)
+
+            for token in tokens:
+                seconds = best_time(lambda: function(token))
+                row += "{:>8.1f}".format(seconds / len(token) * 1e9)
+
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
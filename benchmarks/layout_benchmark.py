@@ -0,0 +1,100 @@
+"""
+Measures the time taken to lay out and render whole class graphs of 10, 100
+and 1000 classes, and to render a viewport of a screenful of the diagram for
+up to 10000 classes. Each class inherits from one of the classes before it,
+and every third class aggregates another class.
+
+Run from the directory containing the prexel package:
+
+    python3 -m prexel.benchmarks.layout_benchmark
+"""
+import random
+import timeit
+
+from prexel.encoders.layout import Layout
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   AggregationDiagramPart)
+
+CLASS_COUNTS = (10, 100, 1000, 10000)
+
+# Diagrams with more classes are only rendered a viewport at a time
+FULL_RENDER_LIMIT = 1000
+
+# Rows and columns of the viewport
+VIEWPORT = (60, 200)
+
+FIELDS = ("name", "size", "color", "width", "height", "items", "owner", "id")
+METHODS = ("save()", "load()", "open()", "close()", "render(stream)")
+
+
+def build_diagram(class_count, seed=0):
+    """
+    Build a diagram with class_count classes in a random hierarchy.
+    """
+    generator = random.Random(seed)
+    diagram = Diagram()
+
+    for index in range(class_count):
+        name = "Class{}".format(index)
+        diagram.add_class(ClassDiagramPart(
+            name,
+            generator.sample(FIELDS, generator.randint(0, 3)) or None,
+            generator.sample(METHODS, generator.randint(0, 2)) or None))
+
+        # Roughly one class in eight starts a new hierarchy
+        if index and generator.random() > 0.125:
+            parent = generator.randrange(max(0, index - 20), index)
+            diagram.add_inheritance(name, "Class{}".format(parent))
+
+        if index % 3 == 2:
+            target = generator.randrange(class_count)
+            diagram.add_aggregation(name, "Class{}".format(target),
+                                    AggregationDiagramPart("items", "1", "*"))
+
+    return diagram
+
+
+def render_windows(layout, boxes):
+    """
+    Render a viewport around each of the boxes.
+    """
+    rows, columns = VIEWPORT
+
+    for box in boxes:
+        layout.window(max(0, box.row - rows // 2),
+                      max(0, box.column - columns // 2), rows, columns)
+
+
+def main():
+    print("{:>8} {:>12} {:>12} {:>12} {:>16}".format(
+        "classes", "layout ms", "render ms", "window ms", "rows x columns"))
+
+    for class_count in CLASS_COUNTS:
+        diagram = build_diagram(class_count)
+        layout = Layout(diagram)
+        boxes = random.Random(0).sample(layout.boxes, 10)
+
+        number = max(1, 1000 // class_count)
+        repeat = 3 if class_count <= FULL_RENDER_LIMIT else 1
+        layout_time = min(timeit.repeat(lambda: Layout(diagram),
+                                        repeat=repeat, number=number)) / number
+
+        if class_count <= FULL_RENDER_LIMIT:
+            render_time = "{:.1f}".format(min(timeit.repeat(
+                layout.render, repeat=3, number=number)) / number * 1000)
+        else:
+            render_time = "-"
+
+        # The index is built by the first window
+        layout.grid()
+        window_time = min(timeit.repeat(
+            lambda: render_windows(layout, boxes), repeat=3, number=1)) / 10
+
+        print("{:>8} {:>12.1f} {:>12} {:>12.2f} {:>16}".format(
+            class_count, layout_time * 1000, render_time, window_time * 1000,
+            "{} x {}".format(layout.height, layout.width)))
+
+
+if __name__ == "__main__":
+    main()
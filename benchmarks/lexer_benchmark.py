@@ -0,0 +1,70 @@
+"""
+Compares the throughput of the Lexer and CompiledLexer engines on easy-entry
+strings of increasing size.
+
+Run from the directory containing the prexel package:
+
+    python3 -m prexel.benchmarks.lexer_benchmark
+"""
+import timeit
+
+from prexel.parser.lexer import Lexer, CompiledLexer
+
+TOKEN_COUNTS = (10, 100, 1000, 10000, 100000)
+
+# A representative entry, cycled until the requested token count is reached
+ENTRY_TOKENS = ("Room", "size", ">>", "Kitchen", "color", "square_feet",
+                "show_kitchen()", "<>*-cupboards--1>", "Cupboard", "open()")
+
+
+def build_text(token_count):
+    """
+    Build an easy-entry string containing token_count tokens, including the
+    leading PREXEL marker.
+    """
+    tokens = ["|"]
+    while len(tokens) < token_count:
+        tokens.append(ENTRY_TOKENS[len(tokens) % len(ENTRY_TOKENS)])
+
+    return " ".join(tokens)
+
+
+def drain(lexer_class, text):
+    """
+    Pull every token from a new lexer and return the number of tokens.
+    """
+    lexer = lexer_class(text)
+    count = 0
+
+    while lexer.get_token() is not None:
+        count += 1
+
+    return count
+
+
+def tokens_per_second(lexer_class, text):
+    count = drain(lexer_class, text)
+    timer = timeit.Timer(lambda: drain(lexer_class, text))
+
+    # Repeat small inputs so each measurement takes a sensible amount of time
+    number = max(1, 20000 // count)
+    best = min(timer.repeat(repeat=3, number=number)) / number
+
+    return count / best
+
+
+def main():
+    print("{:>8} {:>16} {:>16} {:>8}".format("tokens", "Lexer tok/s",
+                                             "Compiled tok/s", "speedup"))
+
+    for token_count in TOKEN_COUNTS:
+        text = build_text(token_count)
+        lexer_rate = tokens_per_second(Lexer, text)
+        compiled_rate = tokens_per_second(CompiledLexer, text)
+
+        print("{:>8} {:>16,.0f} {:>16,.0f} {:>7.1f}x".format(
+            token_count, lexer_rate, compiled_rate, compiled_rate / lexer_rate))
+
+
+if __name__ == "__main__":
+    main()
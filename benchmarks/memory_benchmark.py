@@ -0,0 +1,93 @@
+"""
+Measures the memory used per class by models of 100k classes, with names
+taken from a small vocabulary like in real spec files. Compares diagram
+parts holding their own copy of every name with parts whose names are
+interned, with frozen parts and with a ColumnarDiagram.
+
+Run from the directory containing the prexel package:
+
+    python3 -m prexel.benchmarks.memory_benchmark
+"""
+import gc
+import tracemalloc
+
+from prexel.models.diagram import ClassDiagramPart
+from prexel.models.columnar import ColumnarDiagram
+
+CLASSES = 100000
+FIELDS = ("name", "size", "color", "width", "height", "items", "owner", "id")
+METHODS = ("save()", "load()", "open()", "close()", "render(stream)")
+
+
+def copy(value):
+    # Build an equal but distinct string, like a fresh token value
+    return "".join(list(value))
+
+
+def build(interned, frozen=False):
+    parts = []
+
+    for index in range(CLASSES):
+        part = ClassDiagramPart("Class{}".format(index))
+
+        for offset in range(4):
+            field = copy(FIELDS[(index + offset) % len(FIELDS)])
+            method = copy(METHODS[(index + offset) % len(METHODS)])
+
+            if interned:
+                part.add_field(field)
+                part.add_method(method)
+            else:
+                if not part.fields:
+                    part.fields, part.methods = [], []
+                part.fields.append(field)
+                part.methods.append(method)
+
+        if frozen:
+            part.freeze()
+
+        parts.append(part)
+
+    return parts
+
+
+def build_columnar():
+    columnar = ColumnarDiagram()
+
+    for index in range(CLASSES):
+        fields = [copy(FIELDS[(index + offset) % len(FIELDS)])
+                  for offset in range(4)]
+        methods = [copy(METHODS[(index + offset) % len(METHODS)])
+                   for offset in range(4)]
+        columnar.add_class("Class{}".format(index), fields, methods)
+
+    return columnar
+
+
+def bytes_per_class(function):
+    gc.collect()
+    tracemalloc.start()
+
+    parts = function()
+    size, _ = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    del parts
+
+    return size / CLASSES
+
+
+def main():
+    print("{} classes with 4 fields and 4 methods each\n".format(CLASSES))
+    print("{:<28}{:>16}".format("model", "bytes per class"))
+
+    for description, function in (
+            ("copied names", lambda: build(interned=False)),
+            ("interned names", lambda: build(interned=True)),
+            ("interned names, frozen", lambda: build(True, frozen=True)),
+            ("columnar", build_columnar)):
+        print("{:<28}{:>16.0f}".format(description, bytes_per_class(function)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from prexel.encoders.width import cells
+
+
+class Canvas:
+    """
+    A mutable grid of characters that pretty-printed boxes and arrows are
+    drawn onto at row/column coordinates. Each row is a list of characters,
+    so drawing only touches the cells written, and the text is built once
+    when the canvas is serialized.
+     __________ 
+    |  Canvas  |
+    |----------|
+    |rows      |
+    |width     |
+    |draw()    |
+    |lines()   |
+    |render()  |
+    |__________|
+
+    The canvas grows to fit whatever is drawn on it. Cells that were never
+    drawn on are filled with spaces. Wide characters take two cells, the
+    second one holding an empty string.
+    """
+    def __init__(self, fill=" "):
+        self.fill = fill
+        self.rows = []
+        self.width = 0
+
+    @property
+    def height(self):
+        return len(self.rows)
+
+    def draw(self, row, column, lines):
+        """
+        Draw lines of text with the first character of the first line at
+        the given row and column. Later drawings overwrite earlier ones.
+        """
+        for offset, text in enumerate(lines):
+            self.draw_text(row + offset, column, text)
+
+    def draw_text(self, row, column, text):
+        """
+        Draw a single line of text starting at the given row and column.
+        """
+        while len(self.rows) <= row:
+            self.rows.append([])
+
+        columns = cells(text)
+        row_cells = self.rows[row]
+        end = column + len(columns)
+
+        if len(row_cells) < end:
+            row_cells.extend(self.fill * (end - len(row_cells)))
+
+        row_cells[column:end] = columns
+
+        if end > self.width:
+            self.width = end
+
+    def lines(self):
+        """
+        Return the rows as strings, each padded to the width of the canvas.
+        """
+        return ["".join(row_cells) + self.fill * (self.width - len(row_cells))
+                for row_cells in self.rows]
+
+    def render(self):
+        """
+        Return the whole canvas as a string, with a newline after each row.
+        """
+        return "".join(line + "\n" for line in self.lines())
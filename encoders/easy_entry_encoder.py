@@ -0,0 +1,71 @@
+from prexel.encoders.encoder import Encoder
+
+
+class EasyEntryEncoder(Encoder):
+    """
+    EasyEntryEncoder turns a diagram back into the single-line easy-entry
+    string that the interpreter builds it from.
+
+     _______ 
+    |Encoder|
+    |_______|
+    ∆
+    |________________ 
+    |EasyEntryEncoder|
+    |----------------|
+    |generate()      |
+    |________________|
+
+    """
+    def generate(self, diagram):
+        tokens = []
+        main_fields = list(diagram.main.fields or [])
+        trailing = []
+
+        if diagram.parent and diagram.inheritance:
+            tokens.extend(EasyEntryEncoder.class_tokens(diagram.parent))
+            tokens.append(">>")
+
+        aggregation = diagram.aggregation
+
+        # The interpreter adds the aggregation name as a field of the main
+        # class, after the fields entered before the arrow. Without a parent,
+        # the fields entered after the aggregated class also belong to the
+        # main class.
+        if aggregation and aggregation.name in main_fields:
+            index = len(main_fields) - 1 - \
+                main_fields[::-1].index(aggregation.name)
+
+            if not diagram.parent:
+                trailing = main_fields[index + 1:]
+
+            main_fields = main_fields[:index] + main_fields[
+                index + 1 + len(trailing):]
+
+        tokens.append(diagram.main.name)
+        tokens.extend(main_fields)
+        tokens.extend(diagram.main.methods or [])
+
+        if aggregation and diagram.aggregated:
+            tokens.append(EasyEntryEncoder.create_aggregation_arrow(
+                aggregation))
+
+            if diagram.parent:
+                tokens.extend(EasyEntryEncoder.class_tokens(
+                    diagram.aggregated))
+            else:
+                tokens.append(diagram.aggregated.name)
+                tokens.extend(trailing)
+
+        return "|" + " ".join(tokens)
+
+    @staticmethod
+    def class_tokens(class_diagram):
+        return [class_diagram.name] + list(class_diagram.fields or []) + \
+            list(class_diagram.methods or [])
+
+    @staticmethod
+    def create_aggregation_arrow(aggregation):
+        return "<>{}-{}--{}>".format(aggregation.left_multiplicity or "",
+                                     aggregation.name or "",
+                                     aggregation.right_multiplicity or "")
@@ -0,0 +1,878 @@
+"""
+Layered layout of every class in the class graph of a Diagram, drawn in the
+pretty-printed style.
+
+The layout follows the Sugiyama method:
+
+    blocks      a class aggregated by a single class, and without any
+                inheritance, is placed directly to the right of the class
+                aggregating it, joined by the usual <>---> arrow
+    ranks       every inheritance puts the parent on a rank above the child
+                and every other aggregation puts the aggregating class above
+                the aggregated class. Cycles are broken by ignoring the
+                edges that close them.
+    dummies     edges spanning more than one rank get a dummy unit, one
+                column wide, on every rank in between
+    ordering    the units of each rank are sorted by the barycenter of their
+                neighbours on the rank above, then on the rank below, for a
+                number of sweeps
+    placement   units are placed left to right, each as close to the average
+                column of its neighbours above as there is room for
+    routing     the edges between two ranks run along horizontal tracks,
+                assigned by greedy interval colouring so that tracks are
+                shared by edges whose spans don't overlap
+
+An edge spanning k ranks adds k - 1 dummy units, so for V classes, E edges
+and R ranks there are up to U = V + E * R units. The ordering sweeps and
+the track assignment sort them, making the layout O(U log U), which is
+O(V * E log V) when long inheritance chains make R grow with V. For large
+models, most of the time goes to ordering the dummy units.
+
+Inheritance is drawn from a ∆ below the parent to the top left corner of
+the child. An aggregation that isn't drawn as an arrow between neighbouring
+boxes leaves its class on the right with a <> arrow and enters the
+aggregated class from the left with a >. Edges bend at a +.
+"""
+from collections import Counter, defaultdict, namedtuple
+from heapq import heappop, heappush
+
+from prexel.encoders.canvas import Canvas
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.encoders.width import clip, text_width
+from prexel.models.diagram import ClassDiagramPart
+from prexel.models.validator import UnionFind
+
+# Columns between the units of a rank
+SPACING = 2
+
+# Rounds of barycenter ordering, each going down and back up the ranks
+SWEEPS = 4
+
+# Rows and columns covered by each bucket of a GridIndex
+GRID_ROWS = 32
+GRID_COLUMNS = 128
+
+# A class box placed at a row and column of the layout. lines are the lines
+# of the box, without newlines.
+Box = namedtuple("Box", "name row column lines")
+
+# Text placed at a row and column of the layout, written down the column if
+# vertical is true
+Segment = namedtuple("Segment", "row column text vertical")
+
+
+class Layout:
+    """
+    Places every class and relationship of a diagram's class graph.
+     ___________ 
+    |  Layout   |
+    |-----------|
+    |diagram    |
+    |boxes      |
+    |segments   |
+    |nets       |
+    |width      |
+    |height     |
+    |render()   |
+    |window()   |
+    |___________|
+
+    The boxes and segments can be drawn in any order, as long as all the
+    segments are drawn before the boxes.
+    """
+    def __init__(self, diagram, sweeps=SWEEPS):
+        self.diagram = diagram
+        self.sweeps = sweeps
+        self.boxes = []
+        self.segments = []
+        self.nets = []
+        self.width = 0
+        self.height = 0
+        self._grid = None
+
+        self.build()
+
+    def build(self):
+        """
+        Lay out the class graph of the diagram.
+        """
+        diagram = self.diagram
+        parts = dict(diagram.classes)
+        inheritances = [edge for edge in diagram.inheritances
+                        if edge.source != edge.target]
+        aggregations = list(diagram.aggregations)
+
+        # Classes only named by a relationship are drawn as empty boxes
+        for edge in diagram.inheritances + aggregations:
+            for name in edge[:2]:
+                if name not in parts:
+                    parts[name] = ClassDiagramPart(name)
+
+        units, routed, joined = join_blocks(parts, inheritances, aggregations)
+        unit_of = {name: unit for unit in units for name in unit.names}
+        layers = rank(units, [(unit_of[edge.target], unit_of[edge.source])
+                              for edge in inheritances] +
+                             [(unit_of[edge.source], unit_of[edge.target])
+                              for edge in routed])
+
+        children = {edge.source for edge in inheritances}
+        boxes = {}
+
+        for name, part in parts.items():
+            lines = PrettyPrintEncoder.class_lines(part, name in children)
+            boxes[name] = BoxPorts(name, unit_of[name], lines)
+
+        for name, edge in joined.items():
+            boxes[name].joined = edge.part
+            boxes[edge.target].joined_from = True
+
+        segments = []
+
+        for edge in inheritances:
+            child = boxes[edge.source]
+            parent = boxes[edge.target]
+
+            if child.unit.rank < parent.unit.rank:
+                upper = child.port("corner_bottom")
+                lower = parent.port("delta_top")
+            elif child.unit.rank > parent.unit.rank:
+                upper = parent.port("delta_bottom")
+                lower = child.port("corner_top")
+            else:
+                upper = parent.port("delta_bottom")
+                lower = child.port("corner_bottom")
+
+            segments.extend(route(upper, lower, layers))
+
+        for edge in routed:
+            source = boxes[edge.source]
+            target = boxes[edge.target]
+
+            # The arrows leave and enter towards the rank of the other end,
+            # through the gap below the rank if both are on the same rank
+            exit = source.arrow(edge, leaving=True,
+                                up=target.unit.rank < source.unit.rank)
+            entry = target.arrow(edge, leaving=False,
+                                 up=target.unit.rank > source.unit.rank)
+
+            if target.unit.rank < source.unit.rank:
+                segments.extend(route(entry, exit, layers))
+            else:
+                segments.extend(route(exit, entry, layers))
+
+        for box in boxes.values():
+            box.allocate()
+
+        for unit in units:
+            unit.arrange([boxes[name] for name in unit.names])
+
+        order(layers, segments, self.sweeps)
+        place(layers, segments)
+        self.draw(layers, segments)
+
+    def draw(self, layers, segments):
+        """
+        Assign the rows of the ranks and the tracks of the edges between
+        them, and create the boxes and segments.
+        """
+        channels = [[] for _ in layers]
+        for upper, lower in segments:
+            channels[upper.unit.rank].append((upper, lower))
+
+        tops = []
+        heights = []
+        tracks = []
+        row = 0
+
+        for layer, channel in zip(layers, channels):
+            nets = connect(channel)
+            track_count = assign_tracks(nets)
+            height = max([unit.height for unit in layer] or [0])
+
+            tops.append(row)
+            heights.append(height)
+            tracks.append(nets)
+            self.nets.extend(nets)
+            row += height
+
+            # A row for the ∆ of the parents, the tracks and a row for the
+            # ∆ of parents below their children
+            if channel or len(tops) < len(layers):
+                row += 1 + track_count
+                row += any(port.kind == "delta_top" for net in nets
+                           for port in net.ports)
+
+        for unit in (unit for layer in layers for unit in layer):
+            unit.row = tops[unit.rank]
+
+        self.height = row
+        lines = []
+        verticals = []
+        labels = []
+
+        for top, height, nets in zip(tops, heights, tracks):
+            port_row = top + height
+
+            for net in nets:
+                downs = [port for port in net.ports if not port.up]
+                ups = [port for port in net.ports if port.up]
+
+                if net.track is None:
+                    # Every port is on the same column
+                    if ups:
+                        vertical(verticals, min(port.attach for port in downs),
+                                 max(port.attach for port in ups), net.left)
+                    continue
+
+                track = port_row + 1 + net.track
+                lines.append(Segment(track, net.left,
+                                     "-" * (net.right - net.left + 1), False))
+
+                for port in downs:
+                    vertical(verticals, port.attach, track - 1, port.column)
+                for port in ups:
+                    vertical(verticals, track + 1, port.attach, port.column)
+
+                labels.extend(Segment(track, column, "+", False)
+                              for column in {port.column
+                                             for port in net.ports})
+
+        for upper, lower in segments:
+            for port in (upper, lower):
+                if port.glyph:
+                    labels.append(Segment(port.unit.row + port.row,
+                                          port.column, port.glyph, False))
+
+        for layer in layers:
+            for unit in layer:
+                for row, offset, text in unit.labels:
+                    labels.append(Segment(unit.row + row,
+                                          unit.column + offset, text, False))
+
+                for box in unit.boxes:
+                    self.boxes.append(Box(box.name, unit.row,
+                                          unit.column + unit.offsets[box.name],
+                                          box.lines))
+
+                self.width = max(self.width, unit.column + unit.width)
+
+        for segment in lines:
+            self.width = max(self.width, segment.column + len(segment.text))
+
+        # Deduplicate the glyphs of ports shared by several edges
+        self.segments = lines + verticals + list(dict.fromkeys(labels))
+
+    def render(self):
+        """
+        Return the whole diagram as a string, with a newline after each
+        row.
+        """
+        canvas = Canvas()
+
+        for segment in self.segments:
+            draw_segment(canvas, segment)
+
+        for box in self.boxes:
+            canvas.draw(box.row, box.column, box.lines)
+
+        return canvas.render()
+
+    def window(self, top, left, rows, columns):
+        """
+        Return the lines of the diagram in a viewport of the given number of
+        rows and columns, with its top left corner at row top and column
+        left. Only the boxes and segments overlapping the viewport are
+        drawn, so scrolling takes time in proportion to the viewport rather
+        than to the diagram. The viewport is cut off at the edges of the
+        diagram.
+        """
+        bottom = min(top + rows, self.height)
+        right = min(left + columns, self.width)
+
+        if bottom <= top or right <= left:
+            return []
+
+        canvas = Canvas()
+        canvas.draw_text(bottom - top - 1, 0, " " * (right - left))
+
+        def draw(row, column, text):
+            start = max(column, left)
+            end = min(column + text_width(text), right)
+
+            if top <= row < bottom and start < end:
+                canvas.draw_text(row - top, start - left,
+                                 clip(text, start - column, end - column))
+
+        for item in self.grid().query(top, left, bottom, right):
+            if isinstance(item, Box):
+                for row in range(max(top, item.row),
+                                 min(bottom, item.row + len(item.lines))):
+                    draw(row, item.column, item.lines[row - item.row])
+            elif item.vertical:
+                for row in range(max(top, item.row),
+                                 min(bottom, item.row + len(item.text))):
+                    draw(row, item.column, item.text[row - item.row])
+            else:
+                draw(item.row, item.column, item.text)
+
+        return canvas.lines()
+
+    def render_window(self, top, left, rows, columns):
+        """
+        Return the window() as a string, with a newline after each row.
+        """
+        return "".join(line + "\n"
+                       for line in self.window(top, left, rows, columns))
+
+    def grid(self):
+        """
+        Return the GridIndex of the boxes and segments, built the first
+        time it is needed.
+        """
+        if self._grid is None:
+            self._grid = GridIndex()
+
+            for segment in self.segments:
+                if segment.vertical:
+                    self._grid.add(segment, segment.row, segment.column,
+                                   segment.row + len(segment.text),
+                                   segment.column + 1)
+                else:
+                    self._grid.add(segment, segment.row, segment.column,
+                                   segment.row + 1,
+                                   segment.column + text_width(segment.text))
+
+            for box in self.boxes:
+                self._grid.add(box, box.row, box.column,
+                               box.row + len(box.lines),
+                               box.column + len(box.lines[0]))
+
+        return self._grid
+
+
+class GridIndex:
+    """
+    Spatial index of the boxes and segments of a layout. The rows and
+    columns are divided into buckets of GRID_ROWS by GRID_COLUMNS, and each
+    bucket lists the items overlapping it.
+    """
+    def __init__(self, rows=GRID_ROWS, columns=GRID_COLUMNS):
+        self.rows = rows
+        self.columns = columns
+        self.items = []
+        self.bounds = []
+        self.buckets = defaultdict(list)
+
+    def add(self, item, top, left, bottom, right):
+        """
+        Add an item covering the rows from top to bottom and the columns
+        from left to right, not including bottom and right.
+        """
+        index = len(self.items)
+        self.items.append(item)
+        self.bounds.append((top, left, bottom, right))
+
+        for row in range(top // self.rows, (bottom - 1) // self.rows + 1):
+            for column in range(left // self.columns,
+                                (right - 1) // self.columns + 1):
+                self.buckets[row, column].append(index)
+
+    def query(self, top, left, bottom, right):
+        """
+        Return the items overlapping the rectangle, in the order they were
+        added.
+        """
+        found = set()
+        bounds = self.bounds
+
+        for row in range(top // self.rows, (bottom - 1) // self.rows + 1):
+            for column in range(left // self.columns,
+                                (right - 1) // self.columns + 1):
+                for index in self.buckets.get((row, column), ()):
+                    if index in found:
+                        continue
+
+                    item_top, item_left, item_bottom, item_right = \
+                        bounds[index]
+
+                    if item_top < bottom and top < item_bottom and \
+                            item_left < right and left < item_right:
+                        found.add(index)
+
+        return [self.items[index] for index in sorted(found)]
+
+
+class Unit:
+    """
+    A block of classes joined by aggregation arrows, or a dummy unit for an
+    edge passing through a rank. A unit is ordered and placed as a whole.
+    """
+    def __init__(self, names, rank=0):
+        self.names = names
+        self.rank = rank
+        self.position = 0
+        self.row = 0
+        self.column = 0
+        self.width = 1
+        self.height = 0
+        self.boxes = []
+
+        # Column of each box and the text drawn around the boxes, relative
+        # to the row and column of the unit
+        self.offsets = {}
+        self.labels = []
+
+        # Edges to the units on the ranks above and below, as pairs of the
+        # upper and the lower port
+        self.above = []
+        self.below = []
+
+    def arrange(self, boxes):
+        """
+        Place the boxes of a block left to right, leaving room for the
+        aggregation arrows between them and around them.
+        """
+        self.boxes = boxes
+        column = boxes[0].left
+
+        for box, following in zip(boxes, boxes[1:] + [None]):
+            self.offsets[box.name] = column
+            self.labels.extend((row, column + offset, text)
+                               for row, offset, text in box.labels)
+            self.height = max(self.height, box.rows)
+            column += box.width
+
+            if following is None:
+                column += box.right
+                break
+
+            # The arrow to the following box is stretched over the room
+            # needed by the other arrows leaving this box
+            aggregation = box.joined
+            arrow = PrettyPrintEncoder.create_aggregation_arrow(aggregation)
+            gap = max(text_width(arrow), box.right + 1)
+            split = len(arrow) - 1 - len(aggregation.right_multiplicity or "")
+
+            self.labels.append((1, column, arrow[:split] +
+                                "-" * (gap - text_width(arrow)) +
+                                arrow[split:]))
+            column += gap
+
+        self.width = column
+
+
+class BoxPorts:
+    """
+    The box of a class with the ports where its edges end.
+    """
+    def __init__(self, name, unit, lines):
+        self.name = name
+        self.unit = unit
+        self.lines = [line.rstrip("\n") for line in lines]
+        self.width = len(self.lines[0])
+        self.height = len(self.lines)
+        self.rows = self.height
+
+        # Columns left free on either side for the arrows
+        self.left = 0
+        self.right = 0
+
+        # The aggregation drawn as an arrow to the box on the right, and
+        # whether there is one from the box on the left
+        self.joined = None
+        self.joined_from = False
+
+        self.ports = {}
+        self.exits = []
+        self.entries = []
+        self.labels = []
+
+    def port(self, kind):
+        """
+        Return the inheritance port of the given kind, shared by all the
+        edges ending there.
+        """
+        port = self.ports.get(kind)
+
+        if port is None:
+            rows = {"delta_bottom": self.height, "delta_top": -1,
+                    "corner_bottom": self.height - 1, "corner_top": 0}
+            glyph = "∆" if kind.startswith("delta") else None
+            port = self.ports[kind] = Port(self.unit, kind, self.name,
+                                           rows[kind], glyph,
+                                           kind.endswith("top"))
+
+            # A box can be a parent and a child on the same side when the
+            # graph has cycles, then the ∆ moves off the corner
+            for side in ("bottom", "top"):
+                if "corner_" + side in self.ports and \
+                        "delta_" + side in self.ports:
+                    self.ports["delta_" + side].offset = 1
+
+        return port
+
+    def arrow(self, edge, leaving, up):
+        """
+        Return a new port for an aggregation arrow leaving or entering the
+        box. Its row and column are set by allocate().
+        """
+        port = Port(self.unit, "arrow", self.name, 0, "+", up)
+        port.edge = edge
+        (self.exits if leaving else self.entries).append(port)
+        return port
+
+    def allocate(self):
+        """
+        Assign the rows and columns of the arrows, leaving on the right and
+        entering on the left. The arrows going up come first, and the closer
+        a row is to the rank its arrow goes to, the nearer the bend of the
+        arrow is to the box, so the arrows don't cross each other.
+        """
+        first = 2 if self.joined else 1
+        ups = [port for port in self.exits if port.up]
+        ports = ups + [port for port in self.exits if not port.up]
+        texts = ["<>{}-{}-".format(port.edge.part.left_multiplicity or "",
+                                   port.edge.part.name) for port in ports]
+        reach = max([text_width(text) for text in texts] or [0])
+
+        for index, (port, text) in enumerate(zip(ports, texts)):
+            bend = index if port.up else len(ports) - 1 - index
+            port.row = first + index
+            port.offset = self.width + reach + bend
+            self.labels.append((port.row, self.width, text + "-" * (
+                port.offset - self.width - text_width(text))))
+
+        if ports:
+            self.right = reach + max(len(ups), len(ports) - len(ups))
+            self.rows = max(self.rows, first + len(ports))
+
+        first = 2 if self.joined_from else 1
+        ups = [port for port in self.entries if port.up]
+        ports = ups + [port for port in self.entries if not port.up]
+        texts = [(port.edge.part.right_multiplicity or "") + ">"
+                 for port in ports]
+        reach = max([len(text) for text in texts] or [0]) + 1
+
+        for index, (port, text) in enumerate(zip(ports, texts)):
+            bend = index if port.up else len(ports) - 1 - index
+            port.row = first + index
+            port.offset = -1 - reach - bend
+            self.labels.append((port.row, port.offset + 1, text.rjust(
+                -port.offset - 1, "-")))
+
+        if ports:
+            self.left = reach + max(len(ups), len(ports) - len(ups))
+            self.rows = max(self.rows, first + len(ports))
+
+
+class Port:
+    """
+    The end of an edge at a box or at a dummy unit, where a glyph may be
+    drawn. row is relative to the top of the rank and offset to the left of
+    the box. A port that is up is joined to the edges above its rank,
+    otherwise to those below.
+    """
+    def __init__(self, unit, kind, box, row, glyph, up):
+        self.unit = unit
+        self.kind = kind
+        self.box = box
+        self.offset = 0
+        self.row = row
+        self.glyph = glyph
+        self.up = up
+        self.edge = None
+
+    @property
+    def column(self):
+        column = self.unit.column + self.offset
+        if self.box is not None:
+            column += self.unit.offsets[self.box]
+
+        return column
+
+    @property
+    def attach(self):
+        """
+        The row next to the port where the edge leaves it.
+        """
+        return self.unit.row + self.row + (-1 if self.up else 1)
+
+
+class Net:
+    """
+    Ports in the gap below a rank, joined by a single horizontal track.
+    """
+    def __init__(self, ports):
+        self.ports = ports
+        columns = [port.column for port in ports]
+        self.left = min(columns)
+        self.right = max(columns)
+        self.track = None
+
+
+def join_blocks(parts, inheritances, aggregations):
+    """
+    Join each class aggregated by a single class, and without inheritance,
+    to the right of the class aggregating it.
+    :return: list of Unit, list of the aggregation edges still to route and
+        dictionary of class name to the aggregation edge joining it to the
+        next class
+    """
+    related = set()
+    for edge in inheritances:
+        related.update(edge[:2])
+
+    incoming = Counter(edge.target for edge in aggregations)
+    chains = UnionFind()
+    joined = {}
+    targets = set()
+    routed = []
+
+    for edge in aggregations:
+        source, target = edge.source, edge.target
+
+        # Joining a class to the block it starts would close a loop
+        if target not in related and incoming[target] == 1 and \
+                source not in joined and chains.union(source, target):
+            joined[source] = edge
+            targets.add(target)
+        else:
+            routed.append(edge)
+
+    units = []
+    for name in parts:
+        if name not in targets:
+            names = [name]
+            while names[-1] in joined:
+                names.append(joined[names[-1]].target)
+            units.append(Unit(names))
+
+    return units, routed, joined
+
+
+def rank(units, edges):
+    """
+    Rank every unit by the longest path to it from the units without edges
+    from above. When only units on cycles are left, the first of them is
+    ranked next and its remaining edges from above are ignored.
+    :return: list of the units on each rank
+    """
+    index = {id(unit): position for position, unit in enumerate(units)}
+    below = [[] for _ in units]
+    remaining = [0] * len(units)
+
+    for upper, lower in edges:
+        if upper is not lower:
+            below[index[id(upper)]].append(lower)
+            remaining[index[id(lower)]] += 1
+
+    done = [False] * len(units)
+    stack = [position for position, count in enumerate(remaining)
+             if not count]
+    stack.reverse()
+    cycle_start = 0
+    layers = []
+
+    for _ in units:
+        if not stack:
+            while done[cycle_start]:
+                cycle_start += 1
+            stack.append(cycle_start)
+
+        position = stack.pop()
+        done[position] = True
+        unit = units[position]
+
+        while len(layers) <= unit.rank:
+            layers.append([])
+        layers[unit.rank].append(unit)
+
+        for lower in below[position]:
+            lower_position = index[id(lower)]
+
+            if not done[lower_position]:
+                lower.rank = max(lower.rank, unit.rank + 1)
+                remaining[lower_position] -= 1
+
+                if not remaining[lower_position]:
+                    stack.append(lower_position)
+
+    return layers
+
+
+def route(upper, lower, layers):
+    """
+    Return the segments of an edge from a port on an upper rank to a port
+    on a lower rank, adding a dummy unit on every rank in between.
+    """
+    segments = []
+
+    for rank_index in range(upper.unit.rank + 1, lower.unit.rank):
+        dummy = Unit([], rank_index)
+        layers[rank_index].append(dummy)
+        segments.append((upper, Port(dummy, "dummy", None, 0, None, True)))
+        upper = Port(dummy, "dummy", None, -1, None, False)
+
+    segments.append((upper, lower))
+    return segments
+
+
+def order(layers, segments, sweeps):
+    """
+    Reduce the edge crossings by sorting each rank by the barycenter of the
+    positions of its neighbours on the rank above, going down, and on the
+    rank below, going up.
+    """
+    for upper, lower in segments:
+        if lower.unit.rank == upper.unit.rank + 1:
+            lower.unit.above.append((upper, lower))
+            upper.unit.below.append((upper, lower))
+
+    for layer in layers:
+        for position, unit in enumerate(layer):
+            unit.position = position
+
+    for _ in range(sweeps):
+        for layer in layers[1:]:
+            sort_layer(layer, lambda unit: [upper.unit for upper, _ in
+                                            unit.above])
+
+        for layer in reversed(layers[:-1]):
+            sort_layer(layer, lambda unit: [lower.unit for _, lower in
+                                            unit.below])
+
+
+def sort_layer(layer, neighbours):
+    """
+    Sort a rank by the barycenter of the neighbours of each unit. Units
+    without neighbours keep their position.
+    """
+    def barycenter(unit):
+        units = neighbours(unit)
+
+        if not units:
+            return unit.position, unit.position
+
+        return sum(other.position for other in units) / len(units), \
+            unit.position
+
+    layer.sort(key=barycenter)
+
+    for position, unit in enumerate(layer):
+        unit.position = position
+
+
+def place(layers, segments):
+    """
+    Assign the columns of the units, left to right on each rank, with each
+    unit as close as there is room for to the columns of its edges above.
+    A unit is moved further right while one of its ports would share a
+    column with a port of another net hanging from the rank above, so the
+    vertical lines of different edges in a gap never meet.
+    """
+    channels = defaultdict(list)
+    for upper, lower in segments:
+        channels[upper.unit.rank].append((upper, lower))
+
+    taken = {}
+
+    for rank_index, layer in enumerate(layers):
+        column = 0
+
+        for unit in layer:
+            wanted = column
+
+            # Line the lower ports up with the upper ports
+            if unit.above:
+                unit.column = 0
+                wanted = round(sum(upper.column - lower.column
+                                   for upper, lower in unit.above) /
+                               len(unit.above))
+
+            unit.column = max(column, wanted)
+
+            while any(taken.get(lower.column, set()) -
+                      {net_key(upper, lower)}
+                      for upper, lower in unit.above):
+                unit.column += 1
+
+            column = unit.column + unit.width + SPACING
+
+        # The columns of the ports hanging into the gap below the rank, with
+        # the nets using them
+        taken = defaultdict(set)
+
+        for upper, lower in channels[rank_index]:
+            key = net_key(upper, lower)
+            taken[upper.column].add(key)
+
+            if lower.unit.rank == rank_index:
+                taken[lower.column].add(key)
+
+
+def connect(channel):
+    """
+    Group the segments in the gap below a rank into nets. The edges from a
+    parent to its children share the ∆ port, and form a single net.
+    :return: list of Net
+    """
+    groups = {}
+
+    for upper, lower in channel:
+        ports = groups.setdefault(net_key(upper, lower), {})
+        ports[upper] = ports[lower] = None
+
+    return [Net(list(ports)) for ports in groups.values()]
+
+
+def net_key(upper, lower):
+    """
+    Return the key of the net of a segment. The edges from a parent to its
+    children share the ∆ port, every other segment is a net of its own.
+    """
+    if upper.glyph == "∆":
+        return upper
+
+    if lower.glyph == "∆":
+        return lower
+
+    return upper, lower
+
+
+def assign_tracks(nets):
+    """
+    Assign each net spanning more than one column to the lowest numbered
+    track free over its span, using the greedy interval colouring.
+    :return: number of tracks
+    """
+    busy = []
+    free = []
+    count = 0
+
+    for net in sorted((net for net in nets if net.left < net.right),
+                      key=lambda net: net.left):
+        # A track is free again one column after a net has ended on it
+        while busy and busy[0][0] + 1 < net.left:
+            heappush(free, heappop(busy)[1])
+
+        if free:
+            net.track = heappop(free)
+        else:
+            net.track = count
+            count += 1
+
+        heappush(busy, (net.right, net.track))
+
+    return count
+
+
+def vertical(segments, start, end, column):
+    if start <= end:
+        segments.append(Segment(start, column, "|" * (end - start + 1), True))
+
+
+def draw_segment(canvas, segment):
+    if segment.vertical:
+        canvas.draw(segment.row, segment.column, segment.text)
+    else:
+        canvas.draw_text(segment.row, segment.column, segment.text)
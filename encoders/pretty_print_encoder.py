@@ -1,4 +1,14 @@
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from itertools import chain
+
+from prexel.encoders.canvas import Canvas
 from prexel.encoders.encoder import Encoder
+from prexel.encoders.width import text_width
+
+# The pieces of a class box of one width. top, extends_top, separator and
+# bottom are whole lines, name and item format a line of text.
+BoxFormat = namedtuple("BoxFormat", "top extends_top name separator item bottom")
 
 
 class PrettyPrintEncoder(Encoder):
@@ -17,6 +27,7 @@ class PrettyPrintEncoder(Encoder):
     |PrettyPrintEncoder|
     |------------------|
     |generate()        |
+    |generate_to()     |
     |create_class()    |
     |__________________|
 
@@ -28,99 +39,108 @@ class PrettyPrintEncoder(Encoder):
 
         Precondition: Well-formed diagram element
         Returns: pretty-printed diagram
-        TODO commend this method
         """
-        result = ""
-        main_class = ""
+        return "".join(self.generate_lines(diagram))
 
-        if diagram.inheritance:
-            main_class += PrettyPrintEncoder.create_class(diagram.main, True)
-        else:
-            main_class += PrettyPrintEncoder.create_class(diagram.main)
+    def generate_to(self, diagram, stream):
+        """
+        Write the pretty-printed class diagram to a file-like object
+        line by line, without building the whole string first.
+        """
+        stream.writelines(self.generate_lines(diagram))
 
-        if diagram.aggregation:
-            aggregation_arrow = PrettyPrintEncoder.create_aggregation_arrow(diagram.aggregation)
-            aggregated_class = PrettyPrintEncoder.create_class(diagram.aggregated)
-            result += PrettyPrintEncoder.concat_aggregation(main_class,
-                                              aggregation_arrow,
-                                              aggregated_class)
-        else:
-            result += main_class
+    def generate_lines(self, diagram):
+        """
+        Return the lines of the pretty-printed class diagram, each ending
+        with a newline. The parent class and the inheritance arrow come
+        first, then the main class with the aggregated class to its right.
+        """
+        lines = []
 
         if diagram.parent:
-            parent = PrettyPrintEncoder.create_class(diagram.parent)
+            lines.extend(PrettyPrintEncoder.class_lines(diagram.parent))
             if diagram.inheritance:
-                parent += PrettyPrintEncoder.create_inheritance_arrow()
+                lines.append(PrettyPrintEncoder.create_inheritance_arrow())
 
-            result = parent + result
+        main_class = PrettyPrintEncoder.class_lines(diagram.main,
+                                                    bool(diagram.inheritance))
 
-        return result
+        if diagram.aggregation:
+            aggregation_arrow = PrettyPrintEncoder.create_aggregation_arrow(
+                diagram.aggregation)
+            aggregated_class = PrettyPrintEncoder.class_lines(diagram.aggregated)
+            lines.extend(PrettyPrintEncoder.concat_aggregation_lines(
+                main_class, aggregation_arrow, aggregated_class))
+        else:
+            lines.extend(main_class)
+
+        return lines
 
     @staticmethod
     def create_class(class_diagram, extends=False):
-        # Need to measure the different elements of the class diagram to see
-        # which is the longest string
-        items_to_measure = list()
-        items_to_measure.append(class_diagram.name)
+        return "".join(PrettyPrintEncoder.class_lines(class_diagram, extends))
 
-        if class_diagram.methods:
-            for method in class_diagram.methods:
-                items_to_measure.append(method)
+    @staticmethod
+    def class_lines(class_diagram, extends=False):
+        """
+        Return the lines of the box for a class, each ending with a newline.
+        Boxes are rendered once and then taken from the BOX_CACHE until the
+        class changes.
+        """
+        key = (class_diagram.name, tuple(class_diagram.fields or ()),
+               tuple(class_diagram.methods or ()), bool(extends))
+        lines = BOX_CACHE.get(key)
 
-        if class_diagram.fields:
-            for field in class_diagram.fields:
-                items_to_measure.append(field)
+        if lines is None:
+            lines = BOX_CACHE.put(key, PrettyPrintEncoder.render_class(
+                class_diagram, extends))
 
-        max_length = len(max(items_to_measure, key=len))
+        return list(lines)
 
+    @staticmethod
+    def render_class(class_diagram, extends=False):
         """
-        Create the class header
+        Render the lines of the box for a class, each ending with a newline.
         """
+        fields = class_diagram.fields or ()
+        methods = class_diagram.methods or ()
 
-        # Formatters
-        header_top_formatter = " {:_^" + str(max_length) + "} \n"
-        header_middle_formatter = "|{:^" + str(max_length) + "}|\n"
-        header_bottom_formatter = "|{:-^" + str(max_length) + "}|\n"
+        # The box is as wide as the widest of the name, fields and methods,
+        # measured in columns so wide characters count twice
+        width = text_width(class_diagram.name)
+        for item in chain(fields, methods):
+            item_width = text_width(item)
+            if item_width > width:
+                width = item_width
 
-        header_top = header_top_formatter.format("")
-        header_middle = header_middle_formatter.format(class_diagram.name)
-        header_bottom = header_bottom_formatter.format("")
+        box = box_format(width)
 
-        header = ""
+        def pad(field, text):
+            # The formats pad by length, so text with wide characters is
+            # formatted for a box narrower by its extra columns
+            line_width = width - (text_width(text) - len(text))
+            return getattr(box_format(line_width), field)(text)
 
-        # Add extends bar "|" on far left side
-        if extends:
-            header_top = "|" + header_top[1:]
+        """
+        Create the class header
+        """
 
-        header += header_top
-        header += header_middle
+        # Add extends bar "|" on far left side
+        lines = [box.extends_top if extends else box.top,
+                 pad("name", class_diagram.name)]
 
         # Add cross bar underneath class name
-        if class_diagram.fields or class_diagram.methods:
-            header += header_bottom
+        if fields or methods:
+            lines.append(box.separator)
 
         """
         Create the class body
         """
+        lines.extend(pad("item", item) for item in fields)
+        lines.extend(pad("item", item) for item in methods)
+        lines.append(box.bottom)
 
-        # Formatters
-        body_middle_formatter = "|{:<" + str(max_length) + "}|\n"
-        body_bottom_formatter = "|{:_^" + str(max_length) + "}|\n"
-
-        body = ""
-
-        if class_diagram.fields:
-            for field in class_diagram.fields:
-                body += body_middle_formatter.format(field)
-
-        if class_diagram.methods:
-            for method in class_diagram.methods:
-                body += body_middle_formatter.format(method)
-
-        body += body_bottom_formatter.format("")
-
-        # Result
-        return header + body
+        return lines
 
     @staticmethod
     def create_aggregation_arrow(aggregation_diagram):
@@ -146,45 +166,129 @@ class PrettyPrintEncoder(Encoder):
 
     @staticmethod
     def concat_aggregation(aggregator, aggregation, aggregated):
-        result = []
-        aggregator_parts = list(filter(None, aggregator.split("\n")))
-        aggregated_parts = list(filter(None, aggregated.split("\n")))
-
-        length_aggregator = len(max(aggregator_parts))
-        length_aggregated = len(max(aggregated_parts))
-        length_aggregation = len(aggregation)
-
-        height_aggregator = len(aggregator_parts)
-        height_aggregated = len(aggregated_parts)
-
-        combined = zip(aggregator_parts, aggregated_parts)
-        combined_list = list(combined)
-        start_index = len(combined_list)
-
-        for index, item in enumerate(combined_list):
-            line = item[0]
-            if index == 1:
-                line += aggregation
-            else:
-                line += " " * length_aggregation
-
-            line += item[1]
-
-            result.append(line)
-
-        if height_aggregator > height_aggregated:
-            for item in aggregator_parts[start_index:]:
-                line = item
-                line += " " * length_aggregation
-                line += " " * length_aggregated
-                result.append(line)
-        elif height_aggregated > height_aggregator:
-            for item in aggregated_parts[start_index:]:
-                line = " " * length_aggregator
-                line += " " * length_aggregation
-                line += item
-                result.append(line)
-        else:
-            pass  # If they are the same length they are already combined
+        return "".join(PrettyPrintEncoder.concat_aggregation_lines(
+            aggregator.split("\n"), aggregation, aggregated.split("\n")))
+
+    @staticmethod
+    def concat_aggregation_lines(aggregator, aggregation, aggregated):
+        """
+        Place the aggregated box to the right of the aggregator box, with
+        the aggregation arrow between them on the second line. Returns the
+        combined lines, each ending with a newline.
+        """
+        aggregator_parts = [line.rstrip("\n") for line in aggregator if line
+                            and line != "\n"]
+        aggregated_parts = [line.rstrip("\n") for line in aggregated if line
+                            and line != "\n"]
+
+        length_aggregator = max(map(text_width, aggregator_parts))
+
+        canvas = Canvas()
+        canvas.draw(0, 0, aggregator_parts)
+        canvas.draw(0, length_aggregator + text_width(aggregation),
+                    aggregated_parts)
+
+        # The arrow goes on the line with the class names
+        if min(len(aggregator_parts), len(aggregated_parts)) > 1:
+            canvas.draw_text(1, length_aggregator, aggregation)
+
+        return [line + "\n" for line in canvas.lines()]
+
+
+@lru_cache(maxsize=256)
+def box_format(width):
+    """
+    Return the BoxFormat for a class box of the given inner width. The
+    formats are compiled once per width and reused for every box.
+    """
+    return BoxFormat(top=" " + "_" * width + " \n",
+                     extends_top="|" + "_" * width + " \n",
+                     name="|{{:^{}}}|\n".format(width).format,
+                     separator="|" + "-" * width + "|\n",
+                     item="|{{:<{}}}|\n".format(width).format,
+                     bottom="|" + "_" * width + "|\n")
+
+
+class BoxCache:
+    """
+    Least recently used cache of the lines of rendered class boxes, keyed by
+    the name, fields, methods and extends flag of the class.
+     _____________ 
+    |  BoxCache   |
+    |-------------|
+    |capacity     |
+    |characters   |
+    |hits         |
+    |misses       |
+    |get()        |
+    |put()        |
+    |hit_rate()   |
+    |clear()      |
+    |_____________|
+
+    The cache holds at most capacity characters of box lines. When it is
+    full, the boxes used least recently are evicted first.
+    """
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.characters = 0
+        self.hits = 0
+        self.misses = 0
+        self.boxes = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the cached lines for the key, or None.
+        """
+        lines = self.boxes.get(key)
+
+        if lines is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.boxes.move_to_end(key)
+        return lines
+
+    def put(self, key, lines):
+        """
+        Cache the lines of a box and return them as a tuple. Boxes larger
+        than the whole cache aren't kept.
+        """
+        lines = tuple(lines)
+        size = sum(map(len, lines))
+
+        if size > self.capacity:
+            return lines
+
+        previous = self.boxes.pop(key, None)
+        if previous is not None:
+            self.characters -= sum(map(len, previous))
+
+        self.boxes[key] = lines
+        self.characters += size
+
+        while self.characters > self.capacity:
+            _, evicted = self.boxes.popitem(last=False)
+            self.characters -= sum(map(len, evicted))
+
+        return lines
+
+    def hit_rate(self):
+        """
+        Return the fraction of lookups that found a cached box.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.boxes.clear()
+        self.characters = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.boxes)
+
 
-        return "\n".join(result) + "\n"
+BOX_CACHE = BoxCache()
@@ -1,4 +1,5 @@
 from prexel.encoders.encoder import Encoder
+from prexel.models.hierarchy import HierarchyIndex
 from prexel.regex import REGEX
 
 # Load sublime if inside of sublime text
@@ -57,6 +58,24 @@ class SourceCodeEncoder(Encoder):
 
         return classes
 
+    def generate_all(self, diagram):
+        """
+        Generate every class in the class graph of the diagram, with parent
+        classes before their children.
+        Returns: a list of (name, class string) tuples
+        """
+        classes = []
+
+        for name in HierarchyIndex(diagram).topological():
+            parents = [edge.target for edge in diagram.get_parents(name)]
+            extends = ", ".join(parents) or None
+
+            source = SourceCodeEncoder.create_class(diagram.get_class(name),
+                                                    extends)
+            classes.append((name.lower(), source))
+
+        return classes
+
     @staticmethod
     def create_class(diagram, extends=None):
         """
@@ -0,0 +1,109 @@
+from array import array
+from bisect import bisect_right
+
+"""
+The code point ranges that take two columns in a monospaced font, i.e. the
+East Asian Wide and Fullwidth characters of Unicode 14.0. Each pair is the
+first and last code point of a range. Unassigned code points between wide
+characters are folded into the ranges to keep the table small, and the
+rest of planes 2 and 3 is wide as the standard reserves them for CJK.
+"""
+WIDE_RANGES = array("L", [
+    0x1100, 0x115F, 0x231A, 0x231B, 0x2329, 0x232A, 0x23E9, 0x23EC,
+    0x23F0, 0x23F0, 0x23F3, 0x23F3, 0x25FD, 0x25FE, 0x2614, 0x2615,
+    0x2648, 0x2653, 0x267F, 0x267F, 0x2693, 0x2693, 0x26A1, 0x26A1,
+    0x26AA, 0x26AB, 0x26BD, 0x26BE, 0x26C4, 0x26C5, 0x26CE, 0x26CE,
+    0x26D4, 0x26D4, 0x26EA, 0x26EA, 0x26F2, 0x26F3, 0x26F5, 0x26F5,
+    0x26FA, 0x26FA, 0x26FD, 0x26FD, 0x2705, 0x2705, 0x270A, 0x270B,
+    0x2728, 0x2728, 0x274C, 0x274C, 0x274E, 0x274E, 0x2753, 0x2755,
+    0x2757, 0x2757, 0x2795, 0x2797, 0x27B0, 0x27B0, 0x27BF, 0x27BF,
+    0x2B1B, 0x2B1C, 0x2B50, 0x2B50, 0x2B55, 0x2B55, 0x2E80, 0x303E,
+    0x3041, 0x3247, 0x3250, 0x4DBF, 0x4E00, 0xA4C6, 0xA960, 0xA97C,
+    0xAC00, 0xD7A3, 0xF900, 0xFAD9, 0xFE10, 0xFE19, 0xFE30, 0xFE6B,
+    0xFF01, 0xFF60, 0xFFE0, 0xFFE6, 0x16FE0, 0x1B2FB, 0x1F004, 0x1F004,
+    0x1F0CF, 0x1F0CF, 0x1F18E, 0x1F18E, 0x1F191, 0x1F19A, 0x1F200, 0x1F320,
+    0x1F32D, 0x1F335, 0x1F337, 0x1F37C, 0x1F37E, 0x1F393, 0x1F3A0, 0x1F3CA,
+    0x1F3CF, 0x1F3D3, 0x1F3E0, 0x1F3F0, 0x1F3F4, 0x1F3F4, 0x1F3F8, 0x1F43E,
+    0x1F440, 0x1F440, 0x1F442, 0x1F4FC, 0x1F4FF, 0x1F53D, 0x1F54B, 0x1F54E,
+    0x1F550, 0x1F567, 0x1F57A, 0x1F57A, 0x1F595, 0x1F596, 0x1F5A4, 0x1F5A4,
+    0x1F5FB, 0x1F64F, 0x1F680, 0x1F6C5, 0x1F6CC, 0x1F6CC, 0x1F6D0, 0x1F6D2,
+    0x1F6D5, 0x1F6DF, 0x1F6EB, 0x1F6EC, 0x1F6F4, 0x1F6FC, 0x1F7E0, 0x1F7F0,
+    0x1F90C, 0x1F93A, 0x1F93C, 0x1F945, 0x1F947, 0x1F9FF, 0x1FA70, 0x1FAF6,
+    0x20000, 0x3FFFD
+])
+
+# The first and last code points of the ranges, for binary search
+WIDE_STARTS = WIDE_RANGES[0::2]
+WIDE_ENDS = WIDE_RANGES[1::2]
+
+# Text made only of characters below the first wide one is as wide as it is
+# long
+NARROW_LIMIT = chr(WIDE_STARTS[0])
+
+# str.isascii() only reads a flag of the string, so ASCII text is measured as
+# fast as len(). Pythons before 3.7 compare the largest character instead.
+if hasattr(str, "isascii"):
+    is_ascii = str.isascii
+else:
+    def is_ascii(text):
+        return not text or max(text) < NARROW_LIMIT
+
+
+def char_width(char):
+    """
+    Return the number of columns a character takes, 1 or 2.
+    """
+    code = ord(char)
+
+    if code < WIDE_STARTS[0]:
+        return 1
+
+    index = bisect_right(WIDE_STARTS, code) - 1
+    return 2 if code <= WIDE_ENDS[index] else 1
+
+
+def text_width(text):
+    """
+    Return the number of columns a string takes in a monospaced font.
+    """
+    if is_ascii(text):
+        return len(text)
+
+    return sum(map(char_width, text))
+
+
+def cells(text):
+    """
+    Return a list with the character in each column of the text. Wide
+    characters are followed by an empty string for their second column, so
+    joining the list gives the text back.
+    """
+    if is_ascii(text):
+        return list(text)
+
+    result = []
+
+    for char in text:
+        result.append(char)
+
+        if char_width(char) == 2:
+            result.append("")
+
+    return result
+
+
+def clip(text, start, end):
+    """
+    Return the columns start to end of the text. Wide characters cut in
+    half by either end are replaced by a space.
+    """
+    columns = cells(text)
+    clipped = columns[start:end]
+
+    if clipped and clipped[0] == "":
+        clipped[0] = " "
+
+    if clipped and end < len(columns) and columns[end] == "":
+        clipped[-1] = " "
+
+    return "".join(clipped)
@@ -0,0 +1,469 @@
+from array import array
+
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   AggregationDiagramPart,
+                                   InheritanceDiagramPart)
+
+# Id used in the columns for a missing value
+NONE = -1
+
+
+class StringPool:
+    """
+    Stores every distinct string once, UTF-8 encoded in a single bytearray,
+    with offset and length arrays giving the bytes of each string id.
+     ___________ 
+    |StringPool |
+    |-----------|
+    |data       |
+    |offsets    |
+    |lengths    |
+    |add()      |
+    |get()      |
+    |___________|
+
+    """
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q")
+        self.lengths = array("i")
+
+        # Hash of a string to its id. Strings that collide with a different
+        # string on the hash are kept in collisions instead.
+        self.index = {}
+        self.collisions = {}
+
+    def add(self, value):
+        """
+        Return the id of the string, adding it to the pool if needed.
+        """
+        key = hash(value)
+        string_id = self.index.get(key)
+
+        if string_id is None:
+            string_id = self.index[key] = self._append(value)
+        elif self.get(string_id) != value:
+            string_id = self.collisions.get(value)
+
+            if string_id is None:
+                string_id = self.collisions[value] = self._append(value)
+
+        return string_id
+
+    def get(self, string_id):
+        """
+        Return the string with the given id.
+        """
+        offset = self.offsets[string_id]
+        return self.data[offset:offset + self.lengths[string_id]].decode("utf-8")
+
+    def find(self, value):
+        """
+        Return the id of the string, or None if it isn't in the pool.
+        """
+        string_id = self.index.get(hash(value))
+
+        if string_id is not None and self.get(string_id) != value:
+            string_id = self.collisions.get(value)
+
+        return string_id
+
+    def _append(self, value):
+        encoded = value.encode("utf-8")
+        self.offsets.append(len(self.data))
+        self.lengths.append(len(encoded))
+        self.data += encoded
+        return len(self.offsets) - 1
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+class ColumnarDiagram:
+    """
+    Stores a class graph column-wise, so very large models don't pay for a
+    ClassDiagramPart object per class. Classes are identified by integer
+    ids and every name is a string id into a shared StringPool.
+     _________________ 
+    |ColumnarDiagram  |
+    |-----------------|
+    |strings          |
+    |class_names      |
+    |members          |
+    |add_class()      |
+    |add_inheritance()|
+    |add_aggregation()|
+    |view()           |
+    |compact()        |
+    |_________________|
+
+    The fields and methods of a class are a contiguous range of string ids
+    in the members array, given by the offset and count columns. A class
+    that gets new members grows its range in place while the capacity
+    column allows, and is otherwise moved to the end of the members array
+    with double the capacity, leaving the old range unused until compact()
+    is called. Edges are
+    kept in array-backed tables. The edges of each class are chained
+    through the next column, from the head and tail columns of the class.
+
+    view() returns a Diagram in the single easy-entry shape, so the
+    PrettyPrintEncoder, SourceCodeEncoder and XMIEncoder can read the model.
+    """
+    def __init__(self):
+        self.strings = StringPool()
+
+        # Class id for each string id of the pool, or NONE
+        self.string_classes = array("i")
+
+        # Class columns
+        self.class_names = array("i")
+        self.field_offsets = array("i")
+        self.field_counts = array("i")
+        self.method_offsets = array("i")
+        self.method_counts = array("i")
+        self.member_capacities = array("i")
+        self.members = array("i")
+
+        # Class id to the sets of field and method string ids of a class,
+        # for the classes that have been given members more than once
+        self.member_sets = {}
+
+        # Inheritance edge table, from child class to parent class
+        self.inheritance_children = array("i")
+        self.inheritance_parents = array("i")
+        self.inheritance_next = array("i")
+        self.first_parent_edge = array("i")
+        self.last_parent_edge = array("i")
+
+        # Aggregation edge table, from aggregating to aggregated class
+        self.aggregation_sources = array("i")
+        self.aggregation_targets = array("i")
+        self.aggregation_names = array("i")
+        self.aggregation_left = array("i")
+        self.aggregation_right = array("i")
+        self.aggregation_next = array("i")
+        self.first_aggregation_edge = array("i")
+        self.last_aggregation_edge = array("i")
+
+    @classmethod
+    def from_diagram(cls, diagram):
+        """
+        Create a ColumnarDiagram from the class graph of a Diagram.
+        """
+        columnar = cls()
+
+        for part in diagram.classes.values():
+            columnar.add_class(part.name, part.fields, part.methods)
+
+        for edge in diagram.inheritances:
+            columnar.add_inheritance(edge.source, edge.target)
+
+        for edge in diagram.aggregations:
+            aggregation = edge.part
+            columnar.add_aggregation(edge.source, edge.target,
+                                     aggregation.name,
+                                     aggregation.left_multiplicity,
+                                     aggregation.right_multiplicity)
+
+        return columnar
+
+    def add_class(self, name, fields=None, methods=None):
+        """
+        Add a class and return its id. If the class exists, the new fields
+        and methods are appended to it.
+        """
+        class_id = self.class_id(name)
+
+        if class_id is None:
+            class_id = len(self.class_names)
+            string_id = self.strings.add(name)
+            self.class_names.append(string_id)
+
+            missing = len(self.strings) - len(self.string_classes)
+            self.string_classes.extend([NONE] * missing)
+            self.string_classes[string_id] = class_id
+
+            for column in (self.field_offsets, self.method_offsets):
+                column.append(len(self.members))
+
+            for column in (self.field_counts, self.method_counts,
+                           self.member_capacities):
+                column.append(0)
+
+            for column in (self.first_parent_edge, self.last_parent_edge,
+                           self.first_aggregation_edge,
+                           self.last_aggregation_edge):
+                column.append(NONE)
+
+        if fields or methods:
+            self._extend_members(class_id, fields or (), methods or ())
+
+        return class_id
+
+    def add_inheritance(self, child, parent):
+        """
+        Add an inheritance edge between the named classes.
+        """
+        child_id = self.add_class(child)
+        parent_id = self.add_class(parent)
+
+        self.inheritance_children.append(child_id)
+        self.inheritance_parents.append(parent_id)
+        self._chain(self.inheritance_next, self.first_parent_edge,
+                    self.last_parent_edge, child_id)
+
+    def add_aggregation(self, source, target, name,
+                        left_multiplicity=None, right_multiplicity=None):
+        """
+        Add an aggregation edge from the source to the target class.
+        """
+        source_id = self.add_class(source)
+        target_id = self.add_class(target)
+
+        self.aggregation_sources.append(source_id)
+        self.aggregation_targets.append(target_id)
+        self.aggregation_names.append(self._string_id(name))
+        self.aggregation_left.append(self._string_id(left_multiplicity))
+        self.aggregation_right.append(self._string_id(right_multiplicity))
+        self._chain(self.aggregation_next, self.first_aggregation_edge,
+                    self.last_aggregation_edge, source_id)
+
+    def class_id(self, name):
+        """
+        Return the id of the named class, or None.
+        """
+        string_id = self.strings.find(name)
+
+        if string_id is None or string_id >= len(self.string_classes):
+            return None
+
+        class_id = self.string_classes[string_id]
+        return None if class_id == NONE else class_id
+
+    def class_name(self, class_id):
+        return self.strings.get(self.class_names[class_id])
+
+    def fields(self, class_id):
+        return self._members(self.field_offsets[class_id],
+                             self.field_counts[class_id])
+
+    def methods(self, class_id):
+        return self._members(self.method_offsets[class_id],
+                             self.method_counts[class_id])
+
+    def parents(self, class_id):
+        """
+        Generator yielding the ids of the parents of a class.
+        """
+        for edge in self._edges(self.inheritance_next,
+                                self.first_parent_edge[class_id]):
+            yield self.inheritance_parents[edge]
+
+    def aggregations(self, class_id):
+        """
+        Generator yielding the ids of the aggregation edges of a class.
+        """
+        return self._edges(self.aggregation_next,
+                           self.first_aggregation_edge[class_id])
+
+    def class_part(self, class_id):
+        """
+        Create a ClassDiagramPart for a class.
+        """
+        return ClassDiagramPart(self.class_name(class_id),
+                                self.fields(class_id) or None,
+                                self.methods(class_id) or None)
+
+    def aggregation_part(self, edge):
+        """
+        Create an AggregationDiagramPart for an aggregation edge.
+        """
+        return AggregationDiagramPart(
+            self._string(self.aggregation_names[edge]),
+            self._string(self.aggregation_left[edge]),
+            self._string(self.aggregation_right[edge]))
+
+    def view(self, name):
+        """
+        Return a Diagram in the single easy-entry shape the encoders
+        understand, with the named class as the main class and its first
+        parent and first aggregated class, if any.
+        """
+        class_id = self.class_id(name)
+
+        if class_id is None:
+            raise KeyError(name)
+
+        diagram = Diagram(main=self.class_part(class_id))
+
+        for parent_id in self.parents(class_id):
+            diagram.parent = self.class_part(parent_id)
+            diagram.inheritance = InheritanceDiagramPart()
+            break
+
+        for edge in self.aggregations(class_id):
+            diagram.aggregated = self.class_part(
+                self.aggregation_targets[edge])
+            diagram.aggregation = self.aggregation_part(edge)
+            break
+
+        return diagram
+
+    def views(self):
+        """
+        Generator yielding a view() for every class, in id order.
+        """
+        for class_id in range(len(self.class_names)):
+            yield self.view(self.class_name(class_id))
+
+    def to_diagram(self):
+        """
+        Create a Diagram holding the whole class graph.
+        """
+        diagram = Diagram()
+
+        for class_id in range(len(self.class_names)):
+            diagram.add_class(self.class_part(class_id))
+
+        for child, parent in zip(self.inheritance_children,
+                                 self.inheritance_parents):
+            diagram.add_inheritance(self.class_name(child),
+                                    self.class_name(parent),
+                                    InheritanceDiagramPart())
+
+        for edge, (source, target) in enumerate(zip(self.aggregation_sources,
+                                                    self.aggregation_targets)):
+            diagram.add_aggregation(self.class_name(source),
+                                    self.class_name(target),
+                                    self.aggregation_part(edge))
+
+        return diagram
+
+    def compact(self):
+        """
+        Rewrite the members array without the unused ranges and the spare
+        capacity left by classes that were given new members.
+        """
+        members = array("i")
+
+        for class_id in range(len(self.class_names)):
+            offset = self.field_offsets[class_id]
+            field_count = self.field_counts[class_id]
+            count = field_count + self.method_counts[class_id]
+
+            self.field_offsets[class_id] = len(members)
+            self.method_offsets[class_id] = len(members) + field_count
+            self.member_capacities[class_id] = count
+            members.extend(self.members[offset:offset + count])
+
+        self.members = members
+        self.member_sets.clear()
+
+    def __len__(self):
+        return len(self.class_names)
+
+    def __contains__(self, name):
+        return self.class_id(name) is not None
+
+    def _extend_members(self, class_id, fields, methods):
+        field_ids = [self.strings.add(field) for field in fields]
+        method_ids = [self._method_id(method) for method in methods]
+
+        offset = self.field_offsets[class_id]
+        field_count = self.field_counts[class_id]
+        count = field_count + self.method_counts[class_id]
+
+        if count:
+            old_fields, old_methods = self._member_sets(class_id)
+            field_ids = [field for field in field_ids
+                         if field not in old_fields]
+            method_ids = [method for method in method_ids
+                          if method not in old_methods]
+            old_fields.update(field_ids)
+            old_methods.update(method_ids)
+
+        if not field_ids and not method_ids:
+            return
+
+        members = self.members
+        capacity = self.member_capacities[class_id]
+        size = count + len(field_ids) + len(method_ids)
+
+        if size > capacity:
+            # Grow the range in place if it is at the end of the members
+            # array, otherwise copy it to the end. The capacity is doubled,
+            # so a class given one member at a time is moved O(log n) times.
+            new_capacity = max(size, 2 * capacity)
+
+            if offset + capacity != len(members):
+                old_members = members[offset:offset + count]
+                offset = len(members)
+                members.extend(old_members)
+                capacity = count
+
+            members.extend([NONE] * (new_capacity - capacity))
+            self.member_capacities[class_id] = new_capacity
+
+        # The methods follow the fields, so they are moved past the new
+        # fields
+        start = offset + field_count
+        members[start:offset + size] = (array("i", field_ids) +
+                                        members[start:offset + count] +
+                                        array("i", method_ids))
+
+        self.field_offsets[class_id] = offset
+        self.field_counts[class_id] = field_count + len(field_ids)
+        self.method_offsets[class_id] = start + len(field_ids)
+        self.method_counts[class_id] = size - field_count - len(field_ids)
+
+    def _member_sets(self, class_id):
+        sets = self.member_sets.get(class_id)
+
+        if sets is None:
+            sets = self.member_sets[class_id] = (
+                set(self._member_ids(self.field_offsets[class_id],
+                                     self.field_counts[class_id])),
+                set(self._member_ids(self.method_offsets[class_id],
+                                     self.method_counts[class_id])))
+
+        return sets
+
+    def _method_id(self, method):
+        if not isinstance(method, str):
+            raise TypeError("ColumnarDiagram only stores method signatures "
+                            "given as strings")
+
+        return self.strings.add(method)
+
+    def _member_ids(self, offset, count):
+        return self.members[offset:offset + count]
+
+    def _members(self, offset, count):
+        get = self.strings.get
+        return [get(string_id) for string_id in
+                self.members[offset:offset + count]]
+
+    def _string_id(self, value):
+        return NONE if value is None else self.strings.add(value)
+
+    def _string(self, string_id):
+        return None if string_id == NONE else self.strings.get(string_id)
+
+    @staticmethod
+    def _chain(next_column, first_column, last_column, class_id):
+        edge = len(next_column)
+        next_column.append(NONE)
+
+        if first_column[class_id] == NONE:
+            first_column[class_id] = edge
+        else:
+            next_column[last_column[class_id]] = edge
+
+        last_column[class_id] = edge
+
+    @staticmethod
+    def _edges(next_column, edge):
+        while edge != NONE:
+            yield edge
+            edge = next_column[edge]
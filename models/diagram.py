@@ -1,7 +1,41 @@
+import hashlib
+import sys
+import weakref
 from abc import ABCMeta
+from collections import OrderedDict, defaultdict, namedtuple
+
+# An edge of the class graph. For inheritance, source is the child class and
+# target the parent class. For aggregation, source is the aggregating class
+# and target the aggregated class. part is the relationship's DiagramPart.
+Relation = namedtuple("Relation", "source target part")
+
+# Dictionaries only keep insertion order from Python 3.7 on, and the plugin
+# host runs Python 3.3
+ordered_dict = dict if sys.version_info >= (3, 7) else OrderedDict
 
 
 class Diagram:
+    """
+    A Diagram holds a graph of classes, indexed by class name, with typed
+    edge lists for the inheritance and aggregation relationships.
+     ____________ 
+    |  Diagram   |
+    |------------|
+    |classes     |
+    |inheritances|
+    |aggregations|
+    |merge()     |
+    |view()      |
+    |____________|
+
+    The main, parent, inheritance, aggregated and aggregation attributes
+    describe a single easy-entry string, as created by the Interpreter and
+    read by the encoders. Copies of them are folded into the class graph the
+    next time the graph is used, so reading the graph never changes the
+    parts the encoders draw. When the attributes or their parts change, the
+    classes and edges folded from them are taken out of the graph and folded
+    again.
+    """
     def __init__(self, main=None,
                  parent=None, inheritance=None,
                  aggregated=None, aggregation=None):
@@ -11,20 +45,654 @@ class Diagram:
         self.aggregated = aggregated
         self.aggregation = aggregation
 
+        self._classes = ordered_dict()
+        self._inheritances = []
+        self._aggregations = []
+
+        # Indexes of the edges by the name of their source and target class
+        self._parent_edges = defaultdict(list)
+        self._child_edges = defaultdict(list)
+        self._aggregation_edges = defaultdict(list)
+
+        # The digest of each edge by its key, once content_hash() was called
+        self._edge_keys = {}
+
+        # The attributes and part digests last folded, the classes they
+        # folded into the graph with the parts those classes replaced, and
+        # the edges only they added
+        self._folded = None
+        self._legacy_classes = {}
+        self._shadowed = {}
+        self._legacy_edges = {}
+
+        # Number of times classes or edges were taken out of the graph
+        self.removals = 0
+
+        # The sum of the digests of the classes and edges, kept up to date
+        # from the first content_hash() on. Parts of the graph belong to
+        # this diagram and report their changes to it, which takes their old
+        # digest out of the sum and leaves the new one pending.
+        self._total = None
+        self._pending = {}
+        self._aggregation_keys = {}
+        self._hash = None
+        self._reference = weakref.ref(self)
+
+    @property
+    def classes(self):
+        """
+        Dictionary of class name to ClassDiagramPart, in insertion order.
+        """
+        self._fold()
+        return self._classes
+
+    @property
+    def inheritances(self):
+        self._fold()
+        return self._inheritances
+
+    @property
+    def aggregations(self):
+        self._fold()
+        return self._aggregations
+
+    def added_classes(self):
+        """
+        Return the classes added with add_class() or merge(), without the
+        ones folded from the single easy-entry attributes.
+        """
+        self._fold()
+        shadowed = self._shadowed
+
+        return [shadowed[name] if name in shadowed else part
+                for name, part in self._classes.items()
+                if shadowed.get(name, part) is not None]
+
+    def get_class(self, name):
+        """
+        Return the ClassDiagramPart with the given name, or None.
+        """
+        return self.classes.get(name)
+
+    def get_parents(self, name):
+        """
+        Return the inheritance edges from the named class to its parents.
+        """
+        self._fold()
+        return self._parent_edges.get(name, [])
+
+    def get_children(self, name):
+        """
+        Return the inheritance edges from the children of the named class.
+        """
+        self._fold()
+        return self._child_edges.get(name, [])
+
+    def get_aggregations(self, name):
+        """
+        Return the aggregation edges from the named class.
+        """
+        self._fold()
+        return self._aggregation_edges.get(name, [])
+
+    def add_class(self, class_diagram_part):
+        """
+        Add a class to the graph. If a class with the same name exists, the
+        fields and methods of both are combined and the ClassDiagramPart in
+        the graph is returned.
+        """
+        self._fold()
+        return self._add_class(class_diagram_part)
+
+    def add_inheritance(self, child, parent, inheritance=None):
+        """
+        Add an inheritance edge between the named classes. Duplicate
+        edges are ignored.
+        """
+        self._fold()
+        self._add_inheritance(child, parent, inheritance)
+
+    def add_aggregation(self, source, target, aggregation):
+        """
+        Add an aggregation edge from the source to the target class.
+        Duplicate edges are ignored.
+        """
+        self._fold()
+        self._add_aggregation(source, target, aggregation)
+
     def merge(self, *diagrams):
         """
-        TODO need to set this up so a diagram object can be merged together
+        Merge the classes and relationships of the diagrams into this
+        diagram. Classes are joined by name and duplicate relationships are
+        dropped, so merging takes time linear in the size of the diagrams.
+        The merged diagrams are not changed.
+        :return: this diagram
+        """
+        self._fold()
+
+        for diagram in diagrams:
+            for part in diagram.classes.values():
+                self._add_class(part, copy=True)
+
+            for edge in diagram.inheritances:
+                self._add_inheritance(edge.source, edge.target, edge.part)
+
+            for edge in diagram.aggregations:
+                self._add_aggregation(edge.source, edge.target, edge.part)
+
+        return self
+
+    def view(self, name):
+        """
+        Return a Diagram in the single easy-entry shape the encoders
+        understand, with the named class as the main class and its first
+        parent and first aggregated class, if any.
+        """
+        main = self.get_class(name)
+
+        if main is None:
+            raise KeyError(name)
+
+        diagram = Diagram(main=main)
+
+        for edge in self.get_parents(name)[:1]:
+            diagram.parent = self._placeholder(edge.target)
+            diagram.inheritance = edge.part or InheritanceDiagramPart()
+
+        for edge in self.get_aggregations(name)[:1]:
+            diagram.aggregated = self._placeholder(edge.target)
+            diagram.aggregation = edge.part
+
+        return diagram
+
+    def _placeholder(self, name):
+        """
+        Return the named class, or an empty ClassDiagramPart if a
+        relationship refers to a class that was never added.
+        """
+        return self._classes.get(name) or ClassDiagramPart(name)
+
+    def views(self):
+        """
+        Generator yielding a view() for every class in the diagram.
+        """
+        for name in list(self.classes):
+            yield self.view(name)
+
+    def canonical(self):
+        """
+        Return a canonical tuple for the diagram. Diagrams with the same
+        main class, classes and relationships have equal canonical forms,
+        whatever order they were added in.
+        """
+        self._fold()
+
+        return ("diagram",
+                self.main.name if self.main else None,
+                tuple(sorted(part.canonical()
+                             for part in self._classes.values())),
+                tuple(sorted(edge[:2] for edge in self._inheritances)),
+                tuple(sorted(edge[:2] + (edge.part.canonical(),)
+                             for edge in self._aggregations)))
+
+    def content_hash(self):
+        """
+        Return a stable hex digest of the canonical() form. The digests of
+        the classes and edges are combined by addition into a sum that is
+        kept up to date as they are added, changed or taken out, so only
+        the changed parts are rehashed.
+        """
+        self._fold()
+
+        if self._total is None:
+            self._sum()
+
+        for part in self._pending.values():
+            self._total += self._part_digest(part)
+
+        self._pending.clear()
+
+        key = (self.main.name if self.main else None,
+               self._total % DIGEST_MODULUS)
+
+        if self._hash is None or self._hash[0] != key:
+            self._hash = key, digest(("diagram",) + key)
+
+        return self._hash[1]
+
+    def _sum(self):
+        total = 0
+
+        for part in self._classes.values():
+            total += int(part.content_hash(), 16)
+
+        for edge in self._inheritances:
+            key = ("inheritance",) + edge[:2]
+            value = self._edge_keys[key] = int(digest(key), 16)
+            total += value
+
+        for edge in self._aggregations:
+            total += self._part_digest(edge.part)
+
+        self._total = total
+        self._pending.clear()
+
+    def _part_digest(self, part):
+        """
+        Return the digest of a class, or of the edge of an aggregation part,
+        as an integer.
+        """
+        if part.type == "class":
+            return int(part.content_hash(), 16)
+
+        key = self._aggregation_keys[id(part)]
+        value = self._edge_keys[key] = int(digest(
+            ("aggregation",) + key[1:3] + (part.content_hash(),)), 16)
+        return value
+
+    def part_changed(self, part, old_digest):
+        """
+        Called by a part of the graph before its cached digest is dropped.
+        """
+        if self._total is None or id(part) in self._pending:
+            return
+
+        if part.type == "class":
+            self._total -= int(old_digest, 16)
+        else:
+            self._total -= self._edge_keys[self._aggregation_keys[id(part)]]
+
+        self._pending[id(part)] = part
+
+    def _own(self, part, copy):
+        """
+        Make a class or aggregation part belong to the graph, or a copy of
+        it made with copy if it belongs to another graph or edge.
+        :return: the part in the graph
+        """
+        owner = part._owner
+
+        if owner is not None and owner() is not None:
+            part = copy(part)
+
+        object.__setattr__(part, "_owner", self._reference)
+
+        if self._total is not None:
+            self._pending[id(part)] = part
+
+        return part
+
+    def _release(self, part):
+        """
+        Take a class or aggregation part out of the graph and its digest
+        out of the sum.
+        """
+        object.__setattr__(part, "_owner", None)
+
+        if self._total is not None and \
+                self._pending.pop(id(part), None) is None:
+            if part.type == "class":
+                self._total -= int(part.content_hash(), 16)
+            else:
+                self._total -= self._edge_keys[
+                    self._aggregation_keys[id(part)]]
+
+    def _set_class(self, name, part):
+        """
+        Put a part in the graph for the named class, or take the class out
+        if part is None.
+        """
+        existing = self._classes.get(name)
+
+        if existing is not None:
+            self._release(existing)
+
+        if part is None:
+            del self._classes[name]
+            return None
+
+        part = self._classes[name] = self._own(part, copy_class)
+        return part
+
+    def _fold(self):
+        """
+        Bring the classes and edges folded from the single easy-entry
+        attributes up to date with them.
+        """
+        parts = (self.main, self.parent, self.inheritance,
+                 self.aggregated, self.aggregation)
+
+        # Diagram parts compare by identity, and their digests change with
+        # their contents
+        digests = part_digests(parts) if any(parts) else None
+
+        if self._folded == (parts, digests):
+            return
+
+        self._unfold()
+        self._folded = parts, digests
+
+        if digests:
+            self._fold_legacy()
+
+    def _fold_legacy(self):
+        """
+        Fold copies of the single easy-entry attributes into the graph,
+        remembering what they add and replace.
+        """
+        legacy = ordered_dict()
+
+        for part in (self.parent, self.main, self.aggregated):
+            if part and part.name:
+                legacy[part.name] = merge_class(legacy.get(part.name), part,
+                                                copy=True)
+
+        for name, part in legacy.items():
+            existing = self._classes.get(name)
+            self._legacy_classes[name] = part
+            self._shadowed[name] = existing
+            self._set_class(name, merge_class(
+                existing and copy_class(existing), part))
+
+        edges = []
+
+        if self.main and self.main.name:
+            if self.parent and self.parent.name:
+                edges.append(self._add_inheritance(
+                    self.main.name, self.parent.name, self.inheritance))
+
+            if self.aggregated and self.aggregated.name and self.aggregation:
+                edges.append(self._add_aggregation(
+                    self.main.name, self.aggregated.name, self.aggregation))
+
+        for key, edge in edges:
+            if edge:
+                self._legacy_edges[key] = edge
+
+    def _unfold(self):
+        """
+        Take the classes and edges folded from the single easy-entry
+        attributes out of the graph, restoring the classes they replaced.
         """
-        pass
+        if not self._legacy_classes and not self._legacy_edges:
+            return
+
+        for name, part in self._shadowed.items():
+            self._set_class(name, part)
+
+        for key, edge in self._legacy_edges.items():
+            if key[0] == "inheritance":
+                if self._total is not None:
+                    self._total -= self._edge_keys[key]
+
+                self._inheritances.remove(edge)
+                self._parent_edges[edge.source].remove(edge)
+                self._child_edges[edge.target].remove(edge)
+            else:
+                self._release(edge.part)
+                del self._aggregation_keys[id(edge.part)]
+                self._aggregations.remove(edge)
+                self._aggregation_edges[edge.source].remove(edge)
+
+            del self._edge_keys[key]
+
+        self._legacy_classes = {}
+        self._shadowed = {}
+        self._legacy_edges = {}
+        self.removals += 1
+
+    def _add_class(self, part, copy=False):
+        name = part.name
+
+        if name in self._legacy_classes:
+            # The class was also folded from the easy-entry attributes, so
+            # the part without them is kept for when they change
+            existing = merge_class(self._shadowed[name], part, copy)
+            self._shadowed[name] = existing
+            return self._set_class(name, merge_class(
+                copy_class(existing), self._legacy_classes[name]))
+
+        existing = self._classes.get(name)
+        merged = merge_class(existing, part, copy)
+
+        if merged is not existing:
+            return self._set_class(name, merged)
+
+        return existing
+
+    def _add_inheritance(self, child, parent, inheritance):
+        """
+        :return: the key of the edge and the new edge, which is None for a
+            duplicate
+        """
+        key = ("inheritance", child, parent)
+
+        if key in self._edge_keys:
+            # Added again outside the easy-entry attributes, so the edge
+            # stays when they change
+            self._legacy_edges.pop(key, None)
+            return key, None
+
+        if self._total is None:
+            self._edge_keys[key] = None
+        else:
+            value = self._edge_keys[key] = int(digest(key), 16)
+            self._total += value
+
+        edge = Relation(child, parent, inheritance)
+        self._inheritances.append(edge)
+        self._parent_edges[child].append(edge)
+        self._child_edges[parent].append(edge)
+        return key, edge
+
+    def _add_aggregation(self, source, target, aggregation):
+        """
+        :return: the key of the edge and the new edge, which is None for a
+            duplicate
+        """
+        # Multiplicities are part of the key, so conflicting aggregations
+        # between the same classes are both kept
+        key = ("aggregation", source, target, aggregation.name,
+               aggregation.left_multiplicity, aggregation.right_multiplicity)
+
+        if key in self._edge_keys:
+            self._legacy_edges.pop(key, None)
+            return key, None
+
+        # The digest of the edge follows its part, so every edge has its
+        # own part
+        self._edge_keys[key] = None
+        aggregation = self._own(aggregation, copy_aggregation)
+        self._aggregation_keys[id(aggregation)] = key
+
+        edge = Relation(source, target, aggregation)
+        self._aggregations.append(edge)
+        self._aggregation_edges[source].append(edge)
+        return key, edge
+
+
+# Size of the digests, in bytes
+DIGEST_SIZE = 16
+DIGEST_MODULUS = 1 << (DIGEST_SIZE * 8)
+
+
+def digest(value):
+    """
+    Return a stable hex digest of a canonical tuple.
+    """
+    # md5 digests are DIGEST_SIZE bytes, and md5 exists on every Python the
+    # plugin runs on
+    return hashlib.md5(repr(value).encode("utf-8")).hexdigest()
+
+
+def part_digests(parts):
+    return tuple(part.content_hash() if part else None for part in parts)
+
+
+def merge_class(existing, part, copy=False):
+    """
+    Combine the fields and methods of a ClassDiagramPart into an existing
+    one with the same name, copying the existing part if it is frozen.
+    :return: the combined part, or part (or a copy of it) without an
+        existing one
+    """
+    if existing is None:
+        return copy_class(part) if copy else part
+
+    if existing is not part:
+        if existing.frozen:
+            existing = copy_class(existing)
+
+        existing.fields = union(existing.fields, part.fields)
+        existing.methods = union(existing.methods, part.methods)
+
+    return existing
+
+
+def copy_class(part):
+    """
+    Return a mutable copy of a ClassDiagramPart.
+    """
+    return ClassDiagramPart(part.name,
+                            list(part.fields or ()) or None,
+                            list(part.methods or ()) or None,
+                            part.extends)
+
+
+def copy_aggregation(part):
+    """
+    Return a copy of an AggregationDiagramPart.
+    """
+    return AggregationDiagramPart(part.name, part.left_multiplicity,
+                                  part.right_multiplicity)
+
+
+def union(values, other_values):
+    """
+    Combine two lists of fields or methods, keeping the order and dropping
+    duplicates. None is kept for an empty list like the Interpreter does.
+    """
+    if not other_values:
+        return values
+
+    if not values:
+        return list(other_values)
+
+    seen = set(map(member_key, values))
+    result = list(values)
+
+    for value in other_values:
+        key = member_key(value)
+
+        if key not in seen:
+            seen.add(key)
+            result.append(SYMBOLS.intern(value))
+
+    return result
+
+
+def member_key(value):
+    # Methods can be given as dictionaries with a signature and a body
+    return value if isinstance(value, str) else repr(value)
+
+
+def canonical_member(value):
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+
+    return value
+
+
+class SymbolTable:
+    """
+    Interns class, field and method names. Equal names in different diagram
+    parts share one string object instead of each part holding its own
+    copy. Names are interned with sys.intern(), which drops a name once
+    nothing refers to it, so the table doesn't grow for the whole session.
+    """
+    __slots__ = ()
+
+    def intern(self, value):
+        # Methods can also be given as dictionaries, which aren't interned
+        if type(value) is not str:
+            return value
+
+        return sys.intern(value)
+
+
+# Symbol table shared by all diagram parts
+SYMBOLS = SymbolTable()
 
 
 class DiagramPart(metaclass=ABCMeta):
     """
     Represents a abstract diagram element for use with interpreter and encoder
+
+    Diagram parts use __slots__ to keep large models small. A part can be
+    frozen with freeze(), after which its attributes can't be set. A part
+    in the class graph of a Diagram refers to it weakly, to report its
+    changes.
     """
+    __slots__ = ("name", "type", "_frozen", "_digest", "_owner")
+
     def __init__(self, name, type):
-        self.name = name
-        self.type = type
+        # Set the slots directly, a new part has no digest to invalidate
+        initialize = object.__setattr__
+        initialize(self, "_frozen", False)
+        initialize(self, "_digest", None)
+        initialize(self, "_owner", None)
+        initialize(self, "name", SYMBOLS.intern(name))
+        initialize(self, "type", type)
+
+    def __setattr__(self, key, value):
+        if self._frozen:
+            raise AttributeError("Can't set {} of a frozen {}".format(
+                key, self.__class__.__name__))
+
+        if key == "name":
+            value = SYMBOLS.intern(value)
+
+        object.__setattr__(self, key, value)
+        self.changed()
+
+    def canonical(self):
+        """
+        Return a canonical tuple of the values of the part.
+        """
+        return self.type, self.name
+
+    def content_hash(self):
+        """
+        Return a stable hex digest of the canonical() form. The digest is
+        cached until an attribute of the part is set.
+        """
+        if self._digest is None:
+            object.__setattr__(self, "_digest", digest(self.canonical()))
+
+        return self._digest
+
+    def changed(self):
+        """
+        Drop the cached digest. Needed after changing a list of the part
+        in place.
+        """
+        owner = self._owner and self._owner()
+
+        if owner is not None:
+            owner.part_changed(self, self._digest)
+
+        object.__setattr__(self, "_digest", None)
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    def freeze(self):
+        """
+        Make the part read-only and return it.
+        """
+        object.__setattr__(self, "_frozen", True)
+        return self
 
 
 class ClassDiagramPart(DiagramPart):
@@ -38,12 +706,56 @@ class ClassDiagramPart(DiagramPart):
     |________________|
 
     """
+    __slots__ = ("fields", "methods", "extends")
 
     def __init__(self, name="", fields=None, methods=None, extends=None):
         super().__init__(name, "class")
-        self.fields = fields
-        self.methods = methods
-        self.extends = extends
+        initialize = object.__setattr__
+        initialize(self, "fields", fields)
+        initialize(self, "methods", methods)
+        initialize(self, "extends", extends)
+
+    def add_field(self, field):
+        """
+        Append an interned field name, creating the list of fields if
+        needed.
+        """
+        if not self.fields:
+            self.fields = []
+
+        self.fields.append(SYMBOLS.intern(field))
+        self.changed()
+
+    def add_method(self, method):
+        """
+        Append an interned method, creating the list of methods if needed.
+        """
+        if not self.methods:
+            self.methods = []
+
+        self.methods.append(SYMBOLS.intern(method))
+        self.changed()
+
+    def canonical(self):
+        return (self.type, self.name,
+                tuple(map(canonical_member, self.fields or ())),
+                tuple(map(canonical_member, self.methods or ())),
+                self.extends)
+
+    def freeze(self):
+        """
+        Make the part read-only and return it. The fields and methods are
+        interned and stored as tuples.
+        """
+        intern = SYMBOLS.intern
+
+        if self.fields is not None:
+            self.fields = tuple(map(intern, self.fields))
+
+        if self.methods is not None:
+            self.methods = tuple(map(intern, self.methods))
+
+        return super().freeze()
 
 
 class AggregationDiagramPart(DiagramPart):
@@ -57,10 +769,18 @@ class AggregationDiagramPart(DiagramPart):
     |______________________|
 
     """
+    __slots__ = ("left_multiplicity", "right_multiplicity")
+
     def __init__(self, name="", left_multiplicity=None, right_multiplicity=None):
         super().__init__(name, "aggregation")
-        self.left_multiplicity = left_multiplicity
-        self.right_multiplicity = right_multiplicity
+        initialize = object.__setattr__
+        initialize(self, "left_multiplicity", left_multiplicity)
+        initialize(self, "right_multiplicity", right_multiplicity)
+
+    def canonical(self):
+        # A missing multiplicity is drawn the same as an empty one
+        return (self.type, self.name, self.left_multiplicity or "",
+                self.right_multiplicity or "")
 
 
 class InheritanceDiagramPart(DiagramPart):
@@ -74,5 +794,7 @@ class InheritanceDiagramPart(DiagramPart):
     |______________________|
 
     """
+    __slots__ = ()
+
     def __init__(self, name=""):
         super().__init__(name, "inheritance")
@@ -0,0 +1,126 @@
+from collections import namedtuple
+
+from prexel.models.diagram import member_key
+
+# Changes to the fields and methods of a class present in both diagrams
+ClassChange = namedtuple("ClassChange", "name added_fields removed_fields "
+                                        "added_methods removed_methods")
+
+
+class DiagramDiff:
+    """
+    The differences between two diagrams, as returned by diff().
+     ___________________ 
+    |    DiagramDiff    |
+    |-------------------|
+    |added_classes      |
+    |removed_classes    |
+    |changed_classes    |
+    |added_relations    |
+    |removed_relations  |
+    |affected_classes() |
+    |___________________|
+
+    Added and removed classes are ClassDiagramPart objects, changed classes
+    are ClassChange tuples and relations are the Relation edges of the
+    diagrams.
+    """
+    def __init__(self):
+        self.added_classes = []
+        self.removed_classes = []
+        self.changed_classes = []
+        self.added_relations = []
+        self.removed_relations = []
+
+    def affected_classes(self):
+        """
+        Return the set of class names whose output has to be regenerated:
+        the added and changed classes and both ends of every added or
+        removed relation that still exist.
+        """
+        names = {part.name for part in self.added_classes}
+        names.update(change.name for change in self.changed_classes)
+
+        for edge in self.added_relations + self.removed_relations:
+            names.update(edge[:2])
+
+        return names - {part.name for part in self.removed_classes}
+
+    def __bool__(self):
+        return any((self.added_classes, self.removed_classes,
+                    self.changed_classes, self.added_relations,
+                    self.removed_relations))
+
+
+def diff(old, new):
+    """
+    Compare two diagrams in time linear in their size. Classes are matched
+    by name and classes with equal content hashes are skipped.
+    :return: DiagramDiff
+    """
+    result = DiagramDiff()
+    old_classes = old.classes
+    new_classes = new.classes
+
+    for name, part in new_classes.items():
+        old_part = old_classes.get(name)
+
+        if old_part is None:
+            result.added_classes.append(part)
+        elif old_part is not part and \
+                old_part.content_hash() != part.content_hash():
+            result.changed_classes.append(diff_class(old_part, part))
+
+    for name, part in old_classes.items():
+        if name not in new_classes:
+            result.removed_classes.append(part)
+
+    old_relations = relation_index(old)
+    new_relations = relation_index(new)
+
+    result.added_relations = [edge for key, edge in new_relations.items()
+                              if key not in old_relations]
+    result.removed_relations = [edge for key, edge in old_relations.items()
+                                if key not in new_relations]
+
+    return result
+
+
+def diff_class(old, new):
+    """
+    Return the ClassChange between two versions of a class. The lists are
+    empty if only the order of the fields or methods changed.
+    """
+    added_fields, removed_fields = diff_members(old.fields, new.fields)
+    added_methods, removed_methods = diff_members(old.methods, new.methods)
+
+    return ClassChange(new.name, added_fields, removed_fields,
+                       added_methods, removed_methods)
+
+
+def diff_members(old, new):
+    """
+    Return the added and removed values of two lists of fields or methods.
+    """
+    old_keys = set(map(member_key, old or ()))
+    new_keys = set(map(member_key, new or ()))
+
+    added = [value for value in new or () if member_key(value) not in old_keys]
+    removed = [value for value in old or () if member_key(value) not in new_keys]
+
+    return added, removed
+
+
+def relation_index(diagram):
+    """
+    Index the relations of a diagram by their canonical key.
+    """
+    index = {}
+
+    for edge in diagram.inheritances:
+        index[("inheritance",) + edge[:2]] = edge
+
+    for edge in diagram.aggregations:
+        index[("aggregation",) + edge[:2] + (edge.part.canonical(),)] = edge
+
+    return index
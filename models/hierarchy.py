@@ -0,0 +1,284 @@
+from collections import deque
+
+
+class HierarchyIndex:
+    """
+    Index over the inheritance edges of a Diagram for ancestor, descendant
+    and subtype queries.
+     ________________ 
+    | HierarchyIndex |
+    |----------------|
+    |diagram         |
+    |cycles          |
+    |is_subtype()    |
+    |ancestors()     |
+    |descendants()   |
+    |topological()   |
+    |________________|
+
+    Every class is labelled with its pre-order number in a depth-first walk
+    from the root classes and the size of its subtree. In a
+    single-inheritance hierarchy, a class is a subtype of another exactly
+    when its number lies in the other's interval of numbers. Classes with more than one
+    parent, below such a class or in an inheritance cycle are answered by
+    walking their parent edges instead. The descendants of a class are its
+    interval, unless a class in the interval has a child labelled outside
+    of it, through a second parent edge or a cycle. Only those subtrees
+    are walked.
+
+    Classes that merge() adds to the diagram without inheritance edges are
+    labelled as they are found. Any new inheritance edge, like a class or
+    edge taken out of the diagram, makes the index rebuild itself
+    completely on the next query.
+    """
+    def __init__(self, diagram):
+        self.diagram = diagram
+        self.build()
+
+    def build(self):
+        """
+        Label every class of the diagram and find the inheritance cycles.
+        """
+        diagram = self.diagram
+        classes = diagram.classes
+
+        self.class_count = len(classes)
+        self.edge_count = len(diagram.inheritances)
+        self.removals = diagram.removals
+
+        # Class names in pre-order, pre-order number and subtree size
+        self.order = []
+        self.pre = {}
+        self.size = {}
+
+        # Classes that can't be answered with the interval labels
+        self.irregular = set()
+        self.cycles = find_cycles(classes, diagram.get_parents)
+
+        # Classes with a child outside of their interval, and how many of
+        # them come before each pre-order number
+        self.crossing = set()
+        self.crossings = [0]
+
+        for cycle in self.cycles:
+            self.irregular.update(cycle)
+            self.crossing.update(cycle)
+
+        for name in classes:
+            if name in self.pre:
+                continue
+
+            parents = diagram.get_parents(name)
+
+            if not parents:
+                self._label(name, regular=True)
+            elif name in self.irregular:
+                self._label(name, regular=False)
+
+        # Classes only reachable from a cycle
+        for name in classes:
+            if name not in self.pre:
+                self._label(name, regular=False)
+
+        self._count_crossings()
+
+    def _label(self, root, regular):
+        """
+        Number the tree of first-parent edges below root in pre-order.
+        """
+        diagram = self.diagram
+        stack = [(root, regular, False)]
+
+        while stack:
+            name, regular, finished = stack.pop()
+
+            if finished:
+                self.size[name] = len(self.order) - self.pre[name]
+                continue
+
+            if name in self.pre:
+                continue
+
+            self.pre[name] = len(self.order)
+            self.order.append(name)
+
+            if not regular:
+                self.irregular.add(name)
+
+            stack.append((name, regular, True))
+
+            for edge in reversed(diagram.get_children(name)):
+                child = edge.source
+                parents = diagram.get_parents(child)
+
+                # A child is only labelled below its first parent
+                if parents[0].target != name or child in self.pre:
+                    self.crossing.add(name)
+                    continue
+
+                stack.append((child, regular and len(parents) == 1
+                              and child not in self.irregular, False))
+
+    def update(self):
+        """
+        Bring the index up to date with the diagram. New classes without
+        inheritance edges are labelled, new edges and classes or edges
+        taken out of the diagram cause a rebuild.
+        """
+        diagram = self.diagram
+        classes = diagram.classes
+
+        if len(diagram.inheritances) != self.edge_count or \
+                len(classes) < self.class_count or \
+                diagram.removals != self.removals:
+            self.build()
+            return
+
+        added = len(classes) - self.class_count
+
+        if added:
+            # The new classes are the unlabelled ones. Dictionaries don't
+            # keep insertion order before Python 3.7, so they can't be
+            # taken from the end of the classes.
+            for name in [name for name in classes if name not in self.pre]:
+                self._label(name, regular=True)
+
+            self.class_count = len(classes)
+            self._count_crossings()
+
+    def _count_crossings(self):
+        crossings = self.crossings
+
+        for name in self.order[len(crossings) - 1:]:
+            crossings.append(crossings[-1] + (name in self.crossing))
+
+    def is_subtype(self, name, other):
+        """
+        Check whether the named class is other or inherits from it.
+        """
+        self.update()
+
+        if name == other:
+            return True
+
+        if name not in self.pre or other not in self.pre:
+            return False
+
+        if name not in self.irregular:
+            start = self.pre[other]
+            return start <= self.pre[name] < start + self.size[other]
+
+        return other in self._walk(name, self.diagram.get_parents, "target")
+
+    def ancestors(self, name):
+        """
+        Return the names of all the classes the named class inherits from,
+        nearest first.
+        """
+        self.update()
+        return list(self._walk(name, self.diagram.get_parents, "target"))[1:]
+
+    def descendants(self, name):
+        """
+        Return the names of all the classes inheriting from the named
+        class.
+        """
+        self.update()
+
+        if name not in self.pre:
+            return []
+
+        start = self.pre[name]
+        end = start + self.size[name]
+
+        if self.crossings[end] == self.crossings[start]:
+            return self.order[start + 1:end]
+
+        return list(self._walk(name, self.diagram.get_children, "source"))[1:]
+
+    def topological(self):
+        """
+        Return the class names ordered so that every parent comes before
+        its children. Classes in inheritance cycles come last.
+        """
+        self.update()
+        diagram = self.diagram
+
+        remaining = {name: len(diagram.get_parents(name))
+                     for name in diagram.classes}
+        queue = deque(name for name, count in remaining.items() if not count)
+        result = []
+
+        while queue:
+            name = queue.popleft()
+            result.append(name)
+
+            for edge in diagram.get_children(name):
+                remaining[edge.source] -= 1
+
+                if not remaining[edge.source]:
+                    queue.append(edge.source)
+
+        if len(result) < len(remaining):
+            done = set(result)
+            result.extend(name for name in remaining if name not in done)
+
+        return result
+
+    @staticmethod
+    def _walk(name, edges, end):
+        """
+        Breadth-first walk over the edges, yielding each class once,
+        starting with the named class.
+        """
+        seen = {name}
+        queue = deque((name,))
+
+        while queue:
+            current = queue.popleft()
+            yield current
+
+            for edge in edges(current):
+                following = getattr(edge, end)
+
+                if following not in seen:
+                    seen.add(following)
+                    queue.append(following)
+
+
+def find_cycles(classes, get_parents):
+    """
+    Return the inheritance cycles as lists of class names, using an
+    iterative depth-first search over the parent edges.
+    """
+    # 0 is unvisited, 1 is on the current path and 2 is finished
+    state = dict.fromkeys(classes, 0)
+    cycles = []
+
+    for root in classes:
+        if state[root]:
+            continue
+
+        path = [root]
+        iterators = [iter(get_parents(root))]
+        state[root] = 1
+
+        while iterators:
+            edge = next(iterators[-1], None)
+
+            if edge is None:
+                state[path.pop()] = 2
+                iterators.pop()
+                continue
+
+            parent = edge.target
+            status = state.get(parent, 2)
+
+            if status == 1:
+                cycles.append(path[path.index(parent):])
+            elif status == 0:
+                state[parent] = 1
+                path.append(parent)
+                iterators.append(iter(get_parents(parent)))
+
+    return cycles
@@ -0,0 +1,322 @@
+"""
+Compact binary serialization of Diagram objects.
+
+A file starts with a header, the MAGIC bytes followed by the format version
+as an unsigned 16-bit integer. The header is followed by any number of
+diagram records, each an unsigned 32-bit byte length and the record:
+
+    string table   count, the byte length of each string and then the UTF-8
+                   bytes of all the strings
+    main class     string id of the name of the main class. An unnamed
+                   main class has the empty string and is the first of the
+                   classes, but not part of the class graph.
+    classes        count, then for each class its name, extends, the field
+                   count and fields, and the method count and methods
+    inheritances   count, then the child and parent class of each edge
+    aggregations   count, then the source and target class, name and left
+                   and right multiplicities of each edge
+
+All integers are unsigned 32-bit little-endian. Names are string ids into
+the string table of the record, with NONE standing for None.
+"""
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   AggregationDiagramPart,
+                                   InheritanceDiagramPart)
+
+MAGIC = b"PRXL"
+FORMAT_VERSION = 1
+NONE = 0xFFFFFFFF
+
+HEADER = struct.Struct("<4sH")
+LENGTH = struct.Struct("<I")
+
+
+def dumps(diagram):
+    """
+    Return the bytes of a file holding a single diagram.
+    """
+    record = encode(diagram)
+    return HEADER.pack(MAGIC, FORMAT_VERSION) + LENGTH.pack(len(record)) + record
+
+
+def loads(data):
+    """
+    Return the first diagram from the bytes of a file.
+    """
+    version = check_header(data[:HEADER.size])
+    start = HEADER.size + LENGTH.size
+
+    if len(data) < start:
+        raise SerializationException("Truncated record length")
+
+    length, = LENGTH.unpack_from(data, HEADER.size)
+
+    if len(data) < start + length:
+        raise SerializationException("Truncated record")
+
+    return decode(memoryview(data)[start:start + length], version)
+
+
+def dump(diagrams, file):
+    """
+    Write one or more diagrams to a binary file object.
+    """
+    if isinstance(diagrams, Diagram):
+        diagrams = (diagrams,)
+
+    writer = DiagramWriter(file)
+    for diagram in diagrams:
+        writer.write(diagram)
+
+
+def load(file):
+    """
+    Return a list of the diagrams in a binary file object.
+    """
+    return list(DiagramReader(file))
+
+
+class DiagramWriter:
+    """
+    Writes the header and then one record per diagram to a binary file
+    object.
+    """
+    def __init__(self, file):
+        self.file = file
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+
+    def write(self, diagram):
+        record = encode(diagram)
+        self.file.write(LENGTH.pack(len(record)))
+        self.file.write(record)
+
+
+class DiagramReader:
+    """
+    Iterates over the diagrams of a binary file object, reading one record
+    at a time.
+    """
+    def __init__(self, file):
+        self.file = file
+        self.version = check_header(file.read(HEADER.size))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        prefix = self.file.read(LENGTH.size)
+
+        if not prefix:
+            raise StopIteration
+
+        if len(prefix) < LENGTH.size:
+            raise SerializationException("Truncated record length")
+
+        length, = LENGTH.unpack(prefix)
+        record = self.file.read(length)
+
+        if len(record) < length:
+            raise SerializationException("Truncated record")
+
+        return decode(record, self.version)
+
+
+def encode(diagram):
+    """
+    Return the record bytes of a diagram.
+    """
+    strings = {}
+    table = []
+
+    def string_id(value):
+        if value is None:
+            return NONE
+
+        if not isinstance(value, str):
+            raise SerializationException(
+                "Only string values can be serialized, got {!r}".format(value))
+
+        index = strings.get(value)
+
+        if index is None:
+            index = strings[value] = len(table)
+            table.append(value.encode("utf-8"))
+
+        return index
+
+    main = diagram.main
+    values = array("I")
+    values.append(string_id(main.name or "" if main else None))
+
+    # An unnamed main class, as in a partially interpreted entry, isn't in
+    # the class graph, so it is written as the first class
+    classes = list(diagram.classes.values())
+
+    if main and not main.name:
+        classes.insert(0, main)
+
+    values.append(len(classes))
+
+    for part in classes:
+        fields = part.fields or ()
+        methods = part.methods or ()
+
+        values.append(string_id(part.name))
+        values.append(string_id(part.extends))
+        values.append(len(fields))
+        values.extend(map(string_id, fields))
+        values.append(len(methods))
+        values.extend(map(string_id, methods))
+
+    values.append(len(diagram.inheritances))
+    for edge in diagram.inheritances:
+        values.extend((string_id(edge.source), string_id(edge.target)))
+
+    values.append(len(diagram.aggregations))
+    for edge in diagram.aggregations:
+        aggregation = edge.part
+        values.extend((string_id(edge.source),
+                       string_id(edge.target),
+                       string_id(aggregation.name),
+                       string_id(aggregation.left_multiplicity),
+                       string_id(aggregation.right_multiplicity)))
+
+    lengths = array("I", [len(table)])
+    lengths.extend(map(len, table))
+
+    if sys.byteorder != "little":
+        lengths.byteswap()
+        values.byteswap()
+
+    return b"".join((lengths.tobytes(), b"".join(table), values.tobytes()))
+
+
+def decode(record, version=FORMAT_VERSION):
+    """
+    Return the Diagram of a record.
+    """
+    record = memoryview(record)
+
+    try:
+        count, = LENGTH.unpack_from(record, 0)
+        position = LENGTH.size * (count + 1)
+
+        lengths = array("I")
+        lengths.frombytes(record[LENGTH.size:position])
+
+        if sys.byteorder != "little":
+            lengths.byteswap()
+
+        size = sum(lengths)
+        blob = bytes(record[position:position + size])
+        text = blob.decode("utf-8")
+        names = {NONE: None}
+
+        # Offsets into the decoded text match the byte offsets if the
+        # strings are all ASCII, otherwise each string is decoded
+        if len(text) != size:
+            text = None
+
+        offset = 0
+        for index, length in enumerate(lengths):
+            end = offset + length
+            names[index] = text[offset:end] if text is not None \
+                else blob[offset:end].decode("utf-8")
+            offset = end
+
+        values = array("I")
+        values.frombytes(record[position + size:])
+    except (struct.error, ValueError, UnicodeDecodeError) as e:
+        raise SerializationException("Malformed record: {}".format(e))
+
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    values = iter(values)
+
+    def strings(count):
+        result = [names[index] for index in islice(values, count)]
+
+        if len(result) < count:
+            raise SerializationException("Truncated record")
+
+        return result
+
+    try:
+        diagram = Diagram()
+        main, = strings(1)
+        unnamed = None
+
+        for index in range(next(values)):
+            name, extends = strings(2)
+            fields = strings(next(values))
+            methods = strings(next(values))
+            part = ClassDiagramPart(name, fields or None, methods or None,
+                                    extends)
+
+            if index == 0 and main == "":
+                unnamed = part
+            else:
+                diagram.add_class(part)
+
+        for _ in range(next(values)):
+            child, parent = strings(2)
+            diagram.add_inheritance(child, parent, InheritanceDiagramPart())
+
+        for _ in range(next(values)):
+            source, target, name, left, right = strings(5)
+            diagram.add_aggregation(source, target,
+                                    AggregationDiagramPart(name, left, right))
+    except (StopIteration, KeyError):
+        raise SerializationException("Malformed record")
+
+    # Restore the single easy-entry shape read by the encoders
+    if main == "":
+        if unnamed is None:
+            raise SerializationException("Missing main class")
+
+        diagram.main = unnamed
+    elif main is not None:
+        if diagram.get_class(main) is None:
+            raise SerializationException("Unknown main class")
+
+        diagram.main = diagram.get_class(main)
+
+        for edge in diagram.get_parents(main)[:1]:
+            diagram.parent = diagram.get_class(edge.target)
+            diagram.inheritance = edge.part
+
+        for edge in diagram.get_aggregations(main)[:1]:
+            diagram.aggregated = diagram.get_class(edge.target)
+            diagram.aggregation = edge.part
+
+    return diagram
+
+
+def check_header(header):
+    """
+    Check the header of a file and return its format version.
+    """
+    if len(header) < HEADER.size:
+        raise SerializationException("Missing header")
+
+    magic, version = HEADER.unpack(header)
+
+    if magic != MAGIC:
+        raise SerializationException("Not a diagram file")
+
+    if version > FORMAT_VERSION:
+        raise SerializationException(
+            "Unsupported format version {}".format(version))
+
+    return version
+
+
+class SerializationException(Exception):
+    pass
@@ -0,0 +1,228 @@
+from collections import defaultdict, namedtuple
+
+from prexel.models.diagram import member_key
+from prexel.models.hierarchy import find_cycles
+
+# A problem found by validate(). kind is one of the constants below and
+# names are the classes involved.
+Problem = namedtuple("Problem", "kind message names")
+
+DUPLICATE_CLASS = "duplicate_class"
+DUPLICATE_FIELD = "duplicate_field"
+DUPLICATE_METHOD = "duplicate_method"
+INHERITANCE_CYCLE = "inheritance_cycle"
+DANGLING_AGGREGATION = "dangling_aggregation"
+DANGLING_INHERITANCE = "dangling_inheritance"
+CONFLICTING_MULTIPLICITY = "conflicting_multiplicity"
+
+
+def validate(*diagrams):
+    """
+    Check one or more diagrams, taken together, for problems that would
+    otherwise only show up as broken encoder output. Runs in a single pass
+    over the classes and edges using hash sets and a union-find.
+    :return: list of Problem tuples, empty if the diagrams are valid
+    """
+    problems = []
+    definitions = {}
+    classes = set()
+    parents = {}
+    aggregations = {}
+    union_find = UnionFind()
+    inheritances = []
+    multiple_parents = False
+
+    for diagram in diagrams:
+        for part in class_parts(diagram):
+            check_class(part, definitions, problems)
+            classes.add(part.name)
+
+        for edge in diagram.inheritances:
+            inheritances.append(edge)
+
+        for edge in diagram.aggregations:
+            check_aggregation(edge, aggregations, problems)
+
+        # An aggregation without a class to point at
+        if diagram.aggregation and not (diagram.aggregated and
+                                        diagram.aggregated.name):
+            problems.append(Problem(
+                DANGLING_AGGREGATION,
+                "Aggregation \"{}\" has no aggregated class".format(
+                    diagram.aggregation.name),
+                (diagram.main.name if diagram.main else None,)))
+
+    for edge in inheritances:
+        child, parent = edge.source, edge.target
+
+        if parent not in classes:
+            problems.append(Problem(
+                DANGLING_INHERITANCE,
+                "{} inherits from the unknown class {}".format(child, parent),
+                (child, parent)))
+
+        # Only the first parent of a class is followed. With a single
+        # parent per class, an edge joining two classes that are already
+        # connected closes a cycle.
+        if child in parents:
+            multiple_parents = True
+            continue
+
+        parents[child] = parent
+
+        if not union_find.union(child, parent):
+            # Written like easy-entry, with the parent before the child
+            cycle = [parent]
+            while cycle[-1] != child:
+                cycle.append(parents[cycle[-1]])
+
+            problems.append(Problem(
+                INHERITANCE_CYCLE,
+                "Inheritance cycle: {}".format(" >> ".join(reversed(cycle))),
+                tuple(reversed(cycle))))
+
+    # Cycles through the other parents of a class need a full search
+    if multiple_parents:
+        check_all_parents(inheritances, problems)
+
+    for source, target, name in aggregations:
+        for end in (source, target):
+            if end not in classes:
+                problems.append(Problem(
+                    DANGLING_AGGREGATION,
+                    "Aggregation \"{}\" refers to the unknown class {}".format(
+                        name, end),
+                    (source, target)))
+
+    return problems
+
+
+def class_parts(diagram):
+    """
+    Generator yielding each distinct ClassDiagramPart of a diagram, from the
+    single easy-entry attributes and from the class graph.
+    """
+    seen = set()
+
+    for part in (diagram.parent, diagram.main, diagram.aggregated):
+        if part and part.name and id(part) not in seen:
+            seen.add(id(part))
+            yield part
+
+    for part in diagram.added_classes():
+        if id(part) not in seen:
+            seen.add(id(part))
+            yield part
+
+
+def check_class(part, definitions, problems):
+    """
+    Check a class for duplicate fields and methods, and for a different
+    definition of a class with the same name.
+    """
+    existing = definitions.get(part.name)
+
+    if existing is None:
+        definitions[part.name] = part
+    elif existing is not part and (existing.fields or existing.methods) and \
+            (part.fields or part.methods) and \
+            existing.content_hash() != part.content_hash():
+        problems.append(Problem(
+            DUPLICATE_CLASS,
+            "Class {} is defined more than once".format(part.name),
+            (part.name,)))
+
+    for kind, members in ((DUPLICATE_FIELD, part.fields),
+                          (DUPLICATE_METHOD, part.methods)):
+        seen = set()
+
+        for member in members or ():
+            key = member_key(member)
+
+            if key in seen:
+                problems.append(Problem(
+                    kind,
+                    "{} of class {} is declared more than once".format(
+                        key, part.name),
+                    (part.name,)))
+
+            seen.add(key)
+
+
+def check_all_parents(inheritances, problems):
+    """
+    Add the inheritance cycles the union-find over the first parents
+    couldn't see.
+    """
+    edges = defaultdict(list)
+    for edge in inheritances:
+        edges[edge.source].append(edge)
+
+    reported = {frozenset(problem.names) for problem in problems
+                if problem.kind == INHERITANCE_CYCLE}
+
+    for cycle in find_cycles(list(edges), lambda name: edges.get(name, ())):
+        if frozenset(cycle) not in reported:
+            # Written like easy-entry, with the parent before the child
+            cycle = tuple(reversed(cycle))
+            problems.append(Problem(
+                INHERITANCE_CYCLE,
+                "Inheritance cycle: {}".format(" >> ".join(cycle)),
+                cycle))
+
+
+def check_aggregation(edge, aggregations, problems):
+    """
+    Check that an aggregation between two classes always has the same
+    multiplicities.
+    """
+    aggregation = edge.part
+    key = (edge.source, edge.target, aggregation.name)
+    multiplicities = (aggregation.left_multiplicity or "",
+                      aggregation.right_multiplicity or "")
+    existing = aggregations.setdefault(key, multiplicities)
+
+    if existing != multiplicities:
+        problems.append(Problem(
+            CONFLICTING_MULTIPLICITY,
+            "Aggregation \"{}\" from {} to {} has the multiplicities {} "
+            "and {}".format(aggregation.name, edge.source, edge.target,
+                            "/".join(existing), "/".join(multiplicities)),
+            (edge.source, edge.target)))
+
+
+class UnionFind:
+    """
+    Disjoint sets of class names with path halving and union by size.
+    """
+    def __init__(self):
+        self.parents = {}
+        self.sizes = {}
+
+    def find(self, name):
+        parents = self.parents
+        parents.setdefault(name, name)
+
+        while parents[name] != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+
+        return name
+
+    def union(self, first, second):
+        """
+        Join the sets of the two names.
+        :return: False if they already were in the same set
+        """
+        first = self.find(first)
+        second = self.find(second)
+
+        if first == second:
+            return False
+
+        if self.sizes.get(first, 1) < self.sizes.get(second, 1):
+            first, second = second, first
+
+        self.parents[second] = first
+        self.sizes[first] = self.sizes.get(first, 1) + self.sizes.get(second, 1)
+        return True
@@ -0,0 +1,332 @@
+from prexel.parser.lexer import TokenStream, CompiledLexer
+from prexel.parser.interpreter import Interpreter
+from prexel.parser.token import Token
+from prexel.models.diagram import SYMBOLS
+
+# Characters that can never be part of a token, so re-lexing can always
+# restart and stop next to one of them
+SEPARATORS = (",", "|")
+
+
+class IncrementalInterpreter:
+    """
+    Keeps the tokens and Diagram produced for one easy-entry region so that
+    edits to the region only re-lex the damaged token range. If the edit
+    only touches FIELD and METHOD tokens, only the affected class body is
+    re-interpreted, otherwise the Interpreter is re-run over the cached
+    tokens.
+     ______________________ 
+    |IncrementalInterpreter|
+    |----------------------|
+    |text                  |
+    |tokens                |
+    |diagram               |
+    |bodies                |
+    |update()              |
+    |______________________|
+
+    """
+    def __init__(self):
+        self.text = None
+        self.tokens = []
+        self.diagram = None
+        self.bodies = []
+
+        # Number of times the full token stream had to be interpreted
+        self.full_parses = 0
+
+    def update(self, text):
+        """
+        Bring the cached tokens and Diagram up to date with the new text of
+        the region and return the Diagram.
+        """
+        if text == self.text and self.diagram:
+            return self.diagram
+
+        if self.text is None or not self.tokens:
+            self.text = text
+            self.tokens = list(CompiledLexer(text))
+            return self.evaluate()
+
+        first, old_count, new_tokens = self.relex(text)
+        self.text = text
+
+        if self.diagram and self.update_class_body(first, old_count, new_tokens):
+            return self.diagram
+
+        self.tokens[first:first + old_count] = new_tokens
+        return self.evaluate()
+
+    def relex(self, text):
+        """
+        Re-lex the part of the new text that differs from the cached text.
+        The cached tokens after the edit are shifted to their new offsets.
+        :return: index of the first damaged token, number of damaged tokens
+                 and the tokens replacing them
+        """
+        old_text = self.text
+
+        # Find the edited range by skipping the common prefix and suffix
+        limit = min(len(old_text), len(text))
+        start = common_text_length(old_text, text, limit)
+        suffix = common_text_length(old_text, text, limit - start,
+                                    backwards=True)
+
+        delta = len(text) - len(old_text)
+        old_end = len(old_text) - suffix
+
+        # Widen the range to the separators around the tokens touched by
+        # the edit. A token next to the edit is only damaged if the edit
+        # does not start (or end) with a separator.
+        if touches_token(old_text, start) or touches_token(text, start):
+            while start > 0 and not is_separator(text[start - 1]):
+                start -= 1
+
+        if touches_token(old_text, old_end - 1) or \
+                touches_token(text, old_end + delta - 1):
+            while old_end < len(old_text) \
+                    and not is_separator(old_text[old_end]):
+                old_end += 1
+
+        new_end = old_end + delta
+
+        # Locate the tokens inside the damaged range
+        tokens = self.tokens
+        first = common_length(lambda n: tokens[n - 1].end <= start,
+                              len(tokens))
+        last = first + common_length(
+            lambda n: tokens[first + n - 1].start < old_end,
+            len(tokens) - first)
+
+        if first == 0:
+            # The START_MARKER token may have changed, so lex everything
+            return 0, len(self.tokens), list(CompiledLexer(text))
+
+        lexer = CompiledLexer(text, start, new_end)
+        lexer.marker_found = self.tokens[0].type == Token.START_MARKER
+        new_tokens = list(lexer)
+
+        for token in self.tokens[last:]:
+            token.start += delta
+            token.end += delta
+
+        return first, last - first, new_tokens
+
+    def update_class_body(self, first, old_count, new_tokens):
+        """
+        Re-interpret a single class body if the damaged tokens are only
+        FIELD and METHOD tokens inside of it.
+        :return: True if the Diagram could be updated in place
+        """
+        body_types = (Token.FIELD, Token.METHOD)
+        damaged = self.tokens[first:first + old_count]
+
+        if not all(token.type in body_types for token in damaged) or \
+                not all(token.type in body_types for token in new_tokens):
+            return False
+
+        # class_body() consumes every FIELD and METHOD token it reaches, so
+        # the earliest body covering the damaged range owns the tokens
+        for index, body in enumerate(self.bodies):
+            if body.first <= first and first + old_count <= body.end:
+                break
+        else:
+            return False
+
+        self.tokens[first:first + old_count] = new_tokens
+        token_delta = len(new_tokens) - old_count
+
+        fields = []
+        methods = []
+        for token in self.tokens[body.first:body.end + token_delta]:
+            if token.type == Token.FIELD:
+                fields.append(SYMBOLS.intern(token.value))
+            else:
+                methods.append(SYMBOLS.intern(token.value))
+
+        part = body.part
+        field_delta = len(fields) - body.field_count
+        method_delta = len(methods) - body.method_count
+
+        part.fields = splice(part.fields, body.field_offset,
+                             body.field_count, fields)
+        part.methods = splice(part.methods, body.method_offset,
+                              body.method_count, methods)
+
+        body.end += token_delta
+        body.field_count = len(fields)
+        body.method_count = len(methods)
+
+        # Shift the bodies following the edited one
+        for later in self.bodies[index + 1:]:
+            later.first += token_delta
+            later.end += token_delta
+
+            if later.part is part:
+                later.field_offset += field_delta
+                later.method_offset += method_delta
+
+        return True
+
+    def evaluate(self):
+        """
+        Interpret the cached tokens, recording where each class body is.
+        """
+        self.diagram = None
+        self.bodies = []
+        self.full_parses += 1
+
+        interpreter = RecordingInterpreter(TokenListStream(self.tokens))
+        self.diagram = interpreter.evaluate()
+        self.bodies = interpreter.bodies
+
+        return self.diagram
+
+
+class TokenListStream(TokenStream):
+    """
+    TokenStream over an already lexed list of tokens.
+    """
+    def __init__(self, tokens):
+        super().__init__()
+        self.tokens = tokens
+        self.position = 0
+
+    def scan_token(self):
+        if self.position >= len(self.tokens):
+            return None
+
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def current_index(self, current_token):
+        """
+        Index of current_token, given it was the last token consumed.
+        """
+        if current_token is None:
+            return len(self.tokens)
+
+        return self.position - len(self.lookahead) - 1
+
+
+class RecordingInterpreter(Interpreter):
+    """
+    Interpreter that records the token range and the position in the
+    fields and methods lists of every class body it processes.
+    """
+    def __init__(self, lexer):
+        super().__init__(lexer)
+        self.bodies = []
+
+    def class_body(self, class_diagram_part):
+        body = ClassBody(class_diagram_part,
+                         self.lexer.current_index(self.current_token))
+
+        super().class_body(class_diagram_part)
+
+        body.end = self.lexer.current_index(self.current_token)
+        body.field_count = len(class_diagram_part.fields or ()) - body.field_offset
+        body.method_count = len(class_diagram_part.methods or ()) - body.method_offset
+        self.bodies.append(body)
+
+
+class ClassBody:
+    """
+    The tokens[first:end] range of a class body and the slices of the
+    fields and methods of its ClassDiagramPart that it produced.
+    """
+    __slots__ = ("part", "first", "end", "field_offset", "field_count",
+                 "method_offset", "method_count")
+
+    def __init__(self, part, first):
+        self.part = part
+        self.first = first
+        self.end = first
+        self.field_offset = len(part.fields or ())
+        self.field_count = 0
+        self.method_offset = len(part.methods or ())
+        self.method_count = 0
+
+
+def is_separator(character):
+    return character.isspace() or character in SEPARATORS
+
+
+def touches_token(text, index):
+    """
+    Check whether text[index] exists and could be part of a token.
+    """
+    return 0 <= index < len(text) and not is_separator(text[index])
+
+
+def common_length(is_common, limit):
+    """
+    Binary search for the largest n <= limit for which is_common(n) holds,
+    given that it holds for every smaller n as well.
+    """
+    low, high = 0, limit
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if is_common(middle):
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def common_text_length(old, new, limit, backwards=False):
+    """
+    Return the length of the common prefix of two strings, or of their
+    common suffix going backwards, up to limit characters.
+
+    Chunks twice as long as the previous one are compared until one
+    differs, and that chunk is then halved down to the first difference,
+    so each character is only copied and compared a few times.
+    """
+    def same(start, end):
+        if backwards:
+            return old[len(old) - end:len(old) - start] == \
+                new[len(new) - end:len(new) - start]
+
+        return old[start:end] == new[start:end]
+
+    length, size = 0, 16
+
+    while True:
+        end = min(length + size, limit)
+
+        if same(length, end):
+            if end == limit:
+                return limit
+
+            length, size = end, size * 2
+        else:
+            break
+
+    # The first difference lies within [length, end)
+    size = end - length
+
+    while size > 1:
+        half = size // 2
+
+        if same(length, length + half):
+            length += half
+            size -= half
+        else:
+            size = half
+
+    return length
+
+
+def splice(values, offset, count, replacement):
+    """
+    Replace values[offset:offset + count] with replacement, keeping None
+    for an empty list like the Interpreter does.
+    """
+    values = list(values or ())
+    values[offset:offset + count] = replacement
+    return values or None
@@ -1,7 +1,7 @@
 """
 Code in this class is based on https://ruslanspivak.com/lsbasi-part6/
 """
-from prexel.parser.lexer import Token
+from prexel.parser.lexer import Token, DocumentLexer
 from prexel.models.diagram import (Diagram,
                                    ClassDiagramPart,
                                    AggregationDiagramPart,
@@ -48,15 +48,29 @@ class Interpreter:
 
     """
     
+    # Tokens that start a production. In recovering mode, tokens are
+    # skipped up to one of these after a syntax error.
+    SYNC_TOKENS = (Token.CLASS_NAME, Token.AGGREGATION, Token.INHERITANCE)
+
     def __init__(self, lexer):
         self.lexer = lexer
         self.current_token = self.lexer.get_token()
+        self.previous_token = None
         self.diagram = Diagram()
+        self.recover = False
+        self.diagnostics = []
 
     def error(self, message="Invalid Syntax"):
         """
-        Raises a InterpreterException for processing later.
+        Raises a InterpreterException for processing later. The exception
+        records the span of the current token, or of the last token if the
+        end of the input was reached.
         """
+        token = self.current_token or self.previous_token
+
+        if token:
+            raise InterpreterException(message, token.start, token.end)
+
         raise InterpreterException(message)
 
     def process_token(self, token_type):
@@ -65,11 +79,51 @@ class Interpreter:
         if the current token type doesn't match the token type passed to
         this method.
         """
-        if self.current_token.type == token_type:
-            self.current_token = self.lexer.get_token()
+        if self.current_token and self.current_token.type == token_type:
+            self.advance()
         else:
             self.error()
 
+    def advance(self):
+        """
+        Move on to the next token from the lexer.
+        """
+        self.previous_token = self.current_token
+        self.current_token = self.lexer.get_token()
+
+    def attempt(self, production, *args, **kwargs):
+        """
+        Run a production. In recovering mode a syntax error is recorded in
+        the diagnostics and the token stream is resynchronized, instead of
+        raising the InterpreterException.
+        """
+        if not self.recover:
+            return production(*args, **kwargs)
+
+        token = self.current_token
+
+        try:
+            return production(*args, **kwargs)
+        except InterpreterException as e:
+            self.diagnostics.append(e)
+
+            # Don't resynchronize on the INHERITANCE or AGGREGATION token
+            # the production failed on, or it would be processed again
+            if token and token is self.current_token and token.type in (
+                    Token.INHERITANCE, Token.AGGREGATION):
+                self.advance()
+
+            self.synchronize()
+
+    def synchronize(self):
+        """
+        Skip tokens until the next CLASS_NAME, AGGREGATION or INHERITANCE
+        token.
+        """
+        while self.current_token and \
+                self.current_token.type not in self.SYNC_TOKENS:
+            self.advance()
+
     def start_marker(self):
         """
         Process a START_MARKER token. This token is denoted by "|" and defines
@@ -83,9 +137,9 @@ class Interpreter:
         """
 
         # Process Token
-        name = self.current_token.value
+        token = self.current_token
         self.process_token(Token.CLASS_NAME)
-        return name
+        return token.value
 
     def class_body(self, class_diagram_part):
         """
@@ -96,24 +150,16 @@ class Interpreter:
 
             # Process FIELD token
             if token.type == Token.FIELD:
-                # Create list for fields if it doesn't exist
-                if not class_diagram_part.fields:
-                    class_diagram_part.fields = []
-
                 # Append the token value
-                class_diagram_part.fields.append(token.value)
+                class_diagram_part.add_field(token.value)
 
                 # Process token
                 self.process_token(Token.FIELD)
 
             # Process METHOD token
             if token.type == Token.METHOD:
-                # Create list for methods if is doesn't exist
-                if not class_diagram_part.methods:
-                    class_diagram_part.methods = []
-
                 # Append the token value
-                class_diagram_part.methods.append(token.value)
+                class_diagram_part.add_method(token.value)
 
                 # Process token
                 self.process_token(Token.METHOD)
@@ -122,7 +168,15 @@ class Interpreter:
         """
         Helper method to check whether the next token is a CLASS_NAME token.
         """
-        return self.current_token and self.current_token.type is Token.CLASS_NAME
+        return self.current_token and self.current_token.type == Token.CLASS_NAME
+
+    def following_token_is_class_token(self):
+        """
+        Helper method to check whether the token after the current token is
+        a CLASS_NAME token, without consuming either of them.
+        """
+        token = self.lexer.peek()
+        return token is not None and token.type == Token.CLASS_NAME
 
     def inheritance(self):
         """
@@ -139,25 +193,25 @@ class Interpreter:
         """
         has_inheritance = False
 
-        if self.current_token and self.current_token.type is Token.INHERITANCE:
+        if self.current_token and self.current_token.type == Token.INHERITANCE:
+            # Check CLASS_NAME token follows the INHERITANCE token
+            if not self.following_token_is_class_token():
+                self.error("Missing child class after \">>\"")
+
             inheritance = InheritanceDiagramPart()
 
             # Process token
             self.process_token(Token.INHERITANCE)
 
-            # Check CLASS_NAME token follows the INHERITANCE token
-            if self.next_token_is_class_token():
-                child = ClassDiagramPart()
+            child = ClassDiagramPart()
 
-                # Determine child class name
-                child.name = self.class_name()
+            # Determine child class name
+            child.name = self.class_name()
 
-                # Append inheritance diagram and then parent class diagram
-                self.diagram.inheritance = inheritance
-                self.diagram.main = child
-                has_inheritance = True
-            else:
-                self.error("Missing child class after \">>\"")
+            # Append inheritance diagram and then parent class diagram
+            self.diagram.inheritance = inheritance
+            self.diagram.main = child
+            has_inheritance = True
 
         return has_inheritance
 
@@ -166,17 +220,17 @@ class Interpreter:
         Process any aggregated classes. The class process both the AGGREGATION token and
         a CLASS_NAME token for the aggregated class.
         """
-        if self.current_token and self.current_token.type is Token.AGGREGATION:
+        if self.current_token and self.current_token.type == Token.AGGREGATION:
+            # Confirm that a CLASS_NAME token follows the AGGREGATION TOKEN
+            if not self.following_token_is_class_token():
+                self.error("There is no class name following the aggregation.")
+
             # Cache the current token
             token = self.current_token
 
             # Process AGGREGATION Token
             self.process_token(Token.AGGREGATION)
 
-            # Confirm that a CLASS_NAME token follows the AGGREGATION TOKEN
-            if not self.next_token_is_class_token():
-                self.error("There is no class name following the aggregation.")
-
             # Process aggregated ClassDiagramPart. Optionally include class body
             aggregated = ClassDiagramPart()
             aggregated.name = self.class_name()
@@ -189,42 +243,47 @@ class Interpreter:
             # Process AggregationDiagramPart
             aggregation = AggregationDiagramPart()
 
-            # Create a list for the fields on the main ClassDiagramPart object
-            if not self.diagram.main.fields:
-                self.diagram.main.fields = []
-
             # Check that the AGGREGATION token has a name, if not
             # default to the aggregated class's name
-            name = token.value["name"]
+            name = token.value.name
             if name:
-                self.diagram.main.fields.append(name)
+                self.diagram.main.add_field(name)
                 aggregation.name = name
             else:
                 # Generate an aggregation name from the aggregated class
                 generated_name = aggregated.name.lower()
-                self.diagram.main.fields.append(generated_name)
+                self.diagram.main.add_field(generated_name)
                 aggregation.name = generated_name
 
             # Add multiplicity values
-            aggregation.left_multiplicity = token.value["left_multi"]
-            aggregation.right_multiplicity = token.value["right_multi"]
+            aggregation.left_multiplicity = token.value.left_multi
+            aggregation.right_multiplicity = token.value.right_multi
 
             # Save aggregation value to Diagram object
             self.diagram.aggregation = aggregation
 
-    def evaluate(self):
+    def evaluate(self, recover=False):
+        """
+        Process the token stream and return the Diagram object.
+
+        By default the first syntax error raises an InterpreterException.
+        With recover set, every syntax error is collected in the
+        diagnostics list instead and a partial Diagram is returned.
+        """
+        self.recover = recover
+
         # Check for the first PREXEL marker
-        self.start_marker()
+        self.attempt(self.start_marker)
 
         # Process the first class name
         first_class_diagram = ClassDiagramPart()
-        first_class_diagram.name = self.class_name()
+        first_class_diagram.name = self.attempt(self.class_name) or ""
 
         # Optionally check for FIELD and METHOD tokens
         self.class_body(first_class_diagram)
 
         # Optional - Check for inheritance
-        if self.inheritance():
+        if self.attempt(self.inheritance):
             self.diagram.parent = first_class_diagram
         else:
             self.diagram.main = first_class_diagram
@@ -233,16 +292,59 @@ class Interpreter:
         # consider the fields and methods following the aggregation
         # token as part of the aggregated class.In this position
         # they belong to the main class
-        self.aggregation(include_following_tokens=False)
+        self.attempt(self.aggregation, include_following_tokens=False)
 
         # Process fields and methods for main class
         self.class_body(self.diagram.main)
 
         # Optional - Check for aggregation
-        self.aggregation()
+        self.attempt(self.aggregation)
+
+        if self.diagnostics:
+            self.remaining_tokens()
 
         return self.diagram
 
+    def remaining_tokens(self):
+        """
+        After recovering from an error, keep checking the tokens the
+        productions above were resynchronized past.
+        """
+        while self.current_token:
+            token_type = self.current_token.type
+
+            if token_type == Token.AGGREGATION:
+                self.attempt(self.aggregation)
+            elif token_type in (Token.FIELD, Token.METHOD):
+                self.class_body(self.diagram.main)
+            elif token_type == Token.INHERITANCE:
+                parent = self.diagram.main
+
+                if self.attempt(self.inheritance):
+                    self.diagram.parent = parent
+            else:
+                token = self.current_token
+                self.diagnostics.append(InterpreterException(
+                    "Unexpected token", token.start, token.end))
+                self.advance()
+                self.synchronize()
+
+
+def evaluate_document(text):
+    """
+    Generator yielding a (entry_span, diagram) tuple for every easy-entry
+    block in a document, e.g., a whole spec file.
+    """
+    for span, token_stream in DocumentLexer(text):
+        yield span, Interpreter(token_stream).evaluate()
+
 
 class InterpreterException(Exception):
-    pass
+    """
+    Raised for syntax errors. start and end are the offsets of the
+    offending token in the source, if known.
+    """
+    def __init__(self, message, start=None, end=None):
+        super().__init__(message)
+        self.start = start
+        self.end = end
@@ -1,12 +1,97 @@
-from prexel.parser.token import Token
+import mmap
+from abc import ABCMeta, abstractmethod
+from collections import deque
+
+from prexel.parser.token import Token, AggregationValue
 from prexel import regex
 
 
-class Lexer:
+class TokenStream(metaclass=ABCMeta):
+    """
+    Base class for the lexers. Tokens are produced lazily by scan_token() and
+    can be consumed with get_token(), by iterating over the stream or with
+    the tokens() generator. Up to LOOKAHEAD tokens can be inspected with
+    peek() without consuming them.
+     ___________ 
+    |TokenStream|
+    |-----------|
+    |lookahead  |
+    |get_token()|
+    |peek()     |
+    |tokens()   |
+    |___________|
+
+    """
+    LOOKAHEAD = 4
+
+    def __init__(self):
+        # Ring buffer of tokens that have been scanned by peek() but
+        # not yet consumed
+        self.lookahead = deque(maxlen=self.LOOKAHEAD)
+
+    @abstractmethod
+    def scan_token(self):
+        """
+        Scan the next Token from the source, or return None at the end.
+        """
+
+    def get_token(self):
+        """
+        Consume the next Token object.
+        :return: Token or None once the stream is exhausted
+        """
+        if self.lookahead:
+            return self.lookahead.popleft()
+
+        return self.scan_token()
+
+    def peek(self, n=1):
+        """
+        Return the n-th upcoming Token without consuming it, or None if the
+        stream ends before it.
+        """
+        if not 1 <= n <= self.LOOKAHEAD:
+            raise ValueError("Can only peek 1 to {} tokens "
+                             "ahead".format(self.LOOKAHEAD))
+
+        while len(self.lookahead) < n:
+            token = self.scan_token()
+
+            if token is None:
+                return None
+
+            self.lookahead.append(token)
+
+        return self.lookahead[n - 1]
+
+    def tokens(self):
+        """
+        Generator yielding the remaining tokens in the stream.
+        """
+        token = self.get_token()
+
+        while token is not None:
+            yield token
+            token = self.get_token()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = self.get_token()
+
+        if token is None:
+            raise StopIteration
+
+        return token
+
+
+class Lexer(TokenStream):
     """
     The Lexer class manages splitting an easy-entry string into individual Token objects
     """
     def __init__(self, text):
+        super().__init__()
         self.text = text
         self.position = 0
         self.current = self.text[self.position]
@@ -44,12 +129,14 @@ class Lexer:
 
         return ''.join(token_chars)
 
-    def get_token(self):
+    def scan_token(self):
         """
         Create a Token object for next token.
         :return: Token
         """
         while self.current is not None:
+            start = self.position
+
             # Skip any white space
             if self.current.isspace():
                 self.skip_whitespace()
@@ -63,39 +150,257 @@ class Lexer:
                 # The rest will be ignored.
                 if not self.marker_found:
                     self.marker_found = True
-                    return Token(Token.START_MARKER, "|")
+                    return Token(Token.START_MARKER, "|", start, self.position)
                 else:
                     continue  # Go to next character
             # Check if current character is a comma
             elif self.current == ",":
                 self.step()
-                return Token(Token.COMMA, ",")
+                return Token(Token.COMMA, ",", start, self.position)
             else:
                 # Generate the current token
                 token = self.generate_token_string()
+                end = self.position
+
+                # Classify the token to determine what type of Token it is.
+                token_type, groups = regex.classify(token)
 
-                # Check token against a variety of regex to determine what
-                # type of Token it is.
-                if regex.is_class_name(token):
-                    return Token(Token.CLASS_NAME, token)
-                elif regex.is_inheritance(token):
-                    return Token(Token.INHERITANCE, token)
-                elif regex.is_aggregation(token):
+                if token_type == "class_name":
+                    return Token(Token.CLASS_NAME, token, start, end)
+                elif token_type == "inheritance":
+                    return Token(Token.INHERITANCE, token, start, end)
+                elif token_type == "aggregation":
                     # Optional groupings returned from regex
                     # <>(* or digit)---(name)---(* or digit)-->
-                    aggregation_groups = regex.is_aggregation(token).groups()
-                    left_multi, name, right_multi = aggregation_groups
-
-                    values = {
-                        "left_multi": left_multi,
-                        "name": name,
-                        "right_multi": right_multi
-                    }
-
-                    return Token(Token.AGGREGATION, values)
-                elif regex.is_method_signature(token):
-                    return Token(Token.METHOD, token)
-                elif regex.is_ignored_token(token):
+                    values = AggregationValue(*groups)
+
+                    return Token(Token.AGGREGATION, values, start, end)
+                elif token_type == "method_signature":
+                    return Token(Token.METHOD, token, start, end)
+                elif token_type == "ignored":
                     continue  # Skip ignored characters
                 else:
-                    return Token(Token.FIELD, token)
+                    return Token(Token.FIELD, token, start, end)
+
+
+class CompiledLexer(TokenStream):
+    """
+    Alternative Lexer engine that tokenizes the whole easy-entry string in a
+    single pass using the compiled master pattern in REGEX["token"]. It
+    produces the same Token stream as the Lexer class, so it can be handed to
+    the Interpreter in place of it.
+     ___________ 
+    |TokenStream|
+    |___________|
+    ∆
+    |_____________ 
+    |CompiledLexer|
+    |-------------|
+    |text         |
+    |marker_found |
+    |scan_token() |
+    |_____________|
+
+    """
+    def __init__(self, text, start=0, end=None):
+        super().__init__()
+        self.text = text
+        self.marker_found = False
+        self.file = None
+
+        # Token values are copied out of str text, but are decoded lazily
+        # from bytes-like text such as memoryview and mmap objects
+        self.source = None if isinstance(text, str) else text
+
+        # Optionally only tokenize text[start:end]. Token offsets are
+        # still relative to the beginning of text.
+        if end is None:
+            end = len(text)
+
+        pattern = regex.lexer_pattern("token", text, start, end)
+        self.matches = pattern.finditer(text, start, end)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Create a CompiledLexer over a memory-mapped, UTF-8 encoded file, so
+        the file is never read into a Python string. Call close() once the
+        tokens are no longer needed.
+        """
+        file = open(path, "rb")
+        lexer = cls(map_file(file))
+        lexer.file = file
+        return lexer
+
+    def close(self):
+        close_mapped_file(self.text, self.file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def scan_token(self):
+        """
+        Create a Token object for next token.
+        :return: Token or None once the text is exhausted
+        """
+        for match in self.matches:
+            token_type = match.lastgroup
+
+            if token_type in ("CLASS_NAME", "AGGREGATION") and \
+                    self.source is not None and \
+                    regex.NON_ASCII.search(self.text, *match.span()):
+                return self.recheck(match)
+
+            if token_type == "START_MARKER":
+                # Only the first PREXEL marker will be tokenized.
+                # The rest will be ignored.
+                if self.marker_found:
+                    continue
+
+                self.marker_found = True
+                return Token(Token.START_MARKER, "|", *match.span())
+            elif token_type == "COMMA":
+                return Token(Token.COMMA, ",", *match.span())
+            elif token_type == "AGGREGATION":
+                # The three groups following the named AGGREGATION group
+                # are <>(* or digit)---(name)---(* or digit)-->
+                index = match.re.groupindex["AGGREGATION"]
+                groups = match.group(index + 1, index + 2, index + 3)
+
+                if self.source is not None:
+                    groups = [str(group, "utf-8") for group in groups]
+
+                values = AggregationValue(*groups)
+                return Token(Token.AGGREGATION, values, *match.span())
+            elif token_type == "IGNORED":
+                continue  # Skip ignored characters
+            elif self.source is not None:
+                # Group names match the Token type constants
+                start, end = match.span()
+                return Token(getattr(Token, token_type), None,
+                             start, end, self.source)
+            else:
+                return Token(getattr(Token, token_type), match.group(),
+                             *match.span())
+
+
+    def recheck(self, match):
+        """
+        Classify a CLASS_NAME or AGGREGATION match of bytes-like text with
+        non-ASCII characters like in str text, where only the non-ASCII
+        word characters can be part of them.
+        """
+        start, end = match.span()
+        value = str(self.text[start:end], "utf-8")
+        token_type, groups = regex.classify(value)
+
+        if token_type == "class_name":
+            return Token(Token.CLASS_NAME, value, start, end)
+        elif token_type == "aggregation":
+            return Token(Token.AGGREGATION, AggregationValue(*groups),
+                         start, end)
+
+        # Without the parentheses of a method, anything else is a field
+        return Token(Token.FIELD, value, start, end)
+
+
+class DocumentLexer:
+    """
+    Scans a whole document, e.g., a buffer or a spec file containing many
+    easy-entry strings, and splits it into easy-entry blocks in one pass.
+    Each block is tokenized by a CompiledLexer over the same text, so no
+    per-line copies of the document are made.
+     _____________ 
+    |DocumentLexer|
+    |-------------|
+    |text         |
+    |entries()    |
+    |_____________|
+
+    """
+    def __init__(self, text):
+        self.text = text
+        self.file = None
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Create a DocumentLexer over a memory-mapped, UTF-8 encoded file.
+        Call close() once the tokens are no longer needed.
+        """
+        file = open(path, "rb")
+        lexer = cls(map_file(file))
+        lexer.file = file
+        return lexer
+
+    def close(self):
+        close_mapped_file(self.text, self.file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def entries(self):
+        """
+        Generator yielding a (entry_span, token_stream) tuple for each
+        easy-entry block, where entry_span is the (start, end) offsets of
+        the block in the document.
+        """
+        pattern = regex.lexer_pattern("entry", self.text)
+        span = None
+
+        for match in pattern.finditer(self.text):
+            start, end = match.span()
+
+            if not self.is_class_name(match.group("name")):
+                # Not an entry in str text, but a line continuing the entry
+                # right above it, if there is one
+                if span is not None and span[1] + 1 == start:
+                    span = span[0], end
+
+                continue
+
+            if span is not None:
+                yield span, CompiledLexer(self.text, *span)
+
+            span = start, end
+
+        if span is not None:
+            yield span, CompiledLexer(self.text, *span)
+
+    @staticmethod
+    def is_class_name(name):
+        """
+        Check the class name starting an entry of bytes-like text again if
+        it has non-ASCII characters.
+        """
+        if isinstance(name, str) or not regex.NON_ASCII.search(name):
+            return True
+
+        return bool(regex.is_class_name(str(name, "utf-8")))
+
+    def __iter__(self):
+        return self.entries()
+
+
+def map_file(file):
+    """
+    Memory-map an open binary file for reading.
+    """
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        return b""  # Empty files can't be mapped
+
+
+def close_mapped_file(text, file):
+    if isinstance(text, mmap.mmap):
+        text.close()
+
+    if file is not None:
+        file.close()
@@ -0,0 +1,308 @@
+"""
+Parses the pretty-printed diagrams created by the PrettyPrintEncoder back
+into Diagram objects, so they can be turned back into easy-entry strings
+without the history file.
+"""
+import re
+from collections import namedtuple
+
+from prexel.encoders.easy_entry_encoder import EasyEntryEncoder
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.encoders.width import cells, text_width
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   AggregationDiagramPart,
+                                   InheritanceDiagramPart)
+from prexel.parser.interpreter import Interpreter, InterpreterException
+from prexel.parser.lexer import Lexer
+from prexel.regex import AGGREGATION_PATTERN, is_method_signature
+
+# A run of underscores that may be the top border of a box
+BORDER = re.compile(r"_+")
+
+AGGREGATION_ARROW = re.compile(AGGREGATION_PATTERN)
+
+# Fills the second column of wide characters, so that string indexes of the
+# lines are columns
+WIDE_PAD = "\0"
+
+# A box found in the text. top and bottom are the rows of the top and bottom
+# borders, left and right the columns of the side borders.
+ParsedBox = namedtuple("ParsedBox", "part top bottom left right extends")
+
+# A diagram found by reverse_blocks(), with the rows it spans in the text
+ReversedBlock = namedtuple("ReversedBlock",
+                           "first last text easy_entry exact")
+
+
+class PrettyPrintParser:
+    """
+    Reads the boxes, inheritance and aggregation arrows of a pretty-printed
+    diagram and rebuilds its Diagram.
+     _________________ 
+    |PrettyPrintParser|
+    |-----------------|
+    |lines            |
+    |boxes            |
+    |indent           |
+    |parse()          |
+    |blocks()         |
+    |_________________|
+
+    Each line is scanned once for the top borders of boxes, and each box
+    only reads its own rows, so parsing takes time linear in the size of
+    the text.
+    """
+    def __init__(self, text):
+        # Rows are split on newlines only, like the rows of a Sublime view
+        self.source = [line[:-1] if line.endswith("\r") else line
+                       for line in text.split("\n")]
+        self.lines = ["".join(cell or WIDE_PAD for cell in cells(line))
+                      for line in self.source]
+        self.boxes = []
+        self.indent = 0
+
+    def parse(self):
+        """
+        Return the Diagram of the text, with its main class and its
+        optional parent and aggregated class.
+        """
+        self.find_boxes()
+
+        if not self.boxes:
+            raise PrettyPrintParserException("No class boxes found")
+
+        return self.diagram(*self.relationships())
+
+    def relationships(self):
+        """
+        Find the inheritance marks and aggregation arrows between the boxes.
+        :return: a list of (child, parent) boxes and a list of (aggregator,
+            aggregated, AggregationDiagramPart) tuples
+        """
+        tops = {(box.top, box.left): box for box in self.boxes}
+        name_rows = {(box.top + 1, box.left): box for box in self.boxes}
+        inheritances = []
+        aggregations = []
+
+        for box in self.boxes:
+            # A ∆ below the box, above the top left corner of the child
+            row = box.bottom + 1
+            child = tops.get((row + 1, box.left))
+
+            if row < len(self.lines) and \
+                    self.lines[row][box.left:box.left + 1] == "∆" and \
+                    child is not None and child.extends:
+                inheritances.append((child, box))
+
+            # An arrow from the right border, on the row of the class name
+            match = AGGREGATION_ARROW.match(
+                self.lines[box.top + 1][box.right + 1:].replace(WIDE_PAD, ""))
+            target = match and name_rows.get(
+                (box.top + 1, box.right + 1 + text_width(match.group())))
+
+            if target is not None:
+                left, name, right = match.groups()
+                aggregations.append((box, target, AggregationDiagramPart(
+                    name, left, right)))
+
+        return inheritances, aggregations
+
+    def blocks(self):
+        """
+        Group the boxes into diagrams, joining boxes that are related or
+        share a row.
+        :return: a list of (first, last) row ranges, top to bottom
+        """
+        self.find_boxes()
+        inheritances, _ = self.relationships()
+
+        # Aggregated boxes share the rows of their aggregator, but a child
+        # starts below the ∆ under its parent, so the parent's rows are
+        # extended down to it.
+        spans = {id(box): [box.top, box.bottom] for box in self.boxes}
+
+        for child, parent in inheritances:
+            spans[id(parent)][1] = max(spans[id(parent)][1], child.top)
+
+        blocks = []
+
+        for first, last in sorted(spans.values()):
+            if blocks and first <= blocks[-1][1]:
+                blocks[-1][1] = max(blocks[-1][1], last)
+            else:
+                blocks.append([first, last])
+
+        return [tuple(block) for block in blocks]
+
+    def diagram(self, inheritances, aggregations):
+        """
+        Return the Diagram of the boxes and relationships, if they form a
+        single easy-entry diagram.
+        """
+        mains = {id(child): child for child, _ in inheritances}
+        mains.update((id(source), source) for source, _, _ in aggregations)
+
+        if not mains and len(self.boxes) == 1:
+            mains[id(self.boxes[0])] = self.boxes[0]
+
+        if len(mains) != 1 or len(inheritances) > 1 or \
+                len(aggregations) > 1 or \
+                len(self.boxes) != 1 + len(inheritances) + len(aggregations):
+            raise PrettyPrintParserException(
+                "The boxes don't form a single easy-entry diagram")
+
+        main, = mains.values()
+        diagram = Diagram(main=main.part)
+
+        for _, parent in inheritances:
+            diagram.parent = parent.part
+            diagram.inheritance = InheritanceDiagramPart()
+
+        for _, aggregated, aggregation in aggregations:
+            diagram.aggregated = aggregated.part
+            diagram.aggregation = aggregation
+
+        return diagram
+
+    def find_boxes(self):
+        """
+        Find every box in the text. A box starts at a run of underscores
+        with a space or bar before it and a space or the end of the line
+        after it.
+        """
+        lines = self.lines
+        self.boxes = []
+
+        for row, line in enumerate(lines):
+            for match in BORDER.finditer(line):
+                start, end = match.span()
+
+                if start and line[start - 1] in " |" and \
+                        (end == len(line) or line[end] == " "):
+                    box = self.read_box(row, start - 1, end)
+
+                    if box is not None:
+                        self.boxes.append(box)
+
+        self.indent = min([box.left for box in self.boxes] or [0])
+
+    def read_box(self, top, left, right):
+        """
+        Read the box with the given top border and side columns. Returns a
+        ParsedBox, or None if the rows below don't complete a box.
+        """
+        lines = self.lines
+        width = right - left - 1
+
+        def inner(row):
+            # The text between the borders, if the row has both of them
+            if row < len(lines):
+                line = lines[row]
+
+                if len(line) > right and line[left] == "|" and \
+                        line[right] == "|":
+                    return line[left + 1:right].replace(WIDE_PAD, "")
+
+            return None
+
+        name = inner(top + 1)
+        if not name or not name.strip():
+            return None
+
+        part = ClassDiagramPart(name.strip())
+        row = top + 2
+
+        if inner(row) == "-" * width:
+            row += 1
+
+        while True:
+            text = inner(row)
+
+            if text is None:
+                return None
+
+            if text == "_" * width:
+                break
+
+            item = text.rstrip()
+
+            if is_method_signature(item):
+                part.add_method(item)
+            else:
+                part.add_field(item)
+
+            row += 1
+
+        return ParsedBox(part, top, row, left, right, lines[top][left] == "|")
+
+
+def reverse(text):
+    """
+    Parse a pretty-printed diagram back into an easy-entry string, indented
+    like the diagram.
+    :return: the easy-entry string and whether generating the diagram from
+        it gives the text back
+    """
+    parser = PrettyPrintParser(text)
+    diagram = parser.parse()
+    easy_entry = EasyEntryEncoder().generate(diagram)
+
+    try:
+        generated = PrettyPrintEncoder().generate(
+            Interpreter(Lexer(easy_entry)).evaluate())
+    except InterpreterException:
+        generated = ""
+
+    indent = " " * parser.indent
+    exact = trimmed(text.split("\n")) == \
+        trimmed(indent + line for line in generated.splitlines())
+
+    return indent + easy_entry, exact
+
+
+def reverse_blocks(text):
+    """
+    Find every pretty-printed diagram in a text with a single scan and
+    parse each one back into an easy-entry string. Blocks that aren't a
+    single easy-entry diagram are left out.
+    :return: a list of ReversedBlock tuples, top to bottom
+    """
+    parser = PrettyPrintParser(text)
+    reversed_blocks = []
+
+    for first, last in parser.blocks():
+        block = "\n".join(parser.source[first:last + 1])
+
+        try:
+            easy_entry, exact = reverse(block)
+        except PrettyPrintParserException:
+            continue
+
+        reversed_blocks.append(ReversedBlock(first, last, block, easy_entry,
+                                             exact))
+
+    return reversed_blocks
+
+
+def round_trips(text):
+    """
+    Check whether a pretty-printed diagram can be reversed into an
+    easy-entry string that generates the same diagram.
+    """
+    try:
+        return reverse(text)[1]
+    except PrettyPrintParserException:
+        return False
+
+
+def trimmed(lines):
+    """
+    Return the lines without trailing whitespace or surrounding blank lines,
+    which editors may add or remove.
+    """
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+class PrettyPrintParserException(Exception):
+    pass
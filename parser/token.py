@@ -1,6 +1,11 @@
 """
 Code in this class is based on https://ruslanspivak.com/lsbasi-part6/
 """
+from collections import namedtuple
+
+# Value of an AGGREGATION token, e.g., <>(left_multi)-(name)--(right_multi)>
+AggregationValue = namedtuple("AggregationValue",
+                              ("left_multi", "name", "right_multi"))
 
 
 class Token:
@@ -10,10 +15,24 @@ class Token:
     |-----|
     |type |
     |value|
+    |start|
+    |end  |
     |_____|
 
+    The type of a Token is one of the integer constants below. start and end
+    are the offsets of the token in the source text, with end exclusive.
+
+    Tokens lexed from bytes-like sources (bytes, memoryview or mmap) keep a
+    reference to the source instead of a copy of their text. The value of
+    such a token is only decoded from the source when it is first read.
     """
+    __slots__ = ("type", "_value", "start", "end", "source")
+
     START_MARKER, CLASS_NAME, FIELD, METHOD, AGGREGATION, INHERITANCE, COMMA = (
+        range(7)
+    )
+
+    NAMES = (
         "START_MARKER",
         "CLASS_NAME",
         "FIELD",
@@ -23,6 +42,28 @@ class Token:
         "COMMA"
     )
 
-    def __init__(self, type, value):
+    def __init__(self, type, value, start=None, end=None, source=None):
         self.type = type
-        self.value = value
+        self._value = value
+        self.start = start
+        self.end = end
+        self.source = source
+
+    @property
+    def value(self):
+        if self._value is None and self.source is not None:
+            self._value = str(self.source[self.start:self.end], "utf-8")
+            self.source = None
+
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self.source = None
+
+    def __repr__(self):
+        return "Token({}, {!r}, {}, {})".format(Token.NAMES[self.type],
+                                                self.value,
+                                                self.start,
+                                                self.end)
@@ -1,8 +1,12 @@
 import sublime
 import sublime_plugin
 
-from prexel.parser.lexer import Lexer
-from prexel.parser.interpreter import Interpreter, InterpreterException
+from prexel.parser.interpreter import InterpreterException
+from prexel.parser.incremental import IncrementalInterpreter
+from prexel.parser.pretty_print_parser import (reverse,
+                                               reverse_blocks,
+                                               round_trips,
+                                               PrettyPrintParserException)
 from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
 from prexel.encoders.source_code_encoder import SourceCodeEncoder
 from prexel.encoders.xmi_encoder import XMIEncoder
@@ -23,6 +27,32 @@ Used to store the commands so they can be undone
 """
 pretty_print_stack = PrettyPrintStack()
 
+"""
+The IncrementalInterpreter for the last easy-entry region generated in each
+view, keyed by view id. Repeated runs over the same region only re-process
+the edited tokens.
+"""
+incremental_interpreters = {}
+
+
+def reverse_pretty_print(pretty_print):
+    """
+    Return the easy-entry string for a pretty-printed diagram, or None.
+    Diagrams that parse back to the same text are reversed directly. The
+    history file is only checked for diagrams the parser can't reproduce,
+    e.g. ones generated from multi-line entries, and the parsed string is
+    used if the history doesn't have them either.
+    """
+    try:
+        easy_entry, exact = reverse(pretty_print)
+    except PrettyPrintParserException:
+        return Persistence().load(pretty_print)
+
+    if exact:
+        return easy_entry
+
+    return Persistence().load(pretty_print) or easy_entry
+
 
 class GenerateUmlCommand(sublime_plugin.TextCommand):
     """
@@ -45,9 +75,8 @@ class GenerateUmlCommand(sublime_plugin.TextCommand):
 
         # Parse and interpret the tokens and create a diagram object
         try:
-            lexer = Lexer(easy_entry)
-            interpreter = Interpreter(lexer)
-            diagram = interpreter.evaluate()
+            interpreter = self.incremental_interpreter(line)
+            diagram = interpreter.update(easy_entry)
         except InterpreterException as e:
             self.view.show_popup("Invalid PREXEL syntax - {}".format(e),
                                  sublime.HIDE_ON_MOUSE_MOVE_AWAY)
@@ -65,6 +94,20 @@ class GenerateUmlCommand(sublime_plugin.TextCommand):
                 "Generate Both UML and Source"
             ], self.on_done)
 
+    def incremental_interpreter(self, line):
+        """
+        Return the IncrementalInterpreter for the region starting at the
+        beginning of line, replacing the one cached for another region.
+        """
+        key = self.view.id()
+        cached = incremental_interpreters.get(key)
+
+        if cached is None or cached[0] != line.begin():
+            cached = (line.begin(), IncrementalInterpreter())
+            incremental_interpreters[key] = cached
+
+        return cached[1]
+
     def on_done(self, index):
         pretty_print = PrettyPrintEncoder().generate(self.diagram)
         source_code = SourceCodeEncoder().generate(self.diagram)
@@ -102,9 +145,10 @@ class GenerateUmlCommand(sublime_plugin.TextCommand):
 
 class OutputPrettyPrintCommand(sublime_plugin.TextCommand):
     def run(self, edit, easy_entry, line, pretty_print):
-        # Cache the original easy entry string so it can
-        # be recalled later.
-        Persistence().save(easy_entry, pretty_print)
+        # Cache the original easy entry string so it can be recalled
+        # later, unless it can be parsed back from the pretty print itself.
+        if not round_trips(pretty_print):
+            Persistence().save(easy_entry, pretty_print)
 
         # Push the last pretty_print value on stack, so we can undo if needed
         pretty_print_stack.push(pretty_print)
@@ -121,8 +165,7 @@ class UndoUmlCommand(sublime_plugin.TextCommand):
         if not pretty_print_stack.is_empty():
             last_pretty_print = pretty_print_stack.peek()
 
-            # persistence = Persistence()
-            easy_entry = Persistence().load(last_pretty_print)
+            easy_entry = reverse_pretty_print(last_pretty_print)
 
             # Replace selection
             if easy_entry:
@@ -141,9 +184,8 @@ class ReverseUmlCommand(sublime_plugin.TextCommand):
         line = self.view.line(self.view.sel()[0])
         pretty_print = self.view.substr(line)
 
-        # Check the prexel history for current selection
-        persistence = Persistence()
-        easy_entry = persistence.load(pretty_print)
+        # Parse the selection, or check the prexel history for it
+        easy_entry = reverse_pretty_print(pretty_print)
 
         # Replace selection
         if easy_entry:
@@ -154,6 +196,37 @@ class ReverseUmlCommand(sublime_plugin.TextCommand):
                                  sublime.HIDE_ON_MOUSE_MOVE_AWAY)
 
 
+class ReverseAllUmlCommand(sublime_plugin.TextCommand):
+    """
+    Reverts every pretty-printed diagram in the view in a single edit. The
+    view is scanned once for diagrams, and the history file is read once
+    for the diagrams that can't be parsed back exactly. Like
+    ReverseUmlCommand, the parsed string is used for the ones that aren't
+    in the history either.
+    """
+    def run(self, edit):
+        text = self.view.substr(sublime.Region(0, self.view.size()))
+        blocks = reverse_blocks(text)
+        history = Persistence().load_all(block.text for block in blocks
+                                         if not block.exact)
+        reverted = 0
+
+        # Replace from the bottom up so the earlier rows don't move
+        for block in reversed(blocks):
+            easy_entry = block.easy_entry if block.exact \
+                else history.get(block.text) or block.easy_entry
+
+            if easy_entry:
+                region = sublime.Region(
+                    self.view.text_point(block.first, 0),
+                    self.view.line(self.view.text_point(block.last, 0)).end())
+                self.view.replace(edit, region, easy_entry)
+                reverted += 1
+
+        sublime.status_message("Reverted {} of {} diagrams".format(
+            reverted, len(blocks)))
+
+
 class CreateNewFileCommand(sublime_plugin.WindowCommand):
     def run(self, source_code, extension):
         for file in source_code:
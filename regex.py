@@ -1,15 +1,188 @@
 import re
+from functools import lru_cache
+
+# <>(* or digit)---(name)---(* or digit)-->
+# Each quantifier is followed by a negative lookahead for the characters it
+# consumes. This pins every quantifier to its longest match so a failing
+# match can't retry the ways of splitting a run of dashes between "-+" and
+# "-*", which keeps matching linear in the length of the token.
+AGGREGATION_PATTERN = r'<>([\d*]?)-+(?!-)(\w*)(?!\w)-*(?!-)([\d*]?)>'
 
 REGEX = {
     "class_name": re.compile(r'^[A-Z]\w*$'),
     "method_signature": re.compile(r'^([^(){}]+)\((.*)\)$'),
-    "aggregation": re.compile('^<>([\d*]?)-+(\w*)-*([\d*]?)>$'),
+    "aggregation": re.compile('^' + AGGREGATION_PATTERN + '$'),
     "inheritance": re.compile('^>>$'),
     "valid_multiplicity": re.compile('([0-9]+|\*)'),
     "ignored_characters": ("<<>", "<>>", "<>", "<<>>"),
     "reserved_characters": (",", "|"),
+    # Master pattern used by CompiledLexer. Each alternative mirrors one of
+    # the checks made by Lexer.scan_token(), in the same order, and has to be
+    # followed by whitespace, a reserved character or the end of the text so
+    # it only ever matches a complete token.
+    "token": re.compile(r"""
+        (?P<START_MARKER>\|)
+      | (?P<COMMA>,)
+      | (?P<CLASS_NAME>[A-Z]\w*)(?=[\s,|]|\Z)
+      | (?P<INHERITANCE>>>)(?=[\s,|]|\Z)
+      | (?P<AGGREGATION>%s)(?=[\s,|]|\Z)
+      | (?P<METHOD>[^(){}\s,|]+\([^\s,|]*\))(?=[\s,|]|\Z)
+      | (?P<IGNORED><<>>|<<>|<>>|<>)(?=[\s,|]|\Z)
+      | (?P<FIELD>[^\s,|]+)
+    """ % AGGREGATION_PATTERN, re.VERBOSE),
+    # Combined pattern used by classify(). The alternatives are the token
+    # checks above in the order Lexer.scan_token() applies them.
+    "token_type": re.compile(r"""
+        (?:
+            (?P<class_name>[A-Z]\w*)
+          | (?P<inheritance>>>)
+          | (?P<aggregation>%s)
+          | (?P<method_signature>([^(){}]+)\((.*)\))
+          | (?P<ignored><<>>|<<>|<>>|<>)
+        )\Z
+    """ % AGGREGATION_PATTERN, re.VERBOSE),
+    # An easy-entry block within a document. A block starts at a line whose
+    # first token after the PREXEL marker is a class name, and continues
+    # over the following PREXEL marked lines that don't start a new block.
+    # Rows of pretty-printed boxes, which end in a bar or are only made of
+    # borders, are never part of a block.
+    "entry": re.compile(r"""
+        ^(?!%(box_row)s)[ \t]*\|[ \t]*(?P<name>[A-Z]\w*)(?=[\s,|]|\Z).*
+        (?:\n(?!%(box_row)s)[ \t]*\|(?![ \t]*[A-Z]\w*(?:[\s,|]|\Z)).*)*
+    """ % {"box_row": r"[ \t]*\|.*\|[ \t]*$|[ \t]*\|[ \t]*[_-][_\- \t]*$"},
+        re.VERBOSE | re.MULTILINE),
+}
+
+# Characters str.isspace() and the str patterns take for whitespace, but
+# "\s" doesn't match in bytes patterns
+UNICODE_SPACES = ("\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003"
+                  "\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029"
+                  "\u202f\u205f\u3000")
+
+# The UTF-8 encodings of the characters longer than a byte, as a bytes
+# pattern alternation
+BYTES_SPACE = "(?:%s)" % "|".join(
+    "".join("\\x%02x" % byte for byte in character.encode("utf-8"))
+    for character in UNICODE_SPACES if ord(character) > 0x7f)
+
+# A "\w" or "\s" escape or a character class of a str pattern
+PATTERN_PART = re.compile(r"(\\[ws])|\\.|(\[\^?(?:\\.|[^\]\\])*\])")
+
+
+def bytes_pattern(pattern, unicode_spaces=False):
+    """
+    Compile a bytes version of a str pattern, for matching UTF-8 encoded
+    bytes, memoryview and mmap objects. Any non-ASCII byte is treated as a
+    word character, so identifiers containing non-ASCII letters are matched
+    like they are in str patterns. Matches containing other non-ASCII
+    characters have to be checked again, see NON_ASCII.
+
+    The encodings of the non-ASCII UNICODE_SPACES are only taken for
+    whitespace with unicode_spaces, which makes matching about twice as
+    slow, so lexer_pattern() only uses it for text containing them.
+    """
+    def replace(match):
+        escape, char_class = match.groups()
+
+        if escape == "\\w":
+            if unicode_spaces:
+                return r"(?:\w|(?!%s)[\x80-\xff])" % BYTES_SPACE
+
+            return r"[\w\x80-\xff]"
+        elif escape == "\\s":
+            if unicode_spaces:
+                return r"(?:[\s\x1c-\x1f]|%s)" % BYTES_SPACE
+
+            return r"[\s\x1c-\x1f]"
+        elif char_class and "\\s" in char_class:
+            char_class = char_class[:-1] + r"\x1c-\x1f]"
+
+            if not unicode_spaces:
+                return char_class
+            elif char_class.startswith("[^"):
+                return "(?:(?!%s)%s)" % (BYTES_SPACE, char_class)
+
+            return "(?:%s|%s)" % (char_class, BYTES_SPACE)
+
+        return match.group()
+
+    source = PATTERN_PART.sub(replace, pattern.pattern)
+
+    # A search skipping a space mustn't start a match within its encoding
+    if unicode_spaces:
+        source = r"(?![\x80-\xbf])(?:%s)" % source
+
+    return re.compile(source.encode("ascii"), pattern.flags & ~re.UNICODE)
+
+
+# Versions of the lexer patterns used for bytes-like input, without and
+# with the non-ASCII whitespace
+BYTES_REGEX = {
+    "token": bytes_pattern(REGEX["token"]),
+    "entry": bytes_pattern(REGEX["entry"]),
 }
 
+UNICODE_SPACES_BYTES_REGEX = {
+    "token": bytes_pattern(REGEX["token"], unicode_spaces=True),
+    "entry": bytes_pattern(REGEX["entry"], unicode_spaces=True),
+}
+
+BYTES_SPACE_PATTERN = re.compile(BYTES_SPACE.encode("ascii"))
+
+# The bytes patterns take any non-ASCII character for a word character, so
+# class names and aggregations containing one are checked again with the
+# str patterns
+NON_ASCII = re.compile(b"[\x80-\xff]")
+
+
+def lexer_pattern(name, text, start=0, end=None):
+    """
+    Return the str or bytes version of a lexer pattern to match
+    text[start:end] with.
+    """
+    if isinstance(text, str):
+        return REGEX[name]
+
+    if end is None:
+        end = len(text)
+
+    if BYTES_SPACE_PATTERN.search(text, start, end):
+        return UNICODE_SPACES_BYTES_REGEX[name]
+
+    return BYTES_REGEX[name]
+
+
+# Number of groups captured within each named group of REGEX["token_type"]
+TOKEN_TYPE_GROUPS = {
+    "aggregation": 3,
+    "method_signature": 2,
+}
+
+CLASSIFY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def classify(value):
+    """
+    Determine the type of a token string with a single match.
+    Returns a (token_type, groups) tuple, where token_type is one of
+    "class_name", "inheritance", "aggregation", "method_signature",
+    "ignored" or "field", and groups are the values captured for it.
+
+    Results are kept in a bounded LRU cache. Use classify.cache_info()
+    for the hit and miss counters and classify.cache_clear() to reset it.
+    """
+    match = REGEX["token_type"].match(value)
+
+    if not match:
+        return "field", ()
+
+    token_type = match.lastgroup
+    index = match.re.groupindex[token_type]
+    count = TOKEN_TYPE_GROUPS.get(token_type, 0)
+
+    return token_type, match.groups()[index:index + count]
+
 
 def is_class_name(value):
     return REGEX["class_name"].match(value)
@@ -0,0 +1,13 @@
+"""
+Helpers shared by the test modules.
+"""
+from prexel.parser.lexer import Lexer
+from prexel.parser.interpreter import Interpreter
+
+# Easy-entry string with an inheritance and an aggregation
+KITCHEN = ("|Room size >> Kitchen color show_kitchen() "
+           "<>*-cupboards--1> Cupboard open()")
+
+
+def evaluate(text):
+    return Interpreter(Lexer(text)).evaluate()
@@ -0,0 +1,45 @@
+import unittest
+
+from prexel.encoders.canvas import Canvas
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+
+
+class TestCanvas(unittest.TestCase):
+    """
+    Test cases to exercise the Canvas class.
+    """
+    def test_draw(self):
+        canvas = Canvas()
+        canvas.draw(0, 0, [" __ ", "|ab|"])
+        canvas.draw(2, 6, ["xy"])
+
+        self.assertEqual(canvas.width, 8)
+        self.assertEqual(canvas.height, 3)
+        self.assertEqual(canvas.lines(), [" __     ",
+                                          "|ab|    ",
+                                          "      xy"])
+
+    def test_overwrite(self):
+        canvas = Canvas()
+        canvas.draw_text(0, 0, "-----")
+        canvas.draw_text(0, 1, "<>")
+
+        self.assertEqual(canvas.render(), "-<>--\n")
+
+    def test_draw_wide(self):
+        canvas = Canvas()
+        canvas.draw(0, 0, ["|色|", "|--|"])
+        canvas.draw_text(0, 5, "x")
+
+        self.assertEqual(canvas.width, 6)
+        self.assertEqual(canvas.lines(), ["|色| x",
+                                          "|--|  "])
+
+    def test_concat_aggregation_uneven_lines(self):
+        # The widest line isn't the lexicographically largest one
+        actual = PrettyPrintEncoder.concat_aggregation("b\naaaa\n", "<>--->",
+                                                       "x\ny\nz\n")
+
+        self.assertEqual(actual, ("b         x\n"
+                                  "aaaa<>--->y\n"
+                                  "          z\n"))
@@ -0,0 +1,117 @@
+import unittest
+
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.encoders.source_code_encoder import SourceCodeEncoder
+from prexel.encoders.xmi_encoder import XMIEncoder
+from prexel.models.diagram import Diagram
+from prexel.models.columnar import StringPool, ColumnarDiagram
+from prexel.tests.helpers import evaluate, KITCHEN
+
+
+class TestStringPool(unittest.TestCase):
+    """
+    Test cases to exercise the StringPool class.
+    """
+    def test_add(self):
+        pool = StringPool()
+        first = pool.add("Kitchen")
+        second = pool.add("Küche")
+
+        self.assertEqual(pool.add("Kitchen"), first)
+        self.assertEqual(pool.get(first), "Kitchen")
+        self.assertEqual(pool.get(second), "Küche")
+        self.assertEqual(pool.find("Küche"), second)
+        self.assertIsNone(pool.find("Room"))
+        self.assertEqual(len(pool), 2)
+
+
+class TestColumnarDiagram(unittest.TestCase):
+    """
+    Test cases to exercise the ColumnarDiagram class.
+    """
+    def setUp(self):
+        self.diagram = evaluate(KITCHEN)
+        self.columnar = ColumnarDiagram.from_diagram(self.diagram)
+
+    def test_columns(self):
+        columnar = self.columnar
+        kitchen = columnar.class_id("Kitchen")
+
+        self.assertEqual(len(columnar), 3)
+        self.assertIn("Room", columnar)
+        self.assertNotIn("size", columnar)
+        self.assertEqual(columnar.class_name(kitchen), "Kitchen")
+        self.assertEqual(columnar.fields(kitchen), ["color", "cupboards"])
+        self.assertEqual(columnar.methods(kitchen), ["show_kitchen()"])
+        self.assertEqual(list(columnar.parents(kitchen)),
+                         [columnar.class_id("Room")])
+
+        edge, = columnar.aggregations(kitchen)
+        aggregation = columnar.aggregation_part(edge)
+        self.assertEqual((aggregation.name, aggregation.left_multiplicity,
+                          aggregation.right_multiplicity),
+                         ("cupboards", "*", "1"))
+
+    def test_add_class_again(self):
+        columnar = self.columnar
+        columnar.add_class("Room", ["size", "width"], ["clean()"])
+        room = columnar.class_id("Room")
+
+        self.assertEqual(columnar.fields(room), ["size", "width"])
+        self.assertEqual(columnar.methods(room), ["clean()"])
+        self.assertEqual(len(columnar), 3)
+
+    def test_add_members_one_at_a_time(self):
+        columnar = self.columnar
+        fields = ["field{}".format(index) for index in range(2000)]
+
+        for field in fields:
+            columnar.add_class("Kitchen", [field, "color"])
+            columnar.add_class("Room", None, [field + "()"])
+
+        kitchen = columnar.class_id("Kitchen")
+        room = columnar.class_id("Room")
+        methods = [field + "()" for field in fields]
+
+        self.assertEqual(columnar.fields(kitchen),
+                         ["color", "cupboards"] + fields)
+        self.assertEqual(columnar.methods(kitchen), ["show_kitchen()"])
+        self.assertEqual(columnar.fields(room), ["size"])
+        self.assertEqual(columnar.methods(room), methods)
+
+        # Moving a range to the end doubles its capacity, so the unused
+        # ranges and spare capacity stay linear in the number of members
+        self.assertLess(len(columnar.members), 4 * 4005)
+
+        columnar.compact()
+        self.assertEqual(len(columnar.members), 4005)
+        self.assertEqual(columnar.fields(kitchen),
+                         ["color", "cupboards"] + fields)
+        self.assertEqual(columnar.methods(room), methods)
+
+        columnar.add_class("Room", ["width"], ["clean()"])
+        self.assertEqual(columnar.fields(room), ["size", "width"])
+        self.assertEqual(columnar.methods(room), methods + ["clean()"])
+
+    def test_view_with_encoders(self):
+        view = self.columnar.view("Kitchen")
+
+        self.assertEqual(PrettyPrintEncoder().generate(view),
+                         PrettyPrintEncoder().generate(self.diagram))
+        self.assertEqual(SourceCodeEncoder().generate(view),
+                         SourceCodeEncoder().generate(self.diagram))
+        self.assertEqual(XMIEncoder().generate(view, display_id=False),
+                         XMIEncoder().generate(self.diagram, display_id=False))
+
+        with self.assertRaises(KeyError):
+            self.columnar.view("Oven")
+
+    def test_to_diagram(self):
+        diagram = self.columnar.to_diagram()
+
+        self.assertEqual(list(diagram.classes), ["Room", "Kitchen", "Cupboard"])
+        self.assertEqual(len(diagram.inheritances), 1)
+        self.assertEqual(diagram.aggregations[0].part.left_multiplicity, "*")
+        self.assertEqual([view.main.name for view in self.columnar.views()],
+                         ["Room", "Kitchen", "Cupboard"])
+        self.assertIsInstance(diagram, Diagram)
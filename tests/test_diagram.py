@@ -0,0 +1,287 @@
+import unittest
+
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.models.diagram import (Diagram,
+                                   SymbolTable,
+                                   ClassDiagramPart,
+                                   AggregationDiagramPart,
+                                   InheritanceDiagramPart)
+from prexel.tests.helpers import evaluate, KITCHEN
+
+
+class TestDiagram(unittest.TestCase):
+    """
+    Test cases to exercise the Diagram class.
+    """
+    def test_classes(self):
+        diagram = evaluate(KITCHEN)
+
+        self.assertEqual(list(diagram.classes), ["Room", "Kitchen", "Cupboard"])
+        self.assertEqual(diagram.get_class("Kitchen").canonical(),
+                         diagram.main.canonical())
+        self.assertIsNone(diagram.get_class("Oven"))
+
+        inheritance, = diagram.inheritances
+        self.assertEqual((inheritance.source, inheritance.target),
+                         ("Kitchen", "Room"))
+        self.assertEqual(diagram.get_parents("Kitchen"), [inheritance])
+        self.assertEqual(diagram.get_children("Room"), [inheritance])
+
+        aggregation, = diagram.aggregations
+        self.assertEqual((aggregation.source, aggregation.target),
+                         ("Kitchen", "Cupboard"))
+        self.assertIs(aggregation.part, diagram.aggregation)
+        self.assertEqual(diagram.get_aggregations("Kitchen"), [aggregation])
+
+    def test_fold_copies(self):
+        """
+        Test reading the graph doesn't change the parts the encoders draw
+        """
+        diagram = evaluate("|A x >> A y")
+        expected = PrettyPrintEncoder().generate(diagram)
+
+        diagram.content_hash()
+        self.assertEqual(diagram.get_class("A").fields, ["x", "y"])
+        self.assertEqual(diagram.parent.fields, ["x"])
+        self.assertEqual(diagram.main.fields, ["y"])
+        self.assertEqual(PrettyPrintEncoder().generate(diagram), expected)
+
+    def test_fold_changes(self):
+        """
+        Test the graph follows changes of the easy-entry attributes
+        """
+        diagram = evaluate("|Room size >> Kitchen color")
+        diagram.add_class(ClassDiagramPart("Kitchen", ["width"]))
+        old_hash = diagram.content_hash()
+
+        diagram.main = ClassDiagramPart("Oven")
+        self.assertEqual(list(diagram.classes), ["Kitchen", "Room", "Oven"])
+        self.assertEqual(diagram.get_class("Kitchen").fields, ["width"])
+        self.assertEqual([edge[:2] for edge in diagram.inheritances],
+                         [("Oven", "Room")])
+
+        diagram.main.add_field("heat")
+        self.assertEqual(diagram.get_class("Oven").fields, ["heat"])
+
+        diagram.main = evaluate("|Room size >> Kitchen color").main
+        self.assertEqual(diagram.get_class("Kitchen").fields,
+                         ["width", "color"])
+        self.assertIsNone(diagram.get_class("Oven"))
+        self.assertEqual(diagram.content_hash(), old_hash)
+
+    def test_add(self):
+        diagram = Diagram()
+        diagram.add_class(ClassDiagramPart("Room", ["size"]))
+        existing = diagram.add_class(ClassDiagramPart("Room", ["size", "color"],
+                                                      ["clean()"]))
+        diagram.add_inheritance("Kitchen", "Room")
+        diagram.add_inheritance("Kitchen", "Room")
+
+        self.assertEqual(existing.fields, ["size", "color"])
+        self.assertEqual(existing.methods, ["clean()"])
+        self.assertEqual(len(diagram.inheritances), 1)
+
+    def test_merge(self):
+        first = evaluate("|Room size >> Kitchen color")
+        second = evaluate("|Kitchen color width <>-cupboards--> Cupboard")
+        third = evaluate("|Room size >> Kitchen")
+
+        diagram = Diagram().merge(first, second, third)
+
+        self.assertEqual(list(diagram.classes), ["Room", "Kitchen", "Cupboard"])
+        self.assertEqual(diagram.get_class("Kitchen").fields,
+                         ["color", "width", "cupboards"])
+        self.assertEqual(len(diagram.inheritances), 1)
+        self.assertEqual(len(diagram.aggregations), 1)
+
+        # The merged diagrams are left unchanged
+        self.assertEqual(first.main.fields, ["color"])
+
+    def test_merge_keeps_conflicting_multiplicities(self):
+        first = evaluate("|Kitchen <>1-cupboards--*> Cupboard")
+        second = evaluate("|Kitchen <>*-cupboards--*> Cupboard")
+
+        diagram = Diagram().merge(first, second)
+        self.assertEqual(len(diagram.aggregations), 2)
+
+    def test_view(self):
+        diagram = Diagram()
+        diagram.add_class(ClassDiagramPart("Room", ["size"]))
+        diagram.add_class(ClassDiagramPart("Kitchen", ["color", "cupboards"]))
+        diagram.add_class(ClassDiagramPart("Cupboard"))
+        diagram.add_inheritance("Kitchen", "Room", InheritanceDiagramPart())
+        diagram.add_aggregation("Kitchen", "Cupboard",
+                                AggregationDiagramPart("cupboards"))
+
+        view = diagram.view("Kitchen")
+        self.assertEqual(view.main.name, "Kitchen")
+        self.assertEqual(view.parent.name, "Room")
+        self.assertEqual(view.aggregated.name, "Cupboard")
+
+        # The view can be used with the encoders
+        expected = PrettyPrintEncoder().generate(
+            evaluate("|Room size >> Kitchen color <>-cupboards--> Cupboard"))
+        self.assertEqual(PrettyPrintEncoder().generate(view), expected)
+
+        self.assertEqual([view.main.name for view in diagram.views()],
+                         ["Room", "Kitchen", "Cupboard"])
+
+        with self.assertRaises(KeyError):
+            diagram.view("Oven")
+
+
+class TestDiagramPart(unittest.TestCase):
+    """
+    Test cases to exercise the DiagramPart classes.
+    """
+    def test_slots(self):
+        part = ClassDiagramPart("Kitchen")
+
+        self.assertFalse(hasattr(part, "__dict__"))
+        with self.assertRaises(AttributeError):
+            part.color = "red"
+
+    def test_freeze(self):
+        part = ClassDiagramPart("Kitchen", ["color"], ["clean()"])
+        self.assertIs(part.freeze(), part)
+
+        self.assertTrue(part.frozen)
+        self.assertEqual(part.fields, ("color",))
+        self.assertEqual(part.methods, ("clean()",))
+
+        with self.assertRaises(AttributeError):
+            part.name = "Room"
+
+        aggregation = AggregationDiagramPart("cupboards").freeze()
+        with self.assertRaises(AttributeError):
+            aggregation.left_multiplicity = "*"
+
+    def test_merge_frozen(self):
+        first = Diagram()
+        first.add_class(ClassDiagramPart("Kitchen", ["color"]).freeze())
+        second = Diagram(main=ClassDiagramPart("Kitchen", ["size"]))
+
+        diagram = Diagram().merge(first, second)
+        self.assertEqual(diagram.get_class("Kitchen").fields, ["color", "size"])
+
+        first.merge(second)
+        self.assertEqual(first.get_class("Kitchen").fields, ["color", "size"])
+
+    def test_interned_names(self):
+        first = evaluate("|Kitchen color")
+        second = evaluate("|Room " + "".join(["co", "lor"]))
+
+        self.assertIs(first.main.fields[0], second.main.fields[0])
+
+    def test_interned_class_names(self):
+        first = evaluate("|Room >> Kitchen <>-doors--> Door")
+        second = evaluate("|" + "".join(["Ro", "om"]) + " >> " +
+                          "".join(["Kit", "chen"]) + " <>-" +
+                          "".join(["do", "ors"]) + "--> " +
+                          "".join(["Do", "or"]))
+
+        self.assertIs(first.parent.name, second.parent.name)
+        self.assertIs(first.main.name, second.main.name)
+        self.assertIs(first.aggregation.name, second.aggregation.name)
+        self.assertIs(first.aggregated.name, second.aggregated.name)
+
+        part = ClassDiagramPart("Hall")
+        part.name = "".join(["Pan", "try"])
+        self.assertIs(part.name, ClassDiagramPart("Pantry").name)
+
+    def test_symbol_table(self):
+        symbols = SymbolTable()
+        name = symbols.intern("".join(["Kit", "chen"]))
+
+        self.assertIs(symbols.intern("".join(["Kitch", "en"])), name)
+
+        method = {"signature": "clean()", "body": "pass"}
+        self.assertIs(symbols.intern(method), method)
+
+
+class TestContentHash(unittest.TestCase):
+    """
+    Test cases to exercise canonical() and content_hash().
+    """
+    def test_part_hash(self):
+        part = ClassDiagramPart("Kitchen", ["color"])
+        same = ClassDiagramPart("Kitchen", ["color"])
+
+        self.assertEqual(part.canonical(), same.canonical())
+        self.assertEqual(part.content_hash(), same.content_hash())
+
+        # The cached digest is dropped when the part changes
+        digest = part.content_hash()
+        part.add_field("size")
+        self.assertNotEqual(part.content_hash(), digest)
+
+        part.name = "Room"
+        self.assertNotEqual(part.content_hash(),
+                            ClassDiagramPart("Kitchen", ["color", "size"])
+                            .content_hash())
+
+    def test_aggregation_hash(self):
+        self.assertEqual(AggregationDiagramPart("cupboards").content_hash(),
+                         AggregationDiagramPart("cupboards", "", "")
+                         .content_hash())
+        self.assertNotEqual(AggregationDiagramPart("cupboards").content_hash(),
+                            AggregationDiagramPart("cupboards", "*")
+                            .content_hash())
+
+    def test_diagram_hash(self):
+        first = evaluate(KITCHEN)
+        second = evaluate(KITCHEN)
+
+        self.assertEqual(first.canonical(), second.canonical())
+        self.assertEqual(first.content_hash(), second.content_hash())
+
+        second.aggregated.add_method("close()")
+        self.assertNotEqual(first.content_hash(), second.content_hash())
+
+    def test_diagram_hash_cached(self):
+        diagram = evaluate("|Room >> Kitchen color <>-cupboards--> Cupboard")
+        digest = diagram.content_hash()
+
+        # The same digest object is returned until something changes
+        self.assertIs(diagram.content_hash(), digest)
+
+        # Parts outside the diagram don't affect it
+        ClassDiagramPart("Hall").add_field("width")
+        self.assertIs(diagram.content_hash(), digest)
+
+        diagram.get_class("Cupboard").add_field("doors")
+        self.assertNotEqual(diagram.content_hash(), digest)
+        diagram.get_class("Cupboard").fields = None
+        self.assertEqual(diagram.content_hash(), digest)
+
+        diagram.add_class(ClassDiagramPart("Hall"))
+        self.assertNotEqual(diagram.content_hash(), digest)
+
+        digest = diagram.content_hash()
+        diagram.main = diagram.get_class("Room")
+        self.assertNotEqual(diagram.content_hash(), digest)
+
+        digest = diagram.content_hash()
+        diagram.aggregation.name = "shelves"
+        self.assertNotEqual(diagram.content_hash(), digest)
+
+    def test_diagram_hash_ignores_order(self):
+        first = Diagram()
+        second = Diagram()
+        room = ClassDiagramPart("Room", ["size"])
+        kitchen = ClassDiagramPart("Kitchen", ["color"])
+
+        first.add_class(room)
+        first.add_class(kitchen)
+        first.add_inheritance("Kitchen", "Room")
+
+        second.add_inheritance("Kitchen", "Room")
+        second.add_class(kitchen)
+        second.add_class(room)
+
+        self.assertEqual(first.canonical(), second.canonical())
+        self.assertEqual(first.content_hash(), second.content_hash())
+
+        second.add_aggregation("Kitchen", "Room",
+                               AggregationDiagramPart("rooms"))
+        self.assertNotEqual(first.content_hash(), second.content_hash())
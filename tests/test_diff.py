@@ -0,0 +1,53 @@
+import unittest
+
+from prexel.models.diagram import Diagram
+from prexel.models.diff import diff
+from prexel.tests.helpers import evaluate, KITCHEN
+
+
+class TestDiff(unittest.TestCase):
+    """
+    Test cases to exercise the diff() function.
+    """
+    def test_no_changes(self):
+        result = diff(evaluate(KITCHEN), evaluate(KITCHEN))
+
+        self.assertFalse(result)
+        self.assertEqual(result.affected_classes(), set())
+
+    def test_classes(self):
+        old = Diagram().merge(
+            evaluate("|Room size >> Kitchen color open()"),
+            evaluate("|Oven"))
+        new = Diagram().merge(
+            evaluate("|Room size >> Kitchen width open() close()"),
+            evaluate("|Sink"))
+
+        result = diff(old, new)
+
+        self.assertEqual([part.name for part in result.added_classes],
+                         ["Sink"])
+        self.assertEqual([part.name for part in result.removed_classes],
+                         ["Oven"])
+
+        change, = result.changed_classes
+        self.assertEqual(change.name, "Kitchen")
+        self.assertEqual(change.added_fields, ["width"])
+        self.assertEqual(change.removed_fields, ["color"])
+        self.assertEqual(change.added_methods, ["close()"])
+        self.assertEqual(change.removed_methods, [])
+
+        self.assertEqual(result.affected_classes(), {"Sink", "Kitchen"})
+
+    def test_relations(self):
+        old = evaluate("|Room >> Kitchen <>-cupboards--> Cupboard")
+        new = evaluate("|Kitchen <>*-cupboards--> Cupboard")
+
+        result = diff(old, new)
+
+        self.assertEqual([part.name for part in result.removed_classes],
+                         ["Room"])
+        self.assertEqual(len(result.removed_relations), 2)
+        self.assertEqual(len(result.added_relations), 1)
+        self.assertEqual(result.added_relations[0].part.left_multiplicity, "*")
+        self.assertEqual(result.affected_classes(), {"Kitchen", "Cupboard"})
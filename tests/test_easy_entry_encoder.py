@@ -0,0 +1,58 @@
+import unittest
+
+from prexel.encoders.easy_entry_encoder import EasyEntryEncoder
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   InheritanceDiagramPart,
+                                   AggregationDiagramPart)
+
+
+class TestEasyEntryEncoder(unittest.TestCase):
+    """
+    Test cases to exercise the EasyEntryEncoder class.
+    """
+    def test_generate_class(self):
+        kitchen = ClassDiagramPart("Kitchen", fields=["color"],
+                                   methods=["cook()"])
+
+        actual = EasyEntryEncoder().generate(Diagram(kitchen))
+
+        self.assertEqual(actual, "|Kitchen color cook()")
+
+    def test_generate_full(self):
+        diagram = Diagram(ClassDiagramPart("Kitchen", fields=[
+                              "color",
+                              "cupboards"
+                          ]),
+                          parent=ClassDiagramPart("Room", fields=["size"]),
+                          inheritance=InheritanceDiagramPart(),
+                          aggregated=ClassDiagramPart("Cupboard",
+                                                      methods=["open()"]),
+                          aggregation=AggregationDiagramPart(
+                              "cupboards", right_multiplicity="*"))
+
+        actual = EasyEntryEncoder().generate(diagram)
+
+        self.assertEqual(actual, "|Room size >> Kitchen color "
+                                 "<>-cupboards--*> Cupboard open()")
+
+    def test_generate_trailing_fields(self):
+        # Without a parent, fields after the aggregated class belong to the
+        # main class
+        diagram = Diagram(ClassDiagramPart("Employer", fields=[
+                              "name",
+                              "employees",
+                              "position"
+                          ]),
+                          aggregated=ClassDiagramPart("Employee"),
+                          aggregation=AggregationDiagramPart(
+                              "employees", "1", "*"))
+
+        actual = EasyEntryEncoder().generate(diagram)
+
+        self.assertEqual(actual,
+                         "|Employer name <>1-employees--*> Employee position")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+from prexel.models.diagram import Diagram, ClassDiagramPart
+from prexel.models.hierarchy import HierarchyIndex
+
+
+def hierarchy(*edges):
+    """
+    Create a Diagram from (child, parent) tuples.
+    """
+    diagram = Diagram()
+
+    for child, parent in edges:
+        diagram.add_class(ClassDiagramPart(parent))
+        diagram.add_class(ClassDiagramPart(child))
+        diagram.add_inheritance(child, parent)
+
+    return diagram
+
+
+class TestHierarchyIndex(unittest.TestCase):
+    """
+    Test cases to exercise the HierarchyIndex class.
+    """
+    def setUp(self):
+        self.diagram = hierarchy(("Kitchen", "Room"),
+                                 ("Bathroom", "Room"),
+                                 ("Galley", "Kitchen"),
+                                 ("Room", "Space"))
+        self.index = HierarchyIndex(self.diagram)
+
+    def test_is_subtype(self):
+        index = self.index
+
+        self.assertTrue(index.is_subtype("Galley", "Space"))
+        self.assertTrue(index.is_subtype("Galley", "Kitchen"))
+        self.assertTrue(index.is_subtype("Room", "Room"))
+        self.assertFalse(index.is_subtype("Galley", "Bathroom"))
+        self.assertFalse(index.is_subtype("Room", "Kitchen"))
+        self.assertFalse(index.is_subtype("Oven", "Room"))
+        self.assertEqual(index.irregular, set())
+
+    def test_ancestors_and_descendants(self):
+        index = self.index
+
+        self.assertEqual(index.ancestors("Galley"), ["Kitchen", "Room", "Space"])
+        self.assertEqual(sorted(index.descendants("Room")),
+                         ["Bathroom", "Galley", "Kitchen"])
+        self.assertEqual(index.descendants("Galley"), [])
+
+    def test_multiple_parents(self):
+        self.diagram.add_class(ClassDiagramPart("Studio"))
+        self.diagram.add_inheritance("Studio", "Kitchen")
+        self.diagram.add_inheritance("Studio", "Bathroom")
+        index = self.index
+
+        self.assertTrue(index.is_subtype("Studio", "Bathroom"))
+        self.assertTrue(index.is_subtype("Studio", "Space"))
+        self.assertIn("Studio", index.descendants("Bathroom"))
+        self.assertEqual(index.ancestors("Studio"),
+                         ["Kitchen", "Bathroom", "Room", "Space"])
+
+    def test_descendants_of_regular_subtrees(self):
+        diagram = hierarchy(("Sink", "Fixture"), ("Tap", "Fixture"),
+                            ("Mixer", "Tap"), ("Mixer", "Sink"))
+        diagram.merge(self.diagram)
+        index = HierarchyIndex(diagram)
+
+        # Only the subtree with the second parent edge of Mixer is walked
+        self.assertEqual(index.crossing, {"Sink"})
+        self.assertEqual(sorted(index.descendants("Fixture")),
+                         ["Mixer", "Sink", "Tap"])
+        self.assertEqual(index.descendants("Sink"), ["Mixer"])
+        self.assertEqual(index.descendants("Tap"), ["Mixer"])
+
+        start = index.pre["Space"]
+        self.assertEqual(index.crossings[start],
+                         index.crossings[start + index.size["Space"]])
+        self.assertEqual(sorted(index.descendants("Space")),
+                         ["Bathroom", "Galley", "Kitchen", "Room"])
+
+    def test_cycles(self):
+        diagram = hierarchy(("A", "B"), ("B", "C"), ("C", "A"), ("D", "C"))
+        index = HierarchyIndex(diagram)
+
+        self.assertEqual(len(index.cycles), 1)
+        self.assertEqual(sorted(index.cycles[0]), ["A", "B", "C"])
+        self.assertTrue(index.is_subtype("D", "A"))
+        self.assertEqual(sorted(index.topological()), ["A", "B", "C", "D"])
+
+    def test_update(self):
+        index = self.index
+        self.diagram.merge(hierarchy(("Sink", "Fixture")),
+                           Diagram(main=ClassDiagramPart("Oven")))
+
+        self.assertTrue(index.is_subtype("Sink", "Fixture"))
+        self.assertFalse(index.is_subtype("Oven", "Room"))
+
+        # Classes without inheritance edges are labelled without a rebuild
+        self.diagram.add_class(ClassDiagramPart("Fridge"))
+        order = index.order
+        self.assertTrue(index.is_subtype("Fridge", "Fridge"))
+        self.assertIs(index.order, order)
+        self.assertEqual(index.order[-1], "Fridge")
+
+    def test_topological(self):
+        order = self.index.topological()
+
+        for edge in self.diagram.inheritances:
+            self.assertLess(order.index(edge.target), order.index(edge.source))
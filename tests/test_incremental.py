@@ -0,0 +1,161 @@
+import random
+import unittest
+
+from prexel.parser.lexer import CompiledLexer
+from prexel.parser.interpreter import Interpreter, InterpreterException
+from prexel.parser.incremental import (IncrementalInterpreter,
+                                       common_text_length)
+
+
+class TestIncrementalInterpreter(unittest.TestCase):
+    """
+    Test cases to exercise the IncrementalInterpreter class. Every update
+    has to produce the same tokens and Diagram as lexing and interpreting
+    the new text from scratch.
+    """
+    def assertSameAsFullParse(self, incremental, text):
+        try:
+            expected = Interpreter(CompiledLexer(text)).evaluate()
+        except InterpreterException:
+            with self.assertRaises(InterpreterException):
+                incremental.update(text)
+            return
+
+        actual = incremental.update(text)
+
+        tokens = [(token.type, token.value, token.start, token.end)
+                  for token in CompiledLexer(text)]
+        cached = [(token.type, token.value, token.start, token.end)
+                  for token in incremental.tokens]
+        self.assertEqual(tokens, cached, text)
+
+        for name in ("main", "parent", "aggregated"):
+            expected_part = getattr(expected, name)
+            actual_part = getattr(actual, name)
+
+            if expected_part is None:
+                self.assertIsNone(actual_part, text)
+                continue
+
+            self.assertEqual(expected_part.name, actual_part.name, text)
+            self.assertEqual(expected_part.fields, actual_part.fields, text)
+            self.assertEqual(expected_part.methods, actual_part.methods, text)
+
+        if expected.aggregation:
+            self.assertEqual(expected.aggregation.name,
+                             actual.aggregation.name, text)
+
+    def test_update(self):
+        """
+        Test the update() method on the first version of the text.
+        """
+        incremental = IncrementalInterpreter()
+        diagram = incremental.update("|Kitchen color size show_kitchen()")
+
+        self.assertEqual(diagram.main.name, "Kitchen")
+        self.assertEqual(diagram.main.fields, ["color", "size"])
+        self.assertEqual(incremental.full_parses, 1)
+
+    def test_update_class_body(self):
+        """
+        Test edits to fields and methods only re-interpret the class body.
+        """
+        incremental = IncrementalInterpreter()
+        text = "|Room >> Kitchen color show_kitchen() <>*-cupboards--1> " \
+               "Cupboard open()"
+        incremental.update(text)
+
+        edits = [
+            "|Room >> Kitchen colour show_kitchen() <>*-cupboards--1> "
+            "Cupboard open()",
+            "|Room >> Kitchen colour size show_kitchen() <>*-cupboards--1> "
+            "Cupboard open()",
+            "|Room >> Kitchen colour size show_kitchen() <>*-cupboards--1> "
+            "Cupboard open() close()",
+            "|Room height >> Kitchen colour size show_kitchen() "
+            "<>*-cupboards--1> Cupboard open() close()",
+            "|Room height >> Kitchen size show_kitchen() "
+            "<>*-cupboards--1> Cupboard open() close()",
+        ]
+
+        for edit in edits:
+            self.assertSameAsFullParse(incremental, edit)
+
+        self.assertEqual(incremental.full_parses, 1)
+
+    def test_update_structure(self):
+        """
+        Test edits to class names and relationships re-run the Interpreter.
+        """
+        incremental = IncrementalInterpreter()
+        incremental.update("|Kitchen color <>-cupboards--> Cupboard")
+
+        self.assertSameAsFullParse(incremental,
+                                   "|Kitchen color <>-drawers--> Cupboard")
+        self.assertSameAsFullParse(incremental,
+                                   "|Room >> Kitchen color <>-drawers--> Drawer")
+        self.assertEqual(incremental.full_parses, 3)
+
+    def test_update_after_error(self):
+        """
+        Test the incremental state recovers after a syntax error.
+        """
+        incremental = IncrementalInterpreter()
+        incremental.update("|Room >> Kitchen")
+
+        self.assertSameAsFullParse(incremental, "|Room >> ")
+        self.assertSameAsFullParse(incremental, "|Room >> Kitchen size")
+
+    def test_update_random_edits(self):
+        """
+        Test random edits against lexing and interpreting from scratch.
+        """
+        pieces = [" ", "\n|", "size", "color", "open()", "<>", "--", ">",
+                  "*", "1", ">>", "Room", "K", ",", "x"]
+        generator = random.Random(42)
+        text = "|Room size >> Kitchen color show_kitchen() " \
+               "<>*-cupboards--1> Cupboard open()"
+        incremental = IncrementalInterpreter()
+        incremental.update(text)
+
+        for _ in range(1000):
+            position = generator.randint(1, len(text))
+
+            if generator.random() < 0.5:
+                text = text[:position] + generator.choice(pieces) + text[position:]
+            else:
+                text = text[:position] + text[position + generator.randint(1, 4):]
+
+            self.assertSameAsFullParse(incremental, text)
+
+    def test_common_text_length(self):
+        """
+        Test the common prefix and suffix lengths against comparing the
+        characters one at a time.
+        """
+        generator = random.Random(7)
+
+        for _ in range(500):
+            old = "".join(generator.choice("ab")
+                          for _ in range(generator.randint(0, 100)))
+            new = old[:generator.randint(0, len(old))] + \
+                generator.choice(["", "a", "b", "ba"]) + \
+                old[generator.randint(0, len(old)):]
+            limit = min(len(old), len(new))
+
+            prefix = 0
+            while prefix < limit and old[prefix] == new[prefix]:
+                prefix += 1
+
+            suffix = 0
+            while suffix < limit - prefix and \
+                    old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]:
+                suffix += 1
+
+            self.assertEqual(common_text_length(old, new, limit), prefix)
+            self.assertEqual(common_text_length(old, new, limit - prefix,
+                                                backwards=True), suffix)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 
 from prexel.parser.lexer import Lexer
-from prexel.parser.interpreter import Interpreter, InterpreterException
+from prexel.parser.interpreter import (Interpreter,
+                                      InterpreterException,
+                                      evaluate_document)
 from prexel.parser.token import Token
 from prexel.models.diagram import (ClassDiagramPart,
                                    InheritanceDiagramPart,
@@ -312,3 +314,58 @@ class TestInterpreter(unittest.TestCase):
             interpreter.evaluate()
 
         self.assertEqual(context.exception.args[0], "There is no class name following the aggregation.")
+
+    def test_evaluate_document(self):
+        text = """Spec for the house
+|Room size >> Kitchen color
+|show_kitchen()
+
+|Airplane <>-wings--> Wing
+"""
+        results = list(evaluate_document(text))
+        self.assertEqual(len(results), 2)
+
+        span, diagram = results[0]
+        self.assertEqual(text[span[0]:span[1]],
+                         "|Room size >> Kitchen color\n|show_kitchen()")
+        self.assertEqual(diagram.parent.name, "Room")
+        self.assertEqual(diagram.main.methods, ["show_kitchen()"])
+
+        span, diagram = results[1]
+        self.assertEqual(diagram.main.name, "Airplane")
+        self.assertEqual(diagram.aggregated.name, "Wing")
+
+    def test_evaluate_recover(self):
+        text = "|Room >> kitchen <>-cupboards--> , Kitchen >> oven"
+        lexer = Lexer(text)
+
+        interpreter = Interpreter(lexer)
+        diagram = interpreter.evaluate(recover=True)
+
+        # Every error is reported with the span of the offending token
+        diagnostics = [(error.args[0], text[error.start:error.end])
+                       for error in interpreter.diagnostics]
+        self.assertEqual(diagnostics, [
+            ("Missing child class after \">>\"", ">>"),
+            ("There is no class name following the aggregation.",
+             "<>-cupboards-->"),
+            ("Unexpected token", "Kitchen"),
+            ("Missing child class after \">>\"", ">>"),
+        ])
+        self.assertEqual(interpreter.diagnostics[-1].start, 43)
+
+        # A partial diagram is still returned
+        self.assertEqual(diagram.main.name, "Room")
+        self.assertIsNone(diagram.aggregated)
+
+    def test_evaluate_recover_without_errors(self):
+        text = "|Room size >> Kitchen color <>-cupboards--> Cupboard"
+        lexer = Lexer(text)
+
+        interpreter = Interpreter(lexer)
+        diagram = interpreter.evaluate(recover=True)
+
+        self.assertEqual(interpreter.diagnostics, [])
+        self.assertEqual(diagram.parent.name, "Room")
+        self.assertEqual(diagram.main.fields, ["color", "cupboards"])
+        self.assertEqual(diagram.aggregated.name, "Cupboard")
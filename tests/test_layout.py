@@ -0,0 +1,205 @@
+import random
+import unittest
+
+from prexel.encoders.layout import Layout, GridIndex
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   InheritanceDiagramPart,
+                                   AggregationDiagramPart)
+
+
+def hierarchy(*edges):
+    """
+    Create a Diagram from (child, parent) tuples.
+    """
+    diagram = Diagram()
+
+    for child, parent in edges:
+        diagram.add_class(ClassDiagramPart(parent))
+        diagram.add_class(ClassDiagramPart(child))
+        diagram.add_inheritance(child, parent)
+
+    return diagram
+
+
+class TestLayout(unittest.TestCase):
+    """
+    Test cases to exercise the Layout class.
+    """
+    def boxes(self, layout):
+        return {box.name: box for box in layout.boxes}
+
+    def test_easy_entry(self):
+        # A single easy-entry diagram is drawn like the PrettyPrintEncoder
+        diagram = Diagram(ClassDiagramPart("Kitchen", ["color"], ["cook()"]),
+                          parent=ClassDiagramPart("Room", ["area"]),
+                          inheritance=InheritanceDiagramPart(),
+                          aggregated=ClassDiagramPart("Cupboard"),
+                          aggregation=AggregationDiagramPart("cupboards",
+                                                             "1", "*"))
+
+        expected = PrettyPrintEncoder().generate(diagram).splitlines()
+        actual = Layout(diagram).render().splitlines()
+
+        self.assertEqual([line.rstrip() for line in actual],
+                         [line.rstrip() for line in expected])
+
+    def test_parents_above_children(self):
+        diagram = hierarchy(("Kitchen", "Room"), ("Bathroom", "Room"),
+                            ("Galley", "Kitchen"), ("Galley", "Bathroom"),
+                            ("Room", "Space"))
+        boxes = self.boxes(Layout(diagram))
+
+        for edge in diagram.inheritances:
+            parent = boxes[edge.target]
+            self.assertLess(parent.row + len(parent.lines),
+                            boxes[edge.source].row)
+
+    def test_crossing_reduction(self):
+        # Studio is ranked after Sink, but is moved towards Kitchen
+        diagram = hierarchy(("Studio", "Kitchen"), ("Studio", "Bathroom"),
+                            ("Sink", "Bathroom"))
+        boxes = self.boxes(Layout(diagram))
+        unordered = self.boxes(Layout(diagram, sweeps=0))
+
+        self.assertLess(unordered["Sink"].column, unordered["Studio"].column)
+        self.assertLess(boxes["Studio"].column, boxes["Sink"].column)
+
+    def test_long_edge(self):
+        # The edge from Space to Galley passes the rank of Room
+        diagram = hierarchy(("Room", "Space"), ("Galley", "Room"),
+                            ("Galley", "Space"))
+        layout = Layout(diagram)
+        boxes = self.boxes(layout)
+        lines = layout.render().splitlines()
+        room = boxes["Room"]
+
+        self.assertGreater(boxes["Galley"].row, room.row + len(room.lines))
+        self.assertTrue(any(segment.vertical and segment.row <= room.row and
+                            segment.column > room.column
+                            for segment in layout.segments))
+        self.assertEqual(len(lines), layout.height)
+
+    def test_routed_aggregations(self):
+        diagram = Diagram()
+        for name in ("Kitchen", "Bathroom", "Cupboard"):
+            diagram.add_class(ClassDiagramPart(name))
+
+        diagram.add_aggregation("Kitchen", "Cupboard",
+                                AggregationDiagramPart("cupboards", "1", "*"))
+        diagram.add_aggregation("Bathroom", "Cupboard",
+                                AggregationDiagramPart("cabinets"))
+        text = Layout(diagram).render()
+
+        # A class aggregated twice can't be next to both of the others
+        self.assertIn("|<>1-cupboards-", text)
+        self.assertIn("|<>-cabinets-", text)
+        self.assertIn("*>|", text)
+        self.assertIn("->|", text)
+
+    def test_cycles(self):
+        diagram = hierarchy(("A", "B"), ("B", "C"), ("C", "A"), ("D", "D"))
+        diagram.add_aggregation("A", "A", AggregationDiagramPart("next"))
+        boxes = self.boxes(Layout(diagram))
+
+        self.assertEqual(sorted(boxes), ["A", "B", "C", "D"])
+
+    def test_no_overlaps(self):
+        generator = random.Random(0)
+
+        for _ in range(200):
+            diagram = Diagram()
+            count = generator.randint(1, 10)
+
+            for index in range(count):
+                diagram.add_class(ClassDiagramPart(
+                    "C{}".format(index),
+                    ["field"] * generator.randint(0, 3) or None))
+
+            for _ in range(generator.randint(0, 2 * count)):
+                source = "C{}".format(generator.randrange(count))
+                target = "C{}".format(generator.randrange(count))
+
+                if generator.random() < 0.5:
+                    diagram.add_inheritance(source, target)
+                else:
+                    diagram.add_aggregation(source, target,
+                                            AggregationDiagramPart("items"))
+
+            layout = Layout(diagram)
+            cells = set()
+
+            for box in layout.boxes:
+                for row, line in enumerate(box.lines):
+                    for column in range(len(line)):
+                        cell = (box.row + row, box.column + column)
+                        self.assertNotIn(cell, cells)
+                        cells.add(cell)
+
+            lines = {}
+
+            for segment in layout.segments:
+                for offset in range(len(segment.text)):
+                    cell = (segment.row + offset, segment.column) \
+                        if segment.vertical \
+                        else (segment.row, segment.column + offset)
+                    self.assertNotIn(cell, cells)
+                    self.assertLess(cell, (layout.height, layout.width))
+
+                    # Vertical lines only cross horizontal ones, or meet
+                    # the other lines from a shared port
+                    if segment.vertical:
+                        ends = segment.row, segment.row + len(segment.text)
+                        other = lines.setdefault(cell, ends)
+                        self.assertTrue(other[0] == ends[0] or
+                                        other[1] == ends[1])
+
+            # The ports of different nets in a gap are on different columns,
+            # so their vertical lines never meet
+            columns = {}
+
+            for net in layout.nets:
+                gap = min(port.unit.rank for port in net.ports)
+
+                for port in net.ports:
+                    owner = columns.setdefault((gap, port.column),
+                                               (net, port))
+                    self.assertTrue(owner[0] is net or owner[1] is port)
+
+    def test_window(self):
+        diagram = hierarchy(("Kitchen", "Room"), ("Bathroom", "Room"),
+                            ("Galley", "Kitchen"), ("Galley", "Bathroom"))
+        diagram.add_aggregation("Room", "Kitchen",
+                                AggregationDiagramPart("kitchens", "1", "*"))
+        layout = Layout(diagram)
+        lines = layout.render().splitlines()
+
+        for top in range(0, layout.height, 3):
+            for left in range(0, layout.width, 5):
+                self.assertEqual(layout.window(top, left, 7, 11),
+                                 [line[left:left + 11]
+                                  for line in lines[top:top + 7]])
+
+        self.assertEqual(layout.window(layout.height, 0, 5, 5), [])
+        self.assertEqual(layout.render_window(0, 0, 2, 4), " ___\n|Roo\n")
+
+
+class TestGridIndex(unittest.TestCase):
+    """
+    Test cases to exercise the GridIndex class.
+    """
+    def test_query(self):
+        index = GridIndex(rows=4, columns=4)
+        index.add("box", 1, 1, 3, 6)
+        index.add("line", 0, 2, 20, 3)
+        index.add("far", 30, 30, 31, 31)
+
+        self.assertEqual(index.query(0, 0, 4, 4), ["box", "line"])
+        self.assertEqual(index.query(10, 0, 12, 8), ["line"])
+        self.assertEqual(index.query(2, 6, 4, 8), [])
+        self.assertEqual(index.query(0, 0, 40, 40), ["box", "line", "far"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
+import os
+import random
+import tempfile
 import unittest
-from prexel.parser.lexer import Lexer
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.parser.interpreter import Interpreter
+from prexel.parser.lexer import Lexer, CompiledLexer, DocumentLexer
 from prexel.parser.token import Token
 
 
@@ -163,9 +168,9 @@ class TestLexer(unittest.TestCase):
         # Check that the token is an aggregation
         token = lexer.get_token()
         self.assertEqual(token.type, Token.AGGREGATION)
-        self.assertEqual(token.value["left_multi"], "")
-        self.assertEqual(token.value["name"], "wings")
-        self.assertEqual(token.value["right_multi"], "")
+        self.assertEqual(token.value.left_multi, "")
+        self.assertEqual(token.value.name, "wings")
+        self.assertEqual(token.value.right_multi, "")
 
         # Check that the token is a class name
         self.assertEqual(lexer.get_token().type, Token.CLASS_NAME)
@@ -192,6 +197,21 @@ class TestLexer(unittest.TestCase):
         self.assertEqual(token.type, Token.CLASS_NAME)
         self.assertEqual(token.value, "Wing")
 
+    def test_get_token_spans(self):
+        """
+        Test the get_token() method records the offsets of each token
+        """
+        text = "|Airplane  <>-wings--> Wing,fly()"
+        lexer = Lexer(text)
+
+        spans = [(token.start, token.end) for token in lexer]
+        self.assertEqual(spans, [(0, 1), (1, 9), (11, 22), (23, 27),
+                                 (27, 28), (28, 33)])
+
+        for token, (start, end) in zip(Lexer(text), spans):
+            if token.type != Token.AGGREGATION:
+                self.assertEqual(text[start:end], token.value)
+
     def test_get_token_skip_extra_prexel_markets(self):
         """
         Test the get_token() method with extra PREXEL markers
@@ -236,5 +256,353 @@ class TestLexer(unittest.TestCase):
         self.assertEqual(lexer.get_token().type, Token.COMMA)
 
 
+class TestCompiledLexer(unittest.TestCase):
+    """
+    Test cases to exercise the CompiledLexer class. The CompiledLexer has to
+    produce exactly the same token stream as the Lexer class.
+    """
+    def assertSameTokens(self, text):
+        lexer = Lexer(text)
+        compiled_lexer = CompiledLexer(text)
+
+        while True:
+            expected = lexer.get_token()
+            actual = compiled_lexer.get_token()
+
+            if expected is None:
+                self.assertIsNone(actual)
+                break
+
+            self.assertEqual(expected.type, actual.type, text)
+            self.assertEqual(expected.value, actual.value, text)
+            self.assertEqual((expected.start, expected.end),
+                             (actual.start, actual.end), text)
+
+    def test_get_token(self):
+        """
+        Test the get_token() method, which turns a token string into a Token object
+        """
+        text = "|Kitchen color square_feet show_kitchen()"
+        lexer = CompiledLexer(text)
+
+        self.assertEqual(lexer.get_token().type, Token.START_MARKER)
+        self.assertEqual(lexer.get_token().type, Token.CLASS_NAME)
+        self.assertEqual(lexer.get_token().type, Token.FIELD)
+        self.assertEqual(lexer.get_token().type, Token.FIELD)
+        self.assertEqual(lexer.get_token().type, Token.METHOD)
+        self.assertIsNone(lexer.get_token())
+
+    def test_get_token_with_aggregation(self):
+        """
+        Test the get_token() method with an aggregation Token
+        """
+        text = "|Airplane <>*-wings--1> Wing"
+        lexer = CompiledLexer(text)
+
+        lexer.get_token()  # PREXEL marker
+        lexer.get_token()  # "Airplane"
+
+        token = lexer.get_token()
+        self.assertEqual(token.type, Token.AGGREGATION)
+        self.assertEqual(token.value.left_multi, "*")
+        self.assertEqual(token.value.name, "wings")
+        self.assertEqual(token.value.right_multi, "1")
+
+    def test_same_tokens_as_lexer(self):
+        """
+        Test the CompiledLexer against the Lexer on the inputs used above
+        """
+        texts = [
+            "|Kitchen color square_feet show_kitchen()",
+            "|Room >> Kitchen, LivingRoom, Bathroom",
+            "|Airplane <>-wings--> Wing",
+            "|Airplane length <> Wing",
+            "|Room >> Kitchen \n|arrange_kitchen()\n|place_floor_cabinet()",
+            "|Room >> Kitchen|, arrange_kitchen()||,",
+            "|Room size >> Kitchen color square_feet show_kitchen() "
+            "<>*-cupboards--1> Cupboard open()",
+            "|TaskList <>-tasks----*> Task \n |get_the_tasks()",
+            "|A <<>> <<> <>> <> >>> >>, <>--1> <>1a--1b> f(x)(y) Sample_method()",
+            "|Kitchen\tget(a,b) {x} set_(){}",
+        ]
+
+        for text in texts:
+            self.assertSameTokens(text)
+
+    def test_same_tokens_as_lexer_random(self):
+        """
+        Test the CompiledLexer against the Lexer on randomly generated input
+        """
+        pieces = ["|", ",", " ", "\n", "\t", "<>", "<<", ">>", ">", "-",
+                  "*", "1", "(", ")", "{", "}", "A", "Room", "size", "_"]
+        generator = random.Random(1234)
+
+        for _ in range(500):
+            text = "".join(generator.choice(pieces)
+                           for _ in range(generator.randint(1, 30)))
+            self.assertSameTokens(text)
+
+    def test_get_token_with_range(self):
+        """
+        Test the CompiledLexer only tokenizes the requested part of the text
+        """
+        text = "|Room size\n|Kitchen color"
+        lexer = CompiledLexer(text, 11)
+
+        tokens = list(lexer)
+        self.assertEqual([token.value for token in tokens],
+                         ["|", "Kitchen", "color"])
+        self.assertEqual((tokens[1].start, tokens[1].end), (12, 19))
+
+        lexer = CompiledLexer(text, 0, 8)
+        self.assertEqual([token.value for token in lexer], ["|", "Room", "si"])
+
+
+class TestCompiledLexerBytes(unittest.TestCase):
+    """
+    Test cases to exercise the CompiledLexer over bytes-like sources.
+    """
+    TEXT = "|Room size >> Küche color show_kitchen() <>*-cupboards--1> Cupboard"
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, "wb") as file:
+            file.write(self.TEXT.encode("utf-8"))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def assertSameTokensAsText(self, lexer):
+        data = self.TEXT.encode("utf-8")
+        expected = list(CompiledLexer(self.TEXT))
+        actual = list(lexer)
+
+        self.assertEqual([token.type for token in expected],
+                         [token.type for token in actual])
+        self.assertEqual([token.value for token in expected],
+                         [token.value for token in actual])
+
+        # Offsets are byte offsets into the source
+        for token in actual:
+            if token.type != Token.AGGREGATION:
+                self.assertEqual(data[token.start:token.end].decode("utf-8"),
+                                 token.value)
+
+    def test_bytes(self):
+        self.assertSameTokensAsText(CompiledLexer(self.TEXT.encode("utf-8")))
+
+    def test_memoryview(self):
+        data = memoryview(self.TEXT.encode("utf-8"))
+        self.assertSameTokensAsText(CompiledLexer(data))
+
+    def test_from_file(self):
+        with CompiledLexer.from_file(self.path) as lexer:
+            self.assertSameTokensAsText(lexer)
+
+    def test_lazy_value(self):
+        """
+        Test token values are only decoded once they are read
+        """
+        lexer = CompiledLexer(b"|Kitchen color")
+        lexer.get_token()  # PREXEL marker
+
+        token = lexer.get_token()
+        self.assertIsNone(token._value)
+        self.assertEqual(token.value, "Kitchen")
+        self.assertIsNone(token.source)
+
+    def test_non_ascii_tokens(self):
+        """
+        Test only non-ASCII word characters are part of class names and
+        aggregation names in bytes like in str
+        """
+        for text in ("|A€ x", "|A— x", "|A· Küche", "|Kitchen <>-€-> Cupboard",
+                     "|Kitchen <>-tür-> Door"):
+            expected = [(token.type, token.value) for token in Lexer(text)]
+            actual = [(token.type, token.value)
+                      for token in CompiledLexer(text.encode("utf-8"))]
+            self.assertEqual(actual, expected, text)
+
+        types = [token.type for token in CompiledLexer("|A€ x".encode())]
+        self.assertEqual(types, [Token.START_MARKER, Token.FIELD, Token.FIELD])
+
+    def test_unicode_whitespace(self):
+        """
+        Test non-ASCII whitespace separates tokens in bytes like in str
+        """
+        for text in ("|Room\xa0size\u3000>>\x1cKüche\u2009color <>-doors--> Door",
+                     "|Room size >>\x1cKüche color <>-doors--> Door"):
+            expected = [(token.type, token.value) for token in Lexer(text)]
+            self.assertEqual(len(expected), 8)
+
+            for source in (text, text.encode("utf-8")):
+                self.assertEqual([(token.type, token.value)
+                                  for token in CompiledLexer(source)],
+                                 expected)
+
+
+class TestDocumentLexer(unittest.TestCase):
+    """
+    Test cases to exercise the DocumentLexer class.
+    """
+    def test_entries(self):
+        """
+        Test the entries() method splits a document into easy-entry blocks
+        """
+        text = ("Notes about the kitchen\n"
+                "|Room >> Kitchen color\n"
+                "|Airplane <>-wings--> Wing\n"
+                "\n"
+                "  |Kitchen <>-cupboard--> Cupboard\n"
+                "  |size\n"
+                "  |arrange_kitchen()\n"
+                "More notes | with a marker\n")
+
+        entries = list(DocumentLexer(text).entries())
+        spans = [span for span, _ in entries]
+
+        self.assertEqual([text[start:end] for start, end in spans], [
+            "|Room >> Kitchen color",
+            "|Airplane <>-wings--> Wing",
+            "  |Kitchen <>-cupboard--> Cupboard\n  |size\n  |arrange_kitchen()",
+        ])
+
+        values = [token.value for token in entries[2][1]]
+        self.assertEqual(values[:2], ["|", "Kitchen"])
+        self.assertEqual(values[-2:], ["size", "arrange_kitchen()"])
+
+    def test_entries_skip_pretty_print(self):
+        """
+        Test the rows of a generated diagram aren't taken for entries
+        """
+        diagram = Interpreter(Lexer(
+            "|Room >> Kitchen color <>-cupboards--*> Cupboard open()"
+        )).evaluate()
+        text = ("Notes\n" + PrettyPrintEncoder().generate(diagram) +
+                "|Wing span\n" + PrettyPrintEncoder().generate(diagram))
+
+        spans = [span for span, _ in DocumentLexer(text).entries()]
+
+        self.assertEqual([text[start:end] for start, end in spans],
+                         ["|Wing span"])
+        self.assertEqual(
+            [span for span, _ in DocumentLexer(text.encode("utf-8"))],
+            [(len(text[:start].encode("utf-8")),
+              len(text[:end].encode("utf-8"))) for start, end in spans])
+
+    def test_entries_non_ascii(self):
+        """
+        Test a line starting with a field containing non-ASCII characters
+        continues an entry in bytes like in str
+        """
+        text = "|Room size\n|A€ color\n|Küche width\n\n|A€ color\n"
+        data = text.encode("utf-8")
+
+        self.assertEqual(
+            [text[start:end] for (start, end), _ in DocumentLexer(text)],
+            ["|Room size\n|A€ color", "|Küche width"])
+        self.assertEqual(
+            [data[start:end].decode("utf-8")
+             for (start, end), _ in DocumentLexer(data)],
+            ["|Room size\n|A€ color", "|Küche width"])
+
+    def test_entries_same_tokens_as_lexer(self):
+        """
+        Test every block produces the same tokens as lexing it on its own
+        """
+        text = "|Room size\n|width()\n|Kitchen >> Pantry\n|Wing"
+
+        for (start, end), token_stream in DocumentLexer(text):
+            expected = [(token.type, token.value, token.start + start)
+                        for token in Lexer(text[start:end])]
+            actual = [(token.type, token.value, token.start)
+                      for token in token_stream]
+            self.assertEqual(expected, actual)
+
+    def test_from_file(self):
+        """
+        Test the entries() method over a memory-mapped file
+        """
+        text = "|Room size\n|width()\n|Kitchen >> Pantry\n"
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, "wb") as file:
+            file.write(text.encode("utf-8"))
+
+        try:
+            with DocumentLexer.from_file(path) as lexer:
+                entries = [(span, [token.value for token in token_stream])
+                           for span, token_stream in lexer]
+        finally:
+            os.remove(path)
+
+        self.assertEqual(entries, [
+            ((0, 19), ["|", "Room", "size", "width()"]),
+            ((20, 38), ["|", "Kitchen", ">>", "Pantry"]),
+        ])
+
+
+class TestTokenStream(unittest.TestCase):
+    """
+    Test cases to exercise the iterator, tokens() and peek() API shared by
+    the Lexer and CompiledLexer classes.
+    """
+    def test_iterator(self):
+        """
+        Test iterating over a lexer yields every token once.
+        """
+        for lexer_class in (Lexer, CompiledLexer):
+            lexer = lexer_class("|Room >> Kitchen color")
+
+            self.assertEqual([token.value for token in lexer],
+                             ["|", "Room", ">>", "Kitchen", "color"])
+            self.assertIsNone(lexer.get_token())
+
+    def test_tokens(self):
+        """
+        Test the tokens() generator yields the remaining tokens lazily.
+        """
+        lexer = CompiledLexer("|Kitchen color size")
+        lexer.get_token()  # PREXEL marker
+
+        tokens = lexer.tokens()
+        self.assertEqual(next(tokens).value, "Kitchen")
+
+        # Nothing past the requested token has been scanned yet
+        self.assertEqual(len(lexer.lookahead), 0)
+        self.assertEqual([token.value for token in tokens], ["color", "size"])
+
+    def test_peek(self):
+        """
+        Test the peek() method looks ahead without consuming tokens.
+        """
+        for lexer_class in (Lexer, CompiledLexer):
+            lexer = lexer_class("|Room >> Kitchen")
+
+            self.assertEqual(lexer.peek().type, Token.START_MARKER)
+            self.assertEqual(lexer.peek(3).type, Token.INHERITANCE)
+            self.assertEqual(lexer.peek(4).value, "Kitchen")
+
+            # Peeked tokens are still returned in order
+            self.assertEqual(lexer.get_token().type, Token.START_MARKER)
+            self.assertEqual(lexer.peek().type, Token.CLASS_NAME)
+            self.assertEqual(lexer.get_token().type, Token.CLASS_NAME)
+            self.assertEqual(lexer.get_token().type, Token.INHERITANCE)
+            self.assertIsNone(lexer.peek(2))
+            self.assertEqual(lexer.get_token().type, Token.CLASS_NAME)
+            self.assertIsNone(lexer.get_token())
+
+    def test_peek_out_of_range(self):
+        """
+        Test peek() is bounded by the size of the lookahead buffer.
+        """
+        lexer = Lexer("|Room")
+
+        with self.assertRaises(ValueError):
+            lexer.peek(Lexer.LOOKAHEAD + 1)
+
+        with self.assertRaises(ValueError):
+            lexer.peek(0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,9 @@
+import io
 import unittest
 
-from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.encoders.pretty_print_encoder import (PrettyPrintEncoder,
+                                                 BoxCache,
+                                                 BOX_CACHE)
 from prexel.models.diagram import (Diagram,
                                    ClassDiagramPart,
                                    InheritanceDiagramPart,
@@ -156,6 +159,19 @@ class TestPrettyPrintEncoderMain(unittest.TestCase):
         actual = encoder.generate(diagram)
         self.assertEqual(expected, actual)
 
+    def test_generate_to(self):
+        diagram = Diagram(ClassDiagramPart("Kitchen", fields=["color"]),
+                          parent=ClassDiagramPart("Room"),
+                          inheritance=InheritanceDiagramPart(),
+                          aggregated=ClassDiagramPart("Cupboard"),
+                          aggregation=AggregationDiagramPart("cupboards"))
+
+        encoder = PrettyPrintEncoder()
+        stream = io.StringIO()
+        encoder.generate_to(diagram, stream)
+
+        self.assertEqual(stream.getvalue(), encoder.generate(diagram))
+
 
 class TestPrettyPrintEncoderHelpers(unittest.TestCase):
     """
@@ -275,6 +291,82 @@ class TestPrettyPrintEncoderHelpers(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_create_class_wide(self):
+        # Wide characters take two columns, so the box is sized by width
+        diagram = ClassDiagramPart("Kitchen", fields=["色"],
+                                   methods=["料理する()"])
+
+        expected = (" __________ \n"
+                    "| Kitchen  |\n"
+                    "|----------|\n"
+                    "|色        |\n"
+                    "|料理する()|\n"
+                    "|__________|\n")
+
+        actual = PrettyPrintEncoder.render_class(diagram)
+
+        self.assertEqual("".join(actual), expected)
+
+    def test_concat_aggregation_wide(self):
+        encoder = PrettyPrintEncoder()
+        room = encoder.create_class(ClassDiagramPart("Room", ["広さ"]))
+        aggregation = encoder.create_aggregation_arrow(
+            AggregationDiagramPart("扉"))
+        door = encoder.create_class(ClassDiagramPart("Door"))
+
+        expected = (" ____           ____ \n"
+                    "|Room|<>-扉--->|Door|\n"
+                    "|----|         |____|\n"
+                    "|広さ|               \n"
+                    "|____|               \n")
+
+        actual = encoder.concat_aggregation(aggregator=room,
+                                            aggregation=aggregation,
+                                            aggregated=door)
+
+        self.assertEqual(expected, actual)
+
+
+class TestBoxCache(unittest.TestCase):
+    """
+    Test cases to exercise the BoxCache class.
+    """
+    def test_class_lines_cached(self):
+        BOX_CACHE.clear()
+        kitchen = ClassDiagramPart("Kitchen", ["color"], ["cook()"])
+
+        first = PrettyPrintEncoder.class_lines(kitchen)
+        second = PrettyPrintEncoder.class_lines(kitchen)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, PrettyPrintEncoder.render_class(kitchen))
+        self.assertEqual((BOX_CACHE.hits, BOX_CACHE.misses), (1, 1))
+        self.assertEqual(BOX_CACHE.hit_rate(), 0.5)
+
+        # A changed field or the extends flag is a different box
+        kitchen.add_field("size")
+        PrettyPrintEncoder.class_lines(kitchen)
+        extended = PrettyPrintEncoder.class_lines(kitchen, extends=True)
+
+        self.assertEqual(extended[0], "|_______ \n")
+        self.assertEqual(len(BOX_CACHE), 3)
+        self.assertEqual(BOX_CACHE.misses, 3)
+
+    def test_evict_by_characters(self):
+        cache = BoxCache(capacity=10)
+        cache.put("a", ["1234"])
+        cache.put("b", ["1234"])
+        cache.get("a")
+        cache.put("c", ["12", "34"])
+
+        self.assertEqual(cache.characters, 8)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ("1234",))
+
+        # Boxes larger than the cache are returned but not kept
+        self.assertEqual(cache.put("d", ["12345678901"]), ("12345678901",))
+        self.assertEqual(len(cache), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
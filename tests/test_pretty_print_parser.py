@@ -0,0 +1,172 @@
+import unittest
+
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.parser.interpreter import Interpreter
+from prexel.parser.lexer import Lexer
+from prexel.parser.pretty_print_parser import (PrettyPrintParser,
+                                               PrettyPrintParserException,
+                                               reverse,
+                                               reverse_blocks,
+                                               round_trips)
+
+
+class TestPrettyPrintParser(unittest.TestCase):
+    """
+    Test cases to exercise the PrettyPrintParser class.
+    """
+    def test_parse(self):
+        text = (" ____ \n"
+                "|Room|\n"
+                "|____|\n"
+                "∆\n"
+                "|______________                    ________ \n"
+                "|   Kitchen    |<>*-cupboards---1>|Cupboard|\n"
+                "|--------------|                  |--------|\n"
+                "|color         |                  |open()  |\n"
+                "|cupboards     |                  |________|\n"
+                "|show_kitchen()|                            \n"
+                "|______________|                            \n")
+
+        diagram = PrettyPrintParser(text).parse()
+
+        self.assertEqual(diagram.parent.name, "Room")
+        self.assertIsNotNone(diagram.inheritance)
+        self.assertEqual(diagram.main.name, "Kitchen")
+        self.assertEqual(diagram.main.fields, ["color", "cupboards"])
+        self.assertEqual(diagram.main.methods, ["show_kitchen()"])
+        self.assertEqual(diagram.aggregation.name, "cupboards")
+        self.assertEqual(diagram.aggregation.left_multiplicity, "*")
+        self.assertEqual(diagram.aggregation.right_multiplicity, "1")
+        self.assertEqual(diagram.aggregated.name, "Cupboard")
+        self.assertEqual(diagram.aggregated.methods, ["open()"])
+
+    def test_reverse_examples(self):
+        examples = [
+            "|Kitchen",
+            "|Kitchen arrange_kitchen() place_floor_cabinet()",
+            "|Person name age >> Employee company",
+            "|Airplane color weight <>-wings--> Wing",
+            "|Employer name age <>1-employees--*> Employee position",
+            "|Room >> Kitchen color show_kitchen() <>*-cupboards--1> "
+            "Cupboard open()",
+        ]
+
+        for easy_entry in examples:
+            diagram = Interpreter(Lexer(easy_entry)).evaluate()
+            pretty_print = PrettyPrintEncoder().generate(diagram)
+
+            self.assertEqual(reverse(pretty_print), (easy_entry, True))
+
+    def test_reverse_wide(self):
+        easy_entry = "|Room 広さ >> Kitchen 色 <>*-食器棚--1> Cupboard 開く()"
+        diagram = Interpreter(Lexer(easy_entry)).evaluate()
+        pretty_print = PrettyPrintEncoder().generate(diagram)
+
+        self.assertEqual(reverse(pretty_print), (easy_entry, True))
+
+    def test_reverse_indented(self):
+        pretty_print = ("    ______ \n"
+                        "   |Person|\n"
+                        "   |------|\n"
+                        "   |name  |\n"
+                        "   |______|\n"
+                        "   ∆\n"
+                        "   |________ \n"
+                        "   |Employee|\n"
+                        "   |________|")
+
+        self.assertEqual(reverse(pretty_print),
+                         ("   |Person name >> Employee", True))
+
+    def test_reverse_edited(self):
+        # A field the interpreter would put in another place doesn't
+        # round trip, but still reverses
+        pretty_print = (" _________                    ________ \n"
+                        "|Employer |<>1-employees---*>|Employee|\n"
+                        "|---------|                  |--------|\n"
+                        "|name     |                  |position|\n"
+                        "|employees|                  |________|\n"
+                        "|_________|\n")
+
+        self.assertEqual(reverse(pretty_print),
+                         ("|Employer name <>1-employees--*> Employee", False))
+        self.assertFalse(round_trips(pretty_print))
+
+    def test_parse_failure(self):
+        with self.assertRaises(PrettyPrintParserException):
+            PrettyPrintParser("|Kitchen color").parse()
+
+        # Two unrelated boxes aren't a single easy-entry diagram
+        with self.assertRaises(PrettyPrintParserException):
+            PrettyPrintParser(" _ \n"
+                              "|A|\n"
+                              "|_|\n"
+                              " _ \n"
+                              "|B|\n"
+                              "|_|\n").parse()
+
+        self.assertFalse(round_trips(" ____\n|Room\n"))
+
+
+class TestReverseBlocks(unittest.TestCase):
+    """
+    Test cases to exercise reverse_blocks().
+    """
+    def test_reverse_blocks(self):
+        text = ("# Design\n"
+                "\n"
+                "   ______ \n"
+                "  |Person|\n"
+                "  |______|\n"
+                "  ∆\n"
+                "  |________ \n"
+                "  |Employee|\n"
+                "  |________|\n"
+                "Some notes\n"
+                " ________              ____ \n"
+                "|Airplane|<>-wings--->|Wing|\n"
+                "|--------|            |____|\n"
+                "|wings   |                  \n"
+                "|________|                  \n"
+                " _ \n"
+                "|A|   |not a box\n"
+                "|_|\n"
+                " _ \n"
+                "|B|\n"
+                "|_|\n")
+
+        blocks = reverse_blocks(text)
+
+        self.assertEqual([(block.first, block.last) for block in blocks],
+                         [(2, 8), (10, 14), (15, 17), (18, 20)])
+        self.assertEqual(blocks[0].easy_entry, "  |Person >> Employee")
+        self.assertEqual(blocks[1].easy_entry, "|Airplane <>-wings--> Wing")
+        self.assertEqual(blocks[1].text.splitlines()[1],
+                         "|Airplane|<>-wings--->|Wing|")
+        self.assertEqual([block.exact for block in blocks],
+                         [True, True, False, True])
+
+    def test_reverse_blocks_rows(self):
+        # Only newlines start rows, as in a Sublime view
+        text = ("Page 1\x0cPage 2\r\n"
+                " _______ \r\n"
+                "|Kitchen|\r\n"
+                "|_______|\r\n")
+
+        blocks = reverse_blocks(text)
+
+        self.assertEqual([(block.first, block.last, block.easy_entry)
+                          for block in blocks], [(1, 3, "|Kitchen")])
+        self.assertTrue(blocks[0].exact)
+
+    def test_reverse_blocks_side_by_side(self):
+        # Unrelated boxes on the same rows are one block that doesn't parse
+        text = (" _    _ \n"
+                "|A|  |B|\n"
+                "|_|  |_|\n")
+
+        self.assertEqual(reverse_blocks(text), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
+import time
 import unittest
-from prexel.regex import REGEX
+from prexel.regex import REGEX, classify
 
 
 class TestRegex(unittest.TestCase):
@@ -65,6 +66,37 @@ class TestRegex(unittest.TestCase):
         self.assertEqual(groups[1], "name")
         self.assertEqual(groups[2], "")
 
+    def test_aggregation_regex_malformed_tokens(self):
+        """
+        Long malformed aggregation tokens have to fail in linear time.
+        Before the aggregation pattern was guarded these took minutes.
+        Rather than a wall-clock limit, the time for tokens four times as
+        long is compared, which grows 16 times for quadratic backtracking.
+        See prexel.benchmarks.adversarial_benchmark for the timings.
+        """
+        def tokens(length):
+            return ["<>" + "-" * (2 * length),
+                    "<>1" + "-a" * length,
+                    "<>" + "-" * length + "a" * length + "-x>"]
+
+        def best_time(length):
+            times = []
+
+            for _ in range(5):
+                start = time.perf_counter()
+
+                for token in tokens(length):
+                    self.assertFalse(REGEX["aggregation"].match(token))
+                    self.assertFalse(REGEX["token_type"].match(token))
+                    self.assertEqual(
+                        len(list(REGEX["token"].finditer(token))), 1)
+
+                times.append(time.perf_counter() - start)
+
+            return min(times)
+
+        self.assertLess(best_time(80000), 10 * best_time(20000))
+
     def test_inheritance_regex(self):
         inheritance_regex = REGEX["inheritance"]
 
@@ -72,5 +104,36 @@ class TestRegex(unittest.TestCase):
         self.assertFalse(inheritance_regex.match("> >"))
 
 
+class TestClassify(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(classify("Kitchen"), ("class_name", ()))
+        self.assertEqual(classify(">>"), ("inheritance", ()))
+        self.assertEqual(classify("<>1--name----*>"),
+                         ("aggregation", ("1", "name", "*")))
+        self.assertEqual(classify("<>--->"), ("aggregation", ("", "", "")))
+        self.assertEqual(classify("sample_method(param1,[])"),
+                         ("method_signature", ("sample_method", "param1,[]")))
+        self.assertEqual(classify("Sample_method()"),
+                         ("method_signature", ("Sample_method", "")))
+        self.assertEqual(classify("<>"), ("ignored", ()))
+        self.assertEqual(classify("<<>>"), ("ignored", ()))
+        self.assertEqual(classify("color"), ("field", ()))
+        self.assertEqual(classify("<>1a--1b>"), ("field", ()))
+        self.assertEqual(classify(">>>"), ("field", ()))
+        self.assertEqual(classify("()"), ("field", ()))
+
+    def test_classify_cache(self):
+        classify.cache_clear()
+
+        for _ in range(3):
+            classify("color")
+            classify("Kitchen")
+
+        info = classify.cache_info()
+        self.assertEqual(info.misses, 2)
+        self.assertEqual(info.hits, 4)
+        self.assertEqual(info.currsize, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
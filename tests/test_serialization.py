@@ -0,0 +1,96 @@
+import io
+import unittest
+
+from prexel.parser.lexer import Lexer
+from prexel.parser.interpreter import Interpreter
+from prexel.encoders.pretty_print_encoder import PrettyPrintEncoder
+from prexel.models.diagram import Diagram, ClassDiagramPart
+from prexel.models.serialization import (dumps,
+                                         loads,
+                                         dump,
+                                         load,
+                                         DiagramReader,
+                                         HEADER,
+                                         SerializationException)
+from prexel.tests.helpers import evaluate, KITCHEN
+
+
+class TestSerialization(unittest.TestCase):
+    """
+    Test cases to exercise the serialization module.
+    """
+    def test_round_trip(self):
+        diagram = evaluate(KITCHEN.replace("Kitchen", "Küche"))
+        loaded = loads(dumps(diagram))
+
+        self.assertEqual(loaded.canonical(), diagram.canonical())
+        self.assertEqual(loaded.content_hash(), diagram.content_hash())
+
+        # The loaded diagram can be used with the encoders
+        self.assertEqual(PrettyPrintEncoder().generate(loaded),
+                         PrettyPrintEncoder().generate(diagram))
+
+    def test_unnamed_main(self):
+        """
+        Test the partial diagram of an entry without a class name
+        """
+        diagram = Interpreter(Lexer("| x y")).evaluate(recover=True)
+        loaded = loads(dumps(diagram))
+        self.assertEqual(loaded.main.name, "")
+        self.assertEqual(loaded.classes, {})
+
+        diagram = Diagram(main=ClassDiagramPart("", ["x", "y"]))
+        diagram.add_class(ClassDiagramPart("Room", ["size"]))
+        loaded = loads(dumps(diagram))
+
+        self.assertEqual(loaded.main.fields, ["x", "y"])
+        self.assertEqual(list(loaded.classes), ["Room"])
+        self.assertEqual(loaded.content_hash(), diagram.content_hash())
+
+    def test_stream(self):
+        diagrams = [evaluate("|Room size >> Kitchen"),
+                    evaluate("|Airplane <>-wings--> Wing"),
+                    Diagram()]
+        file = io.BytesIO()
+        dump(diagrams, file)
+
+        file.seek(0)
+        reader = DiagramReader(file)
+        self.assertEqual(next(reader).main.name, "Kitchen")
+        self.assertEqual(next(reader).aggregated.name, "Wing")
+        self.assertIsNone(next(reader).main)
+        self.assertEqual(list(reader), [])
+
+        file.seek(0)
+        self.assertEqual(len(load(file)), 3)
+
+    def test_errors(self):
+        data = dumps(evaluate("|Room size >> Kitchen"))
+
+        with self.assertRaises(SerializationException):
+            loads(b"JUNK" + data[4:])
+
+        with self.assertRaises(SerializationException):
+            loads(data[:6] + b"\x02\x00" + data[8:])
+
+        with self.assertRaises(SerializationException):
+            load(io.BytesIO(data[:-3]))
+
+        # Future versions are rejected
+        with self.assertRaises(SerializationException):
+            loads(data[:4] + b"\x02\x00" + data[6:])
+
+    def test_truncated(self):
+        data = dumps(evaluate("|Room size >> Kitchen <>-doors--> Door"))
+
+        # Every prefix of the file is rejected with a SerializationException
+        for end in range(len(data)):
+            with self.assertRaises(SerializationException):
+                loads(data[:end])
+
+            # A stream may end right after the header
+            if end != HEADER.size:
+                with self.assertRaises(SerializationException):
+                    load(io.BytesIO(data[:end]))
+
+        self.assertEqual(load(io.BytesIO(data[:HEADER.size])), [])
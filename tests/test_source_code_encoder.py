@@ -134,6 +134,23 @@ class TestSourceCodeEncoderMain(unittest.TestCase):
         print(actual[0][1])
         print(actual[1][1])
 
+    def test_generate_all(self):
+        diagram = Diagram()
+        diagram.add_class(ClassDiagramPart("Kitchen", fields=["color"]))
+        diagram.add_class(ClassDiagramPart("Galley"))
+        diagram.add_class(ClassDiagramPart("Room"))
+        diagram.add_inheritance("Galley", "Kitchen")
+        diagram.add_inheritance("Kitchen", "Room")
+
+        encoder = SourceCodeEncoder()
+        actual = encoder.generate_all(diagram)
+
+        # Parents are generated before their children
+        self.assertEqual([name for name, _ in actual],
+                         ["room", "kitchen", "galley"])
+        self.assertEqual(actual[2][1], ("class Galley(Kitchen):\n"
+                                        "    pass\n"))
+
 
 class TestSourceCodeEncoderMainHelpers(unittest.TestCase):
     """
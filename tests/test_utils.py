@@ -94,6 +94,22 @@ class TestUtilsPersistence(unittest.TestCase):
         self.persistence._save_easy_entry(hashcode, easy_entry)
         self.assertEqual(easy_entry, self.persistence._load_easy_entry(hashcode))
 
+    def test_load_all(self):
+        self.persistence.save("|Room >> Kitchen", " ____\n|Room|")
+        self.persistence.save("|Room\n|size", " ____\n|Room|\n|size|")
+
+        found = self.persistence.load_all([" ____\n|Room|",
+                                           "  ____\n  |Room|\n  |size|",
+                                           " ____\n|Hall|"])
+
+        self.assertEqual(found, {
+            " ____\n|Room|": "|Room >> Kitchen",
+            "  ____\n  |Room|\n  |size|": "|Room\n|size"
+        })
+
+    def test_load_all_without_history(self):
+        self.assertEqual(self.persistence.load_all([" ____\n|Room|"]), {})
+
 
 if __name__ == '__main__':
     unittest.main()
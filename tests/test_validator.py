@@ -0,0 +1,80 @@
+import unittest
+
+from prexel.models.diagram import (Diagram,
+                                   ClassDiagramPart,
+                                   AggregationDiagramPart)
+from prexel.models.validator import (validate,
+                                     DUPLICATE_CLASS,
+                                     DUPLICATE_FIELD,
+                                     INHERITANCE_CYCLE,
+                                     DANGLING_AGGREGATION,
+                                     DANGLING_INHERITANCE,
+                                     CONFLICTING_MULTIPLICITY)
+from prexel.tests.helpers import evaluate, KITCHEN
+
+
+def kinds(problems):
+    return [problem.kind for problem in problems]
+
+
+class TestValidator(unittest.TestCase):
+    """
+    Test cases to exercise the validate() function.
+    """
+    def test_valid(self):
+        diagram = evaluate(KITCHEN)
+        self.assertEqual(validate(diagram), [])
+
+    def test_duplicate_class(self):
+        problems = validate(evaluate("|Kitchen color"),
+                            evaluate("|Kitchen size"),
+                            evaluate("|Kitchen color"))
+        self.assertEqual(kinds(problems), [DUPLICATE_CLASS])
+        self.assertEqual(problems[0].names, ("Kitchen",))
+
+    def test_duplicate_field(self):
+        problems = validate(evaluate("|Kitchen color size color"))
+        self.assertEqual(kinds(problems), [DUPLICATE_FIELD])
+
+    def test_inheritance_cycle(self):
+        diagram = Diagram()
+        for name in ("A", "B", "C"):
+            diagram.add_class(ClassDiagramPart(name))
+
+        diagram.add_inheritance("A", "B")
+        diagram.add_inheritance("B", "C")
+        diagram.add_inheritance("C", "A")
+
+        problems = validate(diagram)
+        self.assertEqual(kinds(problems), [INHERITANCE_CYCLE])
+        self.assertEqual(problems[0].names, ("C", "B", "A"))
+
+        # A cycle through a second parent
+        diagram = Diagram()
+        for name in ("A", "B", "C"):
+            diagram.add_class(ClassDiagramPart(name))
+
+        diagram.add_inheritance("A", "C")
+        diagram.add_inheritance("A", "B")
+        diagram.add_inheritance("B", "A")
+
+        self.assertEqual(kinds(validate(diagram)), [INHERITANCE_CYCLE])
+
+    def test_dangling(self):
+        diagram = Diagram()
+        diagram.add_class(ClassDiagramPart("Kitchen"))
+        diagram.add_inheritance("Kitchen", "Room")
+        diagram.add_aggregation("Kitchen", "Cupboard",
+                                AggregationDiagramPart("cupboards"))
+
+        self.assertEqual(kinds(validate(diagram)),
+                         [DANGLING_INHERITANCE, DANGLING_AGGREGATION])
+
+        diagram = Diagram(main=ClassDiagramPart("Kitchen"),
+                          aggregation=AggregationDiagramPart("cupboards"))
+        self.assertEqual(kinds(validate(diagram)), [DANGLING_AGGREGATION])
+
+    def test_conflicting_multiplicity(self):
+        problems = validate(evaluate("|Kitchen <>1-cupboards--*> Cupboard"),
+                            evaluate("|Kitchen <>*-cupboards--*> Cupboard"))
+        self.assertEqual(kinds(problems), [CONFLICTING_MULTIPLICITY])
@@ -0,0 +1,54 @@
+import unittest
+
+from prexel.encoders.width import (char_width,
+                                   text_width,
+                                   cells,
+                                   clip,
+                                   WIDE_STARTS,
+                                   WIDE_ENDS)
+
+
+class TestWidth(unittest.TestCase):
+    """
+    Test cases to exercise the display width functions.
+    """
+    def test_char_width(self):
+        self.assertEqual(char_width("a"), 1)
+        self.assertEqual(char_width("∆"), 1)
+        self.assertEqual(char_width("é"), 1)
+        self.assertEqual(char_width("部"), 2)
+        self.assertEqual(char_width("カ"), 2)
+        self.assertEqual(char_width("한"), 2)
+        self.assertEqual(char_width("Ａ"), 2)
+        self.assertEqual(char_width("😀"), 2)
+        self.assertEqual(char_width("\U0002A6D6"), 2)
+
+    def test_table_sorted(self):
+        self.assertEqual(len(WIDE_STARTS), len(WIDE_ENDS))
+
+        for start, end, following in zip(WIDE_STARTS, WIDE_ENDS,
+                                         WIDE_STARTS[1:]):
+            self.assertLessEqual(start, end)
+            self.assertLess(end, following)
+
+    def test_text_width(self):
+        self.assertEqual(text_width(""), 0)
+        self.assertEqual(text_width("kitchen()"), 9)
+        self.assertEqual(text_width("台所"), 4)
+        self.assertEqual(text_width("open_扉()"), 9)
+
+    def test_cells(self):
+        self.assertEqual(cells("ab"), ["a", "b"])
+        self.assertEqual(cells("a色b"), ["a", "色", "", "b"])
+
+    def test_clip(self):
+        self.assertEqual(clip("abcdef", 1, 3), "bc")
+        self.assertEqual(clip("a色b", 0, 4), "a色b")
+
+        # Half of a wide character becomes a space
+        self.assertEqual(clip("a色b", 2, 4), " b")
+        self.assertEqual(clip("a色b", 0, 2), "a ")
+
+
+if __name__ == '__main__':
+    unittest.main()
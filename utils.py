@@ -38,6 +38,34 @@ class Persistence:
         hashcode = self._generate_hashcode(pretty_printed)
         return self._load_easy_entry(hashcode)
 
+    def load_all(self, pretty_printed_values):
+        """
+        Load the easy-entry strings for several pretty-printed diagrams with
+        a single pass over the history file. Returns a dict from each
+        pretty-printed diagram found to its easy-entry string.
+        """
+        wanted = {}
+        for pretty_printed in pretty_printed_values:
+            hashcode = self._generate_hashcode(pretty_printed)
+            wanted.setdefault(hashcode, []).append(pretty_printed)
+
+        found = {}
+        if not wanted:
+            return found
+
+        try:
+            with open(self.history_file_path()) as file:
+                for line in file:
+                    hashcode, _, easy_entry = line.partition(":")
+
+                    for pretty_printed in wanted.get(hashcode, ()):
+                        found[pretty_printed] = \
+                            easy_entry.strip().replace("[!NL]", "\n")
+        except FileNotFoundError:
+            pass
+
+        return found
+
     def _save_easy_entry(self, hashcode, easy_entry_value):
         # Check if easy_entry string already exists in history file
         easy_entry = self._load_easy_entry(hashcode)